@@ -2,13 +2,32 @@
 Base agent class and utilities
 """
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple, Callable, Awaitable
+import asyncio
 import os
 import json
+import time
 from dotenv import load_dotenv
+from .llm_client import get_llm_registry
+from .llm_cache import get_llm_cache, LLMResponseCache
+from .runtime import run_sync
+from .singleflight import get_flight_group
+from .rate_limiter import get_rate_limiter, estimate_tokens
+from .resilience import call_with_resilience, call_with_resilience_async
 
 load_dotenv()
 
+# Concurrent identical LLM requests share one underlying API call
+_llm_flights = get_flight_group("llm")
+
+# Receives each text delta of a streamed LLM response
+TokenCallback = Callable[[str], Awaitable[None]]
+
+
+class StreamInterruptedError(RuntimeError):
+    """A streamed response failed after part of it was already delivered (not retried)"""
+    pass
+
 
 class BaseAgent(ABC):
     """Base class for all agents"""
@@ -19,12 +38,143 @@ class BaseAgent(ABC):
             raise ValueError("OPENAI_API_KEY not found in environment variables")
     
     @abstractmethod
-    def execute(self, *args, **kwargs):
-        """Execute agent task"""
+    async def execute_async(self, *args, **kwargs):
+        """Execute agent task on the running event loop"""
         pass
+    
+    def execute(self, *args, **kwargs):
+        """Execute agent task synchronously (thin wrapper around execute_async)"""
+        return run_sync(self.execute_async(*args, **kwargs))
+
+
+def _usage_tokens(response) -> int:
+    """Total tokens reported by an OpenAI response (0 if unavailable)"""
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "total_tokens", 0) or 0
+
+
+def _cache_lookup(prompt: str, model: str, temperature: float, use_cache: bool) -> Tuple[Optional[str], Optional[str]]:
+    """Return (cache_key, cached_response); key is None when caching is skipped"""
+    cache = get_llm_cache()
+    if not use_cache or not cache.enabled:
+        return None, None
+    key = cache.make_key(model, temperature, prompt)
+    return key, cache.get(key)
+
+
+def _request_completion(prompt: str, model: str, temperature: float, cache_key: Optional[str]) -> str:
+    """Send one chat completion request over the pooled client and cache the result"""
+    registry = get_llm_registry()
+    client = registry.get_client()
+    limiter = get_rate_limiter(model)
+    
+    def _attempt(timeout: float):
+        with limiter.limit(estimate_tokens(prompt)) as permit, registry.track_request():
+            response = client.chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature,
+                timeout=timeout
+            )
+            permit.record_usage(_usage_tokens(response))
+        return response
+    
+    try:
+        start = time.perf_counter()
+        response = call_with_resilience("openai", _attempt)
+        content = response.choices[0].message.content
+    except Exception as e:
+        # Raise exception instead of falling back to mock
+        raise RuntimeError(f"OpenAI API call failed: {e}") from e
+    
+    if cache_key is not None:
+        get_llm_cache().set(cache_key, content, model=model, tokens=_usage_tokens(response), latency=time.perf_counter() - start)
+    return content
+
+
+async def _request_completion_async(prompt: str, model: str, temperature: float, cache_key: Optional[str]) -> str:
+    """Send one chat completion request over the pooled async client and cache the result"""
+    registry = get_llm_registry()
+    client = registry.get_async_client()
+    limiter = get_rate_limiter(model)
+    
+    async def _attempt(timeout: float):
+        async with limiter.limit_async(estimate_tokens(prompt)) as permit:
+            with registry.track_request():
+                response = await client.chat.completions.create(
+                    model=model,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=temperature,
+                    timeout=timeout
+                )
+            permit.record_usage(_usage_tokens(response))
+        return response
+    
+    try:
+        start = time.perf_counter()
+        # Time spent queued in the rate limiter is not an upstream failure, so
+        # only the HTTP request itself is bounded (by the client timeout)
+        response = await call_with_resilience_async("openai", _attempt, hard_timeout=False)
+        content = response.choices[0].message.content
+    except Exception as e:
+        raise RuntimeError(f"OpenAI API call failed: {e}") from e
+    
+    if cache_key is not None:
+        # The disk tier is SQLite: store from a worker thread
+        await asyncio.to_thread(
+            get_llm_cache().set, cache_key, content, model=model, tokens=_usage_tokens(response), latency=time.perf_counter() - start
+        )
+    return content
+
+
+async def _stream_completion_async(prompt: str, model: str, temperature: float, cache_key: Optional[str], on_token: TokenCallback) -> str:
+    """Stream one chat completion, passing each text delta to on_token, and cache the result"""
+    registry = get_llm_registry()
+    client = registry.get_async_client()
+    limiter = get_rate_limiter(model)
+    tokens = 0
+    
+    async def _attempt(timeout: float) -> str:
+        nonlocal tokens
+        parts = []
+        async with limiter.limit_async(estimate_tokens(prompt)) as permit:
+            with registry.track_request():
+                try:
+                    stream = await client.chat.completions.create(
+                        model=model,
+                        messages=[{"role": "user", "content": prompt}],
+                        temperature=temperature,
+                        stream=True,
+                        stream_options={"include_usage": True},
+                        timeout=timeout
+                    )
+                    async for chunk in stream:
+                        if getattr(chunk, "usage", None):
+                            tokens = _usage_tokens(chunk)
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if delta:
+                            parts.append(delta)
+                            await on_token(delta)
+                except Exception as e:
+                    # Retrying after deltas reached the caller would repeat them
+                    if parts:
+                        raise StreamInterruptedError(f"stream interrupted: {e}") from e
+                    raise
+            permit.record_usage(tokens)
+        return "".join(parts)
+    
+    try:
+        start = time.perf_counter()
+        content = await call_with_resilience_async("openai", _attempt, hard_timeout=False)
+    except Exception as e:
+        raise RuntimeError(f"OpenAI API call failed: {e}") from e
+    
+    if cache_key is not None:
+        await asyncio.to_thread(get_llm_cache().set, cache_key, content, model=model, tokens=tokens, latency=time.perf_counter() - start)
+    return content
 
 
-def call_llm(prompt: str, model: str = "gpt-3.5-turbo", temperature: float = 0.7) -> str:
+def call_llm(prompt: str, model: str = "gpt-3.5-turbo", temperature: float = 0.7, use_cache: bool = True, coalesce: bool = True) -> str:
     """
     Call OpenAI LLM API
     
@@ -32,28 +182,55 @@ def call_llm(prompt: str, model: str = "gpt-3.5-turbo", temperature: float = 0.7
         prompt: The prompt to send to the LLM
         model: OpenAI model to use (default: gpt-3.5-turbo)
         temperature: Sampling temperature (0-2)
+        use_cache: Serve identical (model, temperature, prompt) requests from the response cache
+        coalesce: Share one in-flight request between concurrent identical calls
         
     Returns:
         LLM response text
     """
-    from openai import OpenAI
+    cache_key, cached = _cache_lookup(prompt, model, temperature, use_cache)
+    if cached is not None:
+        return cached
     
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise ValueError("OPENAI_API_KEY not found in environment variables")
+    if not coalesce:
+        return _request_completion(prompt, model, temperature, cache_key)
     
-    client = OpenAI(api_key=api_key)
+    flight_key = cache_key or LLMResponseCache.make_key(model, temperature, prompt)
+    return _llm_flights.do(flight_key, _request_completion, prompt, model, temperature, cache_key)
+
+
+async def call_llm_async(prompt: str, model: str = "gpt-3.5-turbo", temperature: float = 0.7, use_cache: bool = True, coalesce: bool = True, on_token: Optional[TokenCallback] = None) -> str:
+    """
+    Call OpenAI LLM API without blocking the event loop
     
-    try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=temperature
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        # Raise exception instead of falling back to mock
-        raise RuntimeError(f"OpenAI API call failed: {e}") from e
+    Args:
+        prompt: The prompt to send to the LLM
+        model: OpenAI model to use (default: gpt-3.5-turbo)
+        temperature: Sampling temperature (0-2)
+        use_cache: Serve identical (model, temperature, prompt) requests from the response cache
+        coalesce: Share one in-flight request between concurrent identical calls
+        on_token: Stream the response, awaiting on_token with each text delta as it
+            arrives (a cached response is delivered as a single delta). Streamed
+            calls are never coalesced.
+        
+    Returns:
+        LLM response text
+    """
+    # A miss in the memory tier reads SQLite: look up from a worker thread
+    cache_key, cached = await asyncio.to_thread(_cache_lookup, prompt, model, temperature, use_cache)
+    if cached is not None:
+        if on_token is not None:
+            await on_token(cached)
+        return cached
+    
+    if on_token is not None:
+        return await _stream_completion_async(prompt, model, temperature, cache_key, on_token)
+    
+    if not coalesce:
+        return await _request_completion_async(prompt, model, temperature, cache_key)
+    
+    flight_key = cache_key or LLMResponseCache.make_key(model, temperature, prompt)
+    return await _llm_flights.do_async(flight_key, _request_completion_async, prompt, model, temperature, cache_key)
 
 
 def call_llm_with_tools(
@@ -80,13 +257,8 @@ def call_llm_with_tools(
     Returns:
         (response_text, tool_calls_made) - Response and list of tool calls executed
     """
-    from openai import OpenAI
-    
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise ValueError("OPENAI_API_KEY not found in environment variables")
-    
-    client = OpenAI(api_key=api_key)
+    registry = get_llm_registry()
+    client = registry.get_client()
     
     messages = [{"role": "user", "content": prompt}]
     tool_calls_executed = []
@@ -95,13 +267,22 @@ def call_llm_with_tools(
     try:
         while iteration < max_iterations:
             # Call LLM with current messages and tools
-            response = client.chat.completions.create(
-                model=model,
-                messages=messages,
-                tools=tools if tools else None,
-                tool_choice=tool_choice if iteration == 0 else "auto",
-                temperature=temperature
-            )
+            limiter = get_rate_limiter(model)
+            
+            def _attempt(timeout: float):
+                with limiter.limit(estimate_tokens(json.dumps(messages))) as permit, registry.track_request():
+                    response = client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        tools=tools if tools else None,
+                        tool_choice=tool_choice if iteration == 0 else "auto",
+                        temperature=temperature,
+                        timeout=timeout
+                    )
+                    permit.record_usage(_usage_tokens(response))
+                return response
+            
+            response = call_with_resilience("openai", _attempt)
             
             message = response.choices[0].message
             messages.append({
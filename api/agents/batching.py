@@ -0,0 +1,117 @@
+"""
+Micro-batching for LLM calls
+
+Callers submit items one at a time; the batcher groups the items that
+arrive close together into a single handler call, flushing when the batch
+reaches its weight budget (e.g. estimated prompt tokens) or when the
+oldest item has waited max_wait seconds.
+"""
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+import asyncio
+
+
+class MicroBatcher:
+    """Groups concurrently submitted items into batched handler calls (one event loop)"""
+
+    def __init__(
+        self,
+        handler: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_weight: float,
+        max_wait: float = 0.2,
+        weigh: Callable[[Any], float] = None
+    ):
+        """
+        Args:
+            handler: Coroutine function taking a batch of items and returning
+                one result per item, in the same order (an Exception instance
+                fails only that item)
+            max_weight: Flush once the batch's total weight reaches this budget
+            max_wait: Seconds the first item of a batch waits for others
+            weigh: Weight of one item (default: 1 per item)
+        """
+        self.handler = handler
+        self.max_weight = max_weight
+        self.max_wait = max_wait
+        self.weigh = weigh or (lambda item: 1)
+
+        self._batch: List[Tuple[Any, asyncio.Future]] = []
+        self._weight = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+        self.stats = {"items": 0, "batches": 0}
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Add an item to the current batch and wait for its result
+
+        Returns:
+            The handler's result for this item
+        """
+        loop = asyncio.get_running_loop()
+        weight = self.weigh(item)
+
+        # Keep each batch within budget: an item that would overflow it starts a new one
+        if self._batch and self._weight + weight > self.max_weight:
+            self.flush()
+
+        future = loop.create_future()
+        self._batch.append((item, future))
+        self._weight += weight
+        self.stats["items"] += 1
+
+        if self._weight >= self.max_weight:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self.flush)
+
+        return await future
+
+    def flush(self):
+        """Send the current batch to the handler now"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._batch:
+            return
+
+        batch, self._batch, self._weight = self._batch, [], 0.0
+        self.stats["batches"] += 1
+        task = asyncio.ensure_future(self._run(batch))
+        # Keep a reference so the task is not garbage collected mid-flight
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def cancel(self):
+        """Drop the pending batch and cancel batches in flight (nobody is waiting any more)"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for _, future in self._batch:
+            future.cancel()
+        self._batch, self._weight = [], 0.0
+        for task in list(self._tasks):
+            task.cancel()
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]):
+        items = [item for item, _ in batch]
+        try:
+            results = await self.handler(items)
+            if len(results) != len(items):
+                raise ValueError(f"batch handler returned {len(results)} results for {len(items)} items")
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -0,0 +1,320 @@
+"""
+Company knowledge base
+
+What research learns about a company is kept and reused by later
+campaigns instead of asking the tools again:
+- Verification result (does the company exist)
+- Provider data (Clearbit or web search)
+- LLM enrichment (description, relevance, news), per offer - the relevance
+  of a company depends on the product and context it is pitched
+
+Companies are keyed by normalized name plus domain, each field carries its
+own fetched-at timestamp and TTL, and the data lives in a SQLite file
+shared by every process. resolve() maps another spelling of a known company
+("Acme Corporation" for "Acme Corp") onto the name it is stored under.
+"""
+from typing import Dict, Any, Optional
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from .settings import env_float, env_bool
+from .entity_resolution import CompanyIndex, normalize_company_name, normalize_domain
+
+# Enrichment fields kept per offer
+ENRICHMENT_FIELDS = ("description", "relevance_reason", "recent_news")
+
+
+class CompanyKnowledgeBase:
+    """Persistent per-company verification, provider data and enrichment with per-field TTLs"""
+
+    def __init__(
+        self,
+        path: str = None,
+        verification_ttl: float = None,
+        provider_data_ttl: float = None,
+        enrichment_ttl: float = None,
+        enabled: bool = None
+    ):
+        """
+        Configure the knowledge base (values default to COMPANY_KB_* env vars)
+
+        Args:
+            path: SQLite file (":memory:" for a private, non-persistent store)
+            verification_ttl: How long a verification result is trusted
+            provider_data_ttl: How long Clearbit / web search data is trusted
+            enrichment_ttl: How long LLM enrichment is reused (it includes recent news)
+            enabled: Turn the knowledge base on or off globally
+        """
+        self.path = path or os.getenv("COMPANY_KB_PATH", "./company_kb.db")
+        self.verification_ttl = verification_ttl if verification_ttl is not None else env_float("COMPANY_KB_VERIFICATION_TTL", 30 * 24 * 3600)
+        self.provider_data_ttl = provider_data_ttl if provider_data_ttl is not None else env_float("COMPANY_KB_PROVIDER_DATA_TTL", 30 * 24 * 3600)
+        self.enrichment_ttl = enrichment_ttl if enrichment_ttl is not None else env_float("COMPANY_KB_ENRICHMENT_TTL", 7 * 24 * 3600)
+        self.enabled = enabled if enabled is not None else env_bool("COMPANY_KB_ENABLED", True)
+
+        self._lock = threading.Lock()  # Guards the connection
+        self._conn = None
+        self._index_lock = threading.Lock()  # Guards the index; never taken while holding _lock
+        self._index = None  # CompanyIndex of stored companies, loaded on first resolve()
+        self._stats = {
+            "verification_hits": 0,
+            "provider_data_hits": 0,
+            "enrichment_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "resolved": 0
+        }
+
+    @staticmethod
+    def make_key(name: str, website: str = None) -> str:
+        """Knowledge base key of a company: normalized name plus domain"""
+        return f"{normalize_company_name(name)}|{normalize_domain(website)}"
+
+    @staticmethod
+    def offer_key(product_service: str, context: str = None) -> str:
+        """Key of the offer an enrichment was written for"""
+        payload = f"{' '.join((product_service or '').lower().split())}\x00{' '.join((context or '').lower().split())}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+    def _get_conn(self) -> sqlite3.Connection:
+        """Open the SQLite file on first use (caller holds the lock)"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA busy_timeout=5000")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS companies (
+                    key TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    normalized_name TEXT NOT NULL,
+                    domain TEXT NOT NULL,
+                    verified INTEGER,
+                    verified_at REAL,
+                    provider_data TEXT,
+                    provider_fetched_at REAL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_companies_normalized_name ON companies (normalized_name)")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS company_enrichments (
+                    company_key TEXT NOT NULL,
+                    offer_key TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    PRIMARY KEY (company_key, offer_key)
+                )
+            """)
+            self._conn.commit()
+        return self._conn
+
+    def lookup(self, name: str, website: str = None) -> Dict[str, Any]:
+        """
+        Get what is known about a company and still fresh
+
+        Args:
+            name: Company name
+            website: Company website or domain
+
+        Returns:
+            {"verified": bool or None, "provider_data": dict or None}; None
+            means unknown or expired, and the tool has to be asked
+        """
+        known = {"verified": None, "provider_data": None}
+        if not self.enabled:
+            return known
+
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._get_conn().execute(
+                    "SELECT verified, verified_at, provider_data, provider_fetched_at FROM companies WHERE key = ?",
+                    (self.make_key(name, website),)
+                ).fetchone()
+            except sqlite3.Error as e:
+                print(f"[COMPANY KB] Lookup failed: {e}")
+                row = None
+
+            if row is not None:
+                verified, verified_at, provider_data, provider_fetched_at = row
+                if verified is not None and verified_at + self.verification_ttl > now:
+                    known["verified"] = bool(verified)
+                    self._stats["verification_hits"] += 1
+                if provider_data is not None and provider_fetched_at + self.provider_data_ttl > now:
+                    known["provider_data"] = json.loads(provider_data)
+                    self._stats["provider_data_hits"] += 1
+            if known["verified"] is None and known["provider_data"] is None:
+                self._stats["misses"] += 1
+        return known
+
+    def resolve(self, name: str, website: str = None) -> Optional[Dict[str, str]]:
+        """
+        Find the stored company a name and website refer to (exact or fuzzy match)
+
+        Companies stored by other processes are seen from the next process start.
+
+        Returns:
+            {"name": ..., "domain": ...} as stored, or None if the company is new
+        """
+        if not self.enabled:
+            return None
+
+        with self._index_lock:
+            if self._index is None:
+                # Only the read holds the connection lock; lookups and writes
+                # go on while the index is built
+                with self._lock:
+                    try:
+                        rows = self._get_conn().execute("SELECT name, domain FROM companies ORDER BY rowid").fetchall()
+                    except sqlite3.Error as e:
+                        print(f"[COMPANY KB] Loading companies failed: {e}")
+                        rows = []
+                index = CompanyIndex()
+                for stored_name, domain in rows:
+                    index.add({"name": stored_name, "domain": domain, "website": domain})
+                if rows:
+                    print(f"[COMPANY KB] Indexed {len(rows)} companies ({len(index)} distinct) for matching")
+                self._index = index
+
+            entity = self._index.find({"name": name, "website": website})
+            if entity is None:
+                return None
+            known = self._index.entities[entity]
+            self._stats["resolved"] += 1
+            return {"name": known["name"], "domain": known["domain"]}
+
+    def get_enrichment(self, name: str, website: str, offer_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a fresh LLM enrichment of a company for an offer
+
+        Returns:
+            The enrichment fields, or None if unknown or expired
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            try:
+                row = self._get_conn().execute(
+                    "SELECT data FROM company_enrichments WHERE company_key = ? AND offer_key = ? AND fetched_at > ?",
+                    (self.make_key(name, website), offer_key, time.time() - self.enrichment_ttl)
+                ).fetchone()
+            except sqlite3.Error as e:
+                print(f"[COMPANY KB] Enrichment lookup failed: {e}")
+                row = None
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["enrichment_hits"] += 1
+            return json.loads(row[0])
+
+    def record_verification(self, name: str, website: str, verified: bool):
+        """Store a verification result"""
+        self._upsert(name, website, "verified = excluded.verified, verified_at = excluded.verified_at",
+                     verified=int(bool(verified)), verified_at=time.time())
+
+    def record_provider_data(self, name: str, website: str, data: Dict[str, Any]):
+        """Store company data returned by a provider (Clearbit or web search)"""
+        self._upsert(name, website, "provider_data = excluded.provider_data, provider_fetched_at = excluded.provider_fetched_at",
+                     provider_data=json.dumps(data), provider_fetched_at=time.time())
+
+    def record_enrichment(self, name: str, website: str, offer_key: str, enriched: Dict[str, Any]):
+        """Store the LLM enrichment of a company for an offer"""
+        if not self.enabled:
+            return
+        data = {field: enriched[field] for field in ENRICHMENT_FIELDS if field in enriched}
+        self._upsert(name, website, None)
+        with self._lock:
+            try:
+                conn = self._get_conn()
+                conn.execute(
+                    "INSERT OR REPLACE INTO company_enrichments (company_key, offer_key, data, fetched_at) VALUES (?, ?, ?, ?)",
+                    (self.make_key(name, website), offer_key, json.dumps(data), time.time())
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"[COMPANY KB] Enrichment write failed: {e}")
+
+    def _upsert(self, name: str, website: str, update_sql: Optional[str], **fields):
+        """Insert the company row if missing, then apply update_sql from `fields` on conflict"""
+        if not self.enabled:
+            return
+
+        values = {
+            "key": self.make_key(name, website),
+            "name": name or "",
+            "normalized_name": normalize_company_name(name),
+            "domain": normalize_domain(website),
+            "verified": None,
+            "verified_at": None,
+            "provider_data": None,
+            "provider_fetched_at": None,
+            "updated_at": time.time(),
+            **fields
+        }
+        columns = ", ".join(values)
+        on_conflict = f"DO UPDATE SET {update_sql}, updated_at = excluded.updated_at" if update_sql else "DO NOTHING"
+        with self._lock:
+            try:
+                conn = self._get_conn()
+                conn.execute(
+                    f"INSERT INTO companies ({columns}) VALUES ({', '.join('?' * len(values))}) ON CONFLICT (key) {on_conflict}",
+                    tuple(values.values())
+                )
+                conn.commit()
+                self._stats["stores"] += 1
+            except sqlite3.Error as e:
+                print(f"[COMPANY KB] Write failed: {e}")
+                return
+        # Checked under the index lock: an index being built either read this row or gets it here
+        with self._index_lock:
+            if self._index is not None:
+                self._index.add({"name": values["name"], "domain": values["domain"], "website": values["domain"]})
+
+    def clear(self):
+        """Forget every company"""
+        with self._lock:
+            try:
+                conn = self._get_conn()
+                conn.execute("DELETE FROM companies")
+                conn.execute("DELETE FROM company_enrichments")
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"[COMPANY KB] Clear failed: {e}")
+                return
+        with self._index_lock:
+            self._index = None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report hit/miss counters
+
+        Returns:
+            Dict with hits per field, misses, stores and the number of known companies
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            try:
+                stats["companies"] = self._get_conn().execute("SELECT COUNT(*) FROM companies").fetchone()[0]
+            except sqlite3.Error:
+                stats["companies"] = None
+        stats["enabled"] = self.enabled
+        return stats
+
+
+_kb = None
+_kb_lock = threading.Lock()
+
+
+def get_company_knowledge_base() -> CompanyKnowledgeBase:
+    """Get the process-wide company knowledge base"""
+    global _kb
+    if _kb is None:
+        with _kb_lock:
+            if _kb is None:
+                _kb = CompanyKnowledgeBase()
+    return _kb
@@ -4,16 +4,20 @@ Content Generation Agent
 Generates personalized cold email content for leads.
 Now with agentic capabilities: iterative refinement based on quality scores.
 """
-from typing import Dict, Any, Tuple, Optional
-from .base import BaseAgent, call_llm
+from typing import Dict, Any, Tuple, Optional, Callable, Awaitable
+from .base import BaseAgent, call_llm_async, TokenCallback
+from .runtime import run_sync
 from .prompts import EMAIL_GENERATION_PROMPT
 import json
 
+# Receives (event_name, payload) progress events from execute_with_refinement_async
+EventCallback = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
 
 class ContentGenerationAgent(BaseAgent):
     """Agent responsible for generating personalized outreach content"""
     
-    def execute(self, lead_data: Dict[str, Any], product_service: str, context: str = None, angle: str = None, company_name: str = None) -> str:
+    async def execute_async(self, lead_data: Dict[str, Any], product_service: str, context: str = None, angle: str = None, company_name: str = None) -> str:
         """
         Generate personalized email content for a lead
         
@@ -30,12 +34,12 @@ class ContentGenerationAgent(BaseAgent):
         prompt = self._build_prompt(lead_data, product_service, context, angle, company_name)
         
         # Generate content using LLM
-        generated_content = call_llm(prompt, temperature=0.7, model="gpt-4")
+        generated_content = await call_llm_async(prompt, temperature=0.7, model="gpt-4", use_cache=False)
         
         # Format and return
         return self._format_email(generated_content)
     
-    def execute_with_refinement(
+    async def execute_with_refinement_async(
         self, 
         lead_data: Dict[str, Any], 
         product_service: str, 
@@ -44,7 +48,8 @@ class ContentGenerationAgent(BaseAgent):
         company_name: str = None,
         quality_agent = None,
         min_quality_score: int = 80,
-        max_iterations: int = 3
+        max_iterations: int = 3,
+        on_event: Optional[EventCallback] = None
     ) -> Tuple[str, Dict[str, Any]]:
         """
         Generate content with automatic refinement based on quality scores
@@ -60,20 +65,30 @@ class ContentGenerationAgent(BaseAgent):
             quality_agent: QualityEvaluationAgent instance for evaluation
             min_quality_score: Minimum acceptable quality score (0-100)
             max_iterations: Maximum number of refinement iterations
+            on_event: Optional async callback receiving progress as it happens:
+                - ("token", {"stage": "draft"|"refine", "iteration", "delta"}) while an email is written
+                - ("draft", {"content"}) once the first draft is ready
+                - ("quality", {"iteration", "scores"}) after each evaluation
+                - ("refined", {"iteration", "content"}) after each refinement
             
         Returns:
             (content, quality_scores) - Final content and quality metrics
         """
         # Generate initial content
-        content = self._generate_initial_content(lead_data, product_service, context, angle, company_name)
+        content = await self._generate_initial_content(
+            lead_data, product_service, context, angle, company_name,
+            on_token=self._token_forwarder(on_event, "draft", 0)
+        )
+        await self._emit(on_event, "draft", {"content": content})
         
         # If no quality agent provided, return without refinement
         if not quality_agent:
             return content, {"overall": 0, "note": "No quality agent provided"}
         
         # Evaluate initial quality
-        quality = quality_agent.execute(content, lead_data, product_service)
+        quality = await quality_agent.execute_async(content, lead_data, product_service)
         iteration = 0
+        await self._emit(on_event, "quality", {"iteration": iteration, "scores": quality})
         
         print(f"[CONTENT AGENT] Initial quality score: {quality['overall']}/100")
         
@@ -83,13 +98,18 @@ class ContentGenerationAgent(BaseAgent):
             print(f"[CONTENT AGENT] Refining content (iteration {iteration}/{max_iterations}), current score: {quality['overall']}/100")
             
             # Get specific feedback for improvement
-            feedback = self._get_improvement_feedback(quality, content, lead_data, product_service)
+            feedback = await self._get_improvement_feedback(quality, content, lead_data, product_service)
             
             # Refine content based on feedback
-            content = self._refine_content(content, feedback, lead_data, product_service, context, angle, company_name)
+            content = await self._refine_content(
+                content, feedback, lead_data, product_service, context, angle, company_name,
+                on_token=self._token_forwarder(on_event, "refine", iteration)
+            )
+            await self._emit(on_event, "refined", {"iteration": iteration, "content": content})
             
             # Re-evaluate
-            quality = quality_agent.execute(content, lead_data, product_service)
+            quality = await quality_agent.execute_async(content, lead_data, product_service)
+            await self._emit(on_event, "quality", {"iteration": iteration, "scores": quality})
             print(f"[CONTENT AGENT] After refinement {iteration}: {quality['overall']}/100")
         
         if iteration > 0:
@@ -99,13 +119,45 @@ class ContentGenerationAgent(BaseAgent):
         
         return content, quality
     
-    def _generate_initial_content(self, lead_data: Dict[str, Any], product_service: str, context: str = None, angle: str = None, company_name: str = None) -> str:
+    def execute_with_refinement(
+        self, 
+        lead_data: Dict[str, Any], 
+        product_service: str, 
+        context: str = None, 
+        angle: str = None, 
+        company_name: str = None,
+        quality_agent = None,
+        min_quality_score: int = 80,
+        max_iterations: int = 3
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Synchronous wrapper around execute_with_refinement_async"""
+        return run_sync(self.execute_with_refinement_async(
+            lead_data, product_service, context, angle, company_name,
+            quality_agent, min_quality_score, max_iterations
+        ))
+    
+    async def _emit(self, on_event: Optional[EventCallback], event: str, data: Dict[str, Any]):
+        """Send a progress event if a listener is attached"""
+        if on_event is not None:
+            await on_event(event, data)
+    
+    def _token_forwarder(self, on_event: Optional[EventCallback], stage: str, iteration: int) -> Optional[TokenCallback]:
+        """Build an LLM token callback that forwards deltas as "token" events (None without a listener)"""
+        if on_event is None:
+            return None
+        
+        async def on_token(delta: str):
+            await on_event("token", {"stage": stage, "iteration": iteration, "delta": delta})
+        
+        return on_token
+    
+    async def _generate_initial_content(self, lead_data: Dict[str, Any], product_service: str, context: str = None, angle: str = None, company_name: str = None, on_token: Optional[TokenCallback] = None) -> str:
         """Generate initial email content"""
         prompt = self._build_prompt(lead_data, product_service, context, angle, company_name)
-        generated_content = call_llm(prompt, temperature=0.7, model="gpt-4")
+        generated_content = await call_llm_async(prompt, temperature=0.7, model="gpt-4", use_cache=False, on_token=on_token)
         return self._format_email(generated_content)
     
-    def _get_improvement_feedback(self, quality: Dict[str, Any], content: str, lead_data: Dict[str, Any], product_service: str) -> str:
+    async def _get_improvement_feedback(self, quality: Dict[str, Any], content: str, lead_data: Dict[str, Any], product_service: str) -> str:
         """Get specific, actionable feedback for improvement"""
         feedback_prompt = f"""The following email scored {quality['overall']}/100 overall:
 - Personalization: {quality['personalization']}/100
@@ -122,10 +174,10 @@ Product/Service: {product_service}
 
 Provide specific, actionable feedback on how to improve this email. Focus on the lowest-scoring areas and provide concrete suggestions. Be specific about what needs to change."""
         
-        feedback = call_llm(feedback_prompt, temperature=0.5, model="gpt-3.5-turbo")
+        feedback = await call_llm_async(feedback_prompt, temperature=0.5, model="gpt-3.5-turbo")
         return feedback
     
-    def _refine_content(self, content: str, feedback: str, lead_data: Dict[str, Any], product_service: str, context: str = None, angle: str = None, company_name: str = None) -> str:
+    async def _refine_content(self, content: str, feedback: str, lead_data: Dict[str, Any], product_service: str, context: str = None, angle: str = None, company_name: str = None, on_token: Optional[TokenCallback] = None) -> str:
         """Refine content based on feedback"""
         refine_prompt = f"""Improve this email based on the feedback provided.
 
@@ -157,7 +209,7 @@ Rewrite the email addressing ALL feedback points. Make it significantly better w
 
 Return the improved email in the same format (Subject: ... followed by body)."""
         
-        refined = call_llm(refine_prompt, temperature=0.7, model="gpt-4")
+        refined = await call_llm_async(refine_prompt, temperature=0.7, model="gpt-4", use_cache=False, on_token=on_token)
         return self._format_email(refined)
     
     def _build_prompt(self, lead_data: Dict[str, Any], product_service: str, context: str = None, angle: str = None, company_name: str = None) -> str:
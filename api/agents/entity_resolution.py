@@ -0,0 +1,208 @@
+"""
+Entity resolution for generated companies
+
+The LLM often names one company several ways ("Acme Corp", "Acme
+Corporation", "acme.com"), within one response and across campaigns.
+CompanyIndex recognizes the variants so each company is verified,
+enriched and emailed once:
+- Exact keys: normalized name (legal forms, punctuation and spaces
+  removed) and domain, looked up in dicts
+- Fuzzy names: MinHash signatures of character 3-grams, bucketed by
+  locality-sensitive hashing; only companies sharing a bucket are
+  compared, and a match needs an actual 3-gram Jaccard similarity above
+  the threshold
+
+Adding or matching a company only looks at the companies with a similar
+name, so indexing thousands of historical companies stays near-linear.
+"""
+from typing import Dict, Any, List, Optional, Set, Tuple
+import random
+import re
+import zlib
+from urllib.parse import urlparse
+
+from .settings import env_float
+
+# Legal-form suffixes that do not distinguish one company from another
+_LEGAL_SUFFIXES = {
+    "inc", "incorporated", "llc", "llp", "ltd", "limited", "corp", "corporation", "co", "company",
+    "plc", "gmbh", "ag", "sa", "sas", "srl", "bv", "nv", "pty", "oy", "ab", "as", "kg", "group", "holdings"
+}
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+_DOMAIN_LIKE = re.compile(r"^(?:https?://)?(?:www\.)?[0-9a-z-]+(?:\.[0-9a-z-]+)+/?$")
+
+# Hosts shared by many companies (profiles, directories): never evidence of the same company
+_SHARED_HOSTS = {
+    "linkedin.com", "facebook.com", "twitter.com", "x.com", "instagram.com", "youtube.com",
+    "google.com", "yelp.com", "github.com", "crunchbase.com", "wixsite.com", "squarespace.com"
+}
+
+# MinHash: NUM_PERM hash functions split into BANDS buckets of NUM_PERM / BANDS rows.
+# Names with 3-gram similarity s share a bucket with probability 1 - (1 - s^4)^8
+# (0.98 at s = 0.8, 0.05 at s = 0.3)
+NUM_PERM = 32
+BANDS = 8
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240917)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def normalize_company_name(name: Optional[str]) -> str:
+    """Lowercase a company name, drop punctuation and trailing legal forms ("Acme, Inc." -> "acme")"""
+    words = _NON_WORD.sub(" ", (name or "").lower()).split()
+    while len(words) > 1 and words[-1] in _LEGAL_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+
+def normalize_domain(website: Optional[str]) -> str:
+    """Bare host of a website or domain ("https://www.Acme.com/about" -> "acme.com")"""
+    value = (website or "").strip().lower()
+    if not value:
+        return ""
+    if "://" not in value:
+        value = f"//{value}"
+    try:
+        host = urlparse(value).hostname or ""
+    except ValueError:
+        return ""
+    return host[4:] if host.startswith("www.") else host
+
+
+def company_keys(name: Optional[str], website: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Matching keys of a company
+
+    A name that is itself a domain ("acme.com") stands for that domain and
+    for its first label as the name.
+
+    Returns:
+        (compact name with spaces removed, domain); either may be empty
+    """
+    domain = normalize_domain(website)
+    raw = (name or "").strip().lower()
+    if _DOMAIN_LIKE.match(raw):
+        domain = domain or normalize_domain(raw)
+        raw = normalize_domain(raw).split(".")[0]
+    if domain in _SHARED_HOSTS:
+        domain = ""
+    return normalize_company_name(raw).replace(" ", ""), domain
+
+
+def _shingles(compact_name: str) -> Set[str]:
+    """Character 3-grams of a compact name (the name itself if shorter)"""
+    if len(compact_name) <= 3:
+        return {compact_name}
+    return {compact_name[i:i + 3] for i in range(len(compact_name) - 2)}
+
+
+def _minhash(shingles: Set[str]) -> List[int]:
+    """MinHash signature of a set of 3-grams"""
+    hashes = [zlib.crc32(shingle.encode("utf-8")) for shingle in shingles]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def _jaccard(a: Set[str], b: Set[str]) -> float:
+    return len(a & b) / len(a | b)
+
+
+class CompanyIndex:
+    """Incremental index of companies that finds the entity a new name or domain belongs to"""
+
+    def __init__(self, threshold: float = None):
+        """
+        Args:
+            threshold: 3-gram Jaccard similarity two names need to be the same company
+                (default: ENTITY_MATCH_THRESHOLD or 0.8)
+        """
+        self.threshold = threshold if threshold is not None else env_float("ENTITY_MATCH_THRESHOLD", 0.8)
+        self.entities: List[Dict[str, Any]] = []
+        self._by_name: Dict[str, int] = {}
+        self._by_domain: Dict[str, int] = {}
+        self._buckets: Dict[Tuple, List[int]] = {}
+        self._variants: List[List[Set[str]]] = []
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+    def find(self, company: Dict[str, Any]) -> Optional[int]:
+        """
+        Find the entity a company belongs to
+
+        Args:
+            company: Company dict with "name" and optionally "website"
+
+        Returns:
+            Index into `entities` (the first record seen for that company), or None
+        """
+        return self._match(*company_keys(company.get("name"), company.get("website")))[0]
+
+    def add(self, company: Dict[str, Any], entity: int = None) -> int:
+        """
+        Index a company, as a new entity or as another variant of the one it matches
+
+        Args:
+            company: Company dict with "name" and optionally "website"
+            entity: Index it as a variant of this entity instead of matching
+
+        Returns:
+            Index of its entity in `entities`
+        """
+        compact, domain = company_keys(company.get("name"), company.get("website"))
+        sketch = None
+        if entity is None:
+            entity, sketch = self._match(compact, domain)
+        if entity is None:
+            entity = len(self.entities)
+            self.entities.append(company)
+            self._variants.append([])
+
+        # Make every key of this variant point at its entity
+        if domain:
+            self._by_domain.setdefault(domain, entity)
+        if compact and compact not in self._by_name:
+            self._by_name[compact] = entity
+            shingles, signature = sketch or self._sketch(compact)
+            self._variants[entity].append(shingles)
+            for key in self._band_keys(signature):
+                self._buckets.setdefault(key, []).append(entity)
+        return entity
+
+    def _match(self, compact: str, domain: str) -> Tuple[Optional[int], Optional[Tuple[Set[str], List[int]]]]:
+        """Entity for a company's keys, plus its name sketch if one had to be computed"""
+        if domain and domain in self._by_domain:
+            return self._by_domain[domain], None
+        if not compact:
+            return None, None
+        if compact in self._by_name:
+            return self._by_name[compact], None
+
+        # Fuzzy: only entities sharing an LSH bucket are compared
+        shingles, signature = sketch = self._sketch(compact)
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self._buckets.get(key, ()))
+        best, best_score = None, self.threshold
+        for entity in candidates:
+            score = max(_jaccard(shingles, variant) for variant in self._variants[entity])
+            if score >= best_score:
+                best, best_score = entity, score
+        return best, sketch
+
+    @staticmethod
+    def _sketch(compact: str) -> Tuple[Set[str], List[int]]:
+        shingles = _shingles(compact)
+        return shingles, _minhash(shingles)
+
+    @staticmethod
+    def _band_keys(signature: List[int]):
+        rows = NUM_PERM // BANDS
+        for band in range(BANDS):
+            yield (band, *signature[band * rows:(band + 1) * rows])
+
+
+def merge_duplicate(primary: Dict[str, Any], duplicate: Dict[str, Any]):
+    """Fill fields missing from the first record of a company with a duplicate's values"""
+    for field, value in duplicate.items():
+        if value and not primary.get(field):
+            primary[field] = value
@@ -0,0 +1,88 @@
+"""
+Incremental JSON parsing for LLM output
+
+LLM responses wrap JSON in prose ("Here are the companies: [...] Let me
+know if...") and are streamed token by token. JSONStreamParser scans the
+text as it arrives and emits every top-level JSON object as soon as its
+closing brace is seen, whether it stands alone or sits inside an array.
+Each object is parsed on its own, so one malformed entry no longer
+discards the rest of the response.
+"""
+from typing import Any, Dict, List, Optional
+import json
+
+
+class JSONStreamParser:
+    """Emits complete top-level JSON objects from text fed in arbitrary chunks"""
+
+    def __init__(self):
+        self._current: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self.parsed = 0
+        self.errors = 0
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Consume the next chunk of text
+
+        Args:
+            text: Next piece of the response (any size, may split tokens)
+
+        Returns:
+            Objects completed by this chunk, in order
+        """
+        objects = []
+        for ch in text:
+            if self._depth == 0:
+                # Outside an object: skip prose and array punctuation
+                if ch == "{":
+                    self._current = [ch]
+                    self._depth = 1
+                continue
+
+            self._current.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    parsed = self._parse("".join(self._current))
+                    self._current = []
+                    if parsed is not None:
+                        objects.append(parsed)
+        return objects
+
+    def _parse(self, text: str) -> Optional[Dict[str, Any]]:
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError as e:
+            self.errors += 1
+            print(f"[JSON STREAM] Skipping malformed object ({e}): {text[:100]}")
+            return None
+        if not isinstance(value, dict):
+            self.errors += 1
+            return None
+        self.parsed += 1
+        return value
+
+
+def parse_json_objects(text: str) -> List[Dict[str, Any]]:
+    """Extract every complete top-level JSON object from a full response"""
+    return JSONStreamParser().feed(text)
+
+
+def parse_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """Extract the first valid top-level JSON object from a full response (None if there is none)"""
+    objects = parse_json_objects(text)
+    return objects[0] if objects else None
@@ -0,0 +1,271 @@
+"""
+LLM response cache
+
+Content-addressed cache for LLM responses keyed by a hash of
+(model, temperature, prompt). Two tiers:
+- In-memory LRU for hot entries
+- SQLite file for persistence across restarts, with TTL and size-based eviction
+
+Hits only note the access time in memory; it reaches the SQLite tier with
+the next write or eviction, so a hit never commits.
+"""
+from typing import Dict, Any, Optional
+from collections import OrderedDict
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from .settings import env_int, env_float, env_bool
+
+
+class LLMResponseCache:
+    """Two-tier (memory LRU + SQLite) cache for LLM responses"""
+
+    # Run disk eviction once every N writes instead of on every insert
+    EVICTION_INTERVAL = 100
+    # Write pending access times once this many keys were hit without a write in between
+    ACCESS_FLUSH_INTERVAL = 100
+
+    def __init__(
+        self,
+        path: str = None,
+        ttl_seconds: float = None,
+        memory_entries: int = None,
+        max_disk_entries: int = None,
+        max_disk_bytes: int = None,
+        enabled: bool = None
+    ):
+        """
+        Configure the cache (values default to LLM_CACHE_* env vars)
+
+        Args:
+            path: SQLite file for the persistent tier (":memory:" for none)
+            ttl_seconds: How long an entry stays valid
+            memory_entries: Maximum entries kept in the in-memory LRU
+            max_disk_entries: Maximum rows kept in the SQLite tier
+            max_disk_bytes: Maximum total response bytes kept in the SQLite tier
+            enabled: Turn the cache on or off globally
+        """
+        self.path = path or os.getenv("LLM_CACHE_PATH", "./llm_cache.db")
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else env_float("LLM_CACHE_TTL", 7 * 24 * 3600)
+        self.memory_entries = memory_entries if memory_entries is not None else env_int("LLM_CACHE_MEMORY_ENTRIES", 1000)
+        self.max_disk_entries = max_disk_entries if max_disk_entries is not None else env_int("LLM_CACHE_MAX_ENTRIES", 50000)
+        self.max_disk_bytes = max_disk_bytes if max_disk_bytes is not None else env_int("LLM_CACHE_MAX_BYTES", 100 * 1024 * 1024)
+        self.enabled = enabled if enabled is not None else env_bool("LLM_CACHE_ENABLED", True)
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._conn = None
+        self._writes_since_eviction = 0
+        self._pending_access: Dict[str, float] = {}  # key -> last hit not yet written to disk
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "tokens_saved": 0,
+            "latency_saved": 0.0
+        }
+
+    @staticmethod
+    def make_key(model: str, temperature: float, prompt: str) -> str:
+        """Build the content-addressed cache key for a request"""
+        payload = f"{model}\x00{float(temperature):.3f}\x00{prompt}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _get_conn(self) -> sqlite3.Connection:
+        """Open the SQLite tier on first use (caller holds the lock)"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    tokens INTEGER NOT NULL DEFAULT 0,
+                    latency REAL NOT NULL DEFAULT 0,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_last_access ON llm_cache (last_access)")
+            self._conn.commit()
+        return self._conn
+
+    def _remember(self, key: str, entry: Dict[str, Any]):
+        """Insert into the memory LRU, evicting the least recently used entry (caller holds the lock)"""
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _flush_access(self, conn: sqlite3.Connection):
+        """Write pending access times without committing (caller holds the lock)"""
+        if self._pending_access:
+            conn.executemany(
+                "UPDATE llm_cache SET last_access = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in self._pending_access.items()]
+            )
+            self._pending_access.clear()
+
+    def _record_hit(self, tier: str, key: str, entry: Dict[str, Any], now: float):
+        """Count a hit and note its access time for the disk LRU (caller holds the lock)"""
+        self._pending_access[key] = now
+        self._stats[f"{tier}_hits"] += 1
+        self._stats["tokens_saved"] += entry.get("tokens", 0)
+        self._stats["latency_saved"] += entry.get("latency", 0.0)
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response
+
+        Args:
+            key: Key from make_key()
+
+        Returns:
+            Cached response text, or None on a miss or expired entry
+        """
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry["expires_at"] > now:
+                    self._memory.move_to_end(key)
+                    self._record_hit("memory", key, entry, now)
+                    return entry["response"]
+                del self._memory[key]
+
+            try:
+                conn = self._get_conn()
+                row = conn.execute(
+                    "SELECT response, tokens, latency, expires_at FROM llm_cache WHERE key = ?",
+                    (key,)
+                ).fetchone()
+                if row is not None and row[3] > now:
+                    entry = {"response": row[0], "tokens": row[1], "latency": row[2], "expires_at": row[3]}
+                    self._remember(key, entry)
+                    self._record_hit("disk", key, entry, now)
+                    if len(self._pending_access) >= self.ACCESS_FLUSH_INTERVAL:
+                        self._flush_access(conn)
+                        conn.commit()
+                    return entry["response"]
+            except sqlite3.Error as e:
+                print(f"[LLM CACHE] Disk lookup failed: {e}")
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key: str, response: str, model: str = "", tokens: int = 0, latency: float = 0.0, ttl_seconds: float = None):
+        """
+        Store a response in both tiers
+
+        Args:
+            key: Key from make_key()
+            response: LLM response text
+            model: Model that produced the response (for inspection)
+            tokens: Tokens the original call consumed (counted as saved on later hits)
+            latency: Seconds the original call took (counted as saved on later hits)
+            ttl_seconds: Override the default TTL for this entry
+        """
+        if not response:
+            return
+
+        now = time.time()
+        expires_at = now + (ttl_seconds if ttl_seconds is not None else self.ttl_seconds)
+        entry = {"response": response, "tokens": tokens, "latency": latency, "expires_at": expires_at}
+
+        with self._lock:
+            self._remember(key, entry)
+            self._stats["stores"] += 1
+            try:
+                conn = self._get_conn()
+                conn.execute(
+                    """INSERT OR REPLACE INTO llm_cache
+                       (key, model, response, tokens, latency, size, created_at, expires_at, last_access)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (key, model, response, tokens, latency, len(response.encode("utf-8")), now, expires_at, now)
+                )
+                self._pending_access.pop(key, None)
+                self._flush_access(conn)  # Rides along with this commit
+                conn.commit()
+
+                self._writes_since_eviction += 1
+                if self._writes_since_eviction >= self.EVICTION_INTERVAL:
+                    self._evict(conn, now)
+            except sqlite3.Error as e:
+                print(f"[LLM CACHE] Disk write failed: {e}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        """Drop expired rows, then least recently used rows until under the size limits (caller holds the lock)"""
+        self._writes_since_eviction = 0
+
+        removed = conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,)).rowcount
+
+        count, total_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        if count > self.max_disk_entries or total_bytes > self.max_disk_bytes:
+            # Walk rows oldest-access first and cut once both limits are satisfied
+            excess_rows = max(0, count - self.max_disk_entries)
+            excess_bytes = max(0, total_bytes - self.max_disk_bytes)
+            victims = []
+            for key, size in conn.execute("SELECT key, size FROM llm_cache ORDER BY last_access ASC"):
+                if excess_rows <= 0 and excess_bytes <= 0:
+                    break
+                victims.append((key,))
+                excess_rows -= 1
+                excess_bytes -= size
+            conn.executemany("DELETE FROM llm_cache WHERE key = ?", victims)
+            removed += len(victims)
+
+        conn.commit()
+        self._stats["evictions"] += removed
+
+    def clear(self):
+        """Remove every entry from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            self._pending_access.clear()
+            try:
+                conn = self._get_conn()
+                conn.execute("DELETE FROM llm_cache")
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"[LLM CACHE] Clear failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report hit/miss counters and estimated savings
+
+        Returns:
+            Dict with per-tier hits, misses, hit rate, tokens and seconds saved
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+        stats["latency_saved"] = round(stats["latency_saved"], 3)
+        stats["enabled"] = self.enabled
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """Get the process-wide LLM response cache"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMResponseCache()
+    return _cache
@@ -0,0 +1,276 @@
+"""
+Shared LLM client registry
+
+Holds one pooled, keep-alive OpenAI client per process so every agent call
+reuses open connections instead of paying connection setup and TLS handshakes.
+"""
+from typing import Dict, Any, Optional
+from contextlib import contextmanager
+import asyncio
+import os
+import threading
+import time
+
+import httpx
+
+from .runtime import LoopLocal
+from .settings import env_int, env_float
+
+
+class LLMClientRegistry:
+    """Process-wide holder for the pooled OpenAI client"""
+
+    def __init__(
+        self,
+        max_connections: int = None,
+        max_keepalive_connections: int = None,
+        keepalive_expiry: float = None,
+        connect_timeout: float = None,
+        read_timeout: float = None
+    ):
+        """
+        Configure the connection pool (values default to LLM_POOL_* / LLM_*_TIMEOUT env vars)
+
+        Args:
+            max_connections: Maximum number of open connections to the OpenAI API
+            max_keepalive_connections: Idle connections kept open for reuse
+            keepalive_expiry: Seconds an idle connection stays in the pool
+            connect_timeout: Seconds allowed to establish a connection
+            read_timeout: Seconds allowed to wait for a response
+        """
+        self.max_connections = max_connections or env_int("LLM_POOL_MAX_CONNECTIONS", 20)
+        self.max_keepalive_connections = max_keepalive_connections or env_int("LLM_POOL_MAX_KEEPALIVE", 10)
+        self.keepalive_expiry = keepalive_expiry or env_float("LLM_POOL_KEEPALIVE_EXPIRY", 60.0)
+        self.connect_timeout = connect_timeout or env_float("LLM_CONNECT_TIMEOUT", 5.0)
+        self.read_timeout = read_timeout or env_float("LLM_READ_TIMEOUT", 60.0)
+
+        self._lock = threading.Lock()
+        self._client = None
+        self._http_client = None
+        self._async_clients = LoopLocal(self._create_async_client)
+        self._stats = {
+            "clients_created": 0,
+            "requests": 0,
+            "errors": 0,
+            "in_flight": 0,
+            "peak_in_flight": 0,
+            "total_latency": 0.0,
+            "warmed_connections": 0
+        }
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry
+        )
+
+    def _timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+
+    def get_client(self):
+        """
+        Get the shared OpenAI client, creating it on first use
+
+        Returns:
+            OpenAI client backed by the pooled HTTP client
+        """
+        if self._client is not None:
+            return self._client
+
+        with self._lock:
+            if self._client is None:
+                from openai import OpenAI, DefaultHttpxClient
+
+                api_key = os.getenv("OPENAI_API_KEY")
+                if not api_key:
+                    raise ValueError("OPENAI_API_KEY not found in environment variables")
+
+                self._http_client = DefaultHttpxClient(limits=self._limits(), timeout=self._timeout())
+                # Retries are owned by agents.resilience, not the OpenAI client
+                self._client = OpenAI(api_key=api_key, http_client=self._http_client, max_retries=0)
+                self._stats["clients_created"] += 1
+                print(f"[LLM CLIENT] Created pooled client (max_connections={self.max_connections}, keepalive={self.max_keepalive_connections})")
+
+        return self._client
+
+    def _create_async_client(self):
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY not found in environment variables")
+
+        http_client = DefaultAsyncHttpxClient(limits=self._limits(), timeout=self._timeout())
+        with self._lock:
+            self._stats["clients_created"] += 1
+        return AsyncOpenAI(api_key=api_key, http_client=http_client, max_retries=0)
+
+    def get_async_client(self):
+        """
+        Get the pooled AsyncOpenAI client for the running event loop
+
+        Async HTTP connections are bound to the loop that opened them, so each
+        loop (the API server loop, the background loop used by run_sync) gets
+        its own pooled client, created on first use.
+
+        Returns:
+            AsyncOpenAI client backed by a pooled async HTTP client
+        """
+        return self._async_clients.get()
+
+    @contextmanager
+    def track_request(self):
+        """Record latency and concurrency for one request made through the pool"""
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["in_flight"] += 1
+            self._stats["peak_in_flight"] = max(self._stats["peak_in_flight"], self._stats["in_flight"])
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._stats["in_flight"] -= 1
+                self._stats["total_latency"] += elapsed
+
+    async def warm(self, connections: int = None) -> int:
+        """
+        Open connections ahead of the first real request
+
+        Issues concurrent lightweight requests on the running loop's client so
+        the pool starts with established keep-alive connections.
+
+        Args:
+            connections: Number of connections to open (default: LLM_POOL_WARM_CONNECTIONS or 2)
+
+        Returns:
+            Number of warm-up requests that succeeded
+        """
+        connections = connections if connections is not None else env_int("LLM_POOL_WARM_CONNECTIONS", 2)
+        connections = min(connections, self.max_keepalive_connections)
+        if connections <= 0:
+            return 0
+
+        client = self.get_async_client()
+
+        async def _ping():
+            try:
+                await client.models.list()
+                return True
+            except Exception as e:
+                print(f"[LLM CLIENT] Warm-up request failed: {e}")
+                return False
+
+        warmed = sum(await asyncio.gather(*[_ping() for _ in range(connections)]))
+
+        with self._lock:
+            self._stats["warmed_connections"] += warmed
+        print(f"[LLM CLIENT] Warmed {warmed}/{connections} connections")
+        return warmed
+
+    def _pool_snapshot(self) -> Dict[str, int]:
+        """Inspect the HTTP connection pool (best effort, depends on httpx internals)"""
+        transport = getattr(self._http_client, "_transport", None)
+        pool = getattr(transport, "_pool", None)
+        connections = getattr(pool, "connections", None)
+        if connections is None:
+            return {}
+
+        idle = sum(1 for conn in connections if conn.is_idle())
+        return {
+            "open_connections": len(connections),
+            "idle_connections": idle,
+            "active_connections": len(connections) - idle
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report pool configuration and usage statistics
+
+        Returns:
+            Dict with limits, request counters and current connection usage
+        """
+        with self._lock:
+            stats = dict(self._stats)
+
+        total_latency = stats.pop("total_latency")
+        stats["average_latency"] = round(total_latency / stats["requests"], 4) if stats["requests"] else 0.0
+        stats.update({
+            "initialized": self._client is not None,
+            "async_clients": len(self._async_clients),
+            "max_connections": self.max_connections,
+            "max_keepalive_connections": self.max_keepalive_connections,
+            "keepalive_expiry": self.keepalive_expiry,
+            "connect_timeout": self.connect_timeout,
+            "read_timeout": self.read_timeout
+        })
+        stats.update(self._pool_snapshot())
+        return stats
+
+    def close(self):
+        """Close the pooled HTTP client and drop the shared OpenAI client"""
+        with self._lock:
+            if self._http_client is not None:
+                self._http_client.close()
+            self._client = None
+            self._http_client = None
+
+    async def aclose(self):
+        """Close the async client owned by the running event loop"""
+        client = self._async_clients.pop()
+        if client is not None:
+            await client.close()
+
+
+_registry = LLMClientRegistry()
+
+
+def get_llm_registry() -> LLMClientRegistry:
+    """Get the process-wide LLM client registry"""
+    return _registry
+
+
+def get_llm_client():
+    """Get the shared, pooled OpenAI client"""
+    return _registry.get_client()
+
+
+async def init_llm_clients(warm: bool = True) -> LLMClientRegistry:
+    """
+    Create the shared LLM clients at application startup
+
+    Skips client creation when OPENAI_API_KEY is not set so the API can
+    still serve non-LLM endpoints.
+
+    Args:
+        warm: Whether to open keep-alive connections immediately
+
+    Returns:
+        The process-wide registry
+    """
+    if not os.getenv("OPENAI_API_KEY"):
+        print("[LLM CLIENT] OPENAI_API_KEY not set - skipping client initialization")
+        return _registry
+
+    _registry.get_client()
+    _registry.get_async_client()
+    if warm:
+        await _registry.warm()
+    return _registry
+
+
+def get_async_llm_client():
+    """Get the shared, pooled AsyncOpenAI client for the running event loop"""
+    return _registry.get_async_client()
+
+
+async def shutdown_llm_clients():
+    """Close pooled connections at application shutdown"""
+    _registry.close()
+    await _registry.aclose()
@@ -3,41 +3,50 @@ Campaign Orchestrator
 
 Coordinates the multi-agent workflow.
 """
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple
 from .research_agent import LeadResearchAgent
-from .content_agent import ContentGenerationAgent
+from .content_agent import ContentGenerationAgent, EventCallback
 from .quality_agent import QualityEvaluationAgent
+from .rate_limiter import campaign_scope
+from .progress import GenerationProgress, start_generation_progress
+from .settings import env_int
 from models import Campaign, Message, CampaignStatus
 from datetime import datetime
-import uuid
 import asyncio
+import uuid
 
 
 class CampaignOrchestrator:
     """Orchestrates the multi-agent campaign workflow"""
     
-    def __init__(self):
+    def __init__(self, generation_concurrency: int = None):
+        """
+        Args:
+            generation_concurrency: Leads generated at once (default: GENERATION_CONCURRENCY or 5)
+        """
         self.research_agent = LeadResearchAgent()
         self.content_agent = ContentGenerationAgent()
         self.quality_agent = QualityEvaluationAgent()
+        self.generation_concurrency = max(1, generation_concurrency or env_int("GENERATION_CONCURRENCY", 5))
     
-    async def start_research(self, product_service: str, area: str, context: str = None, angle: str = None, max_leads: int = 10) -> Dict[str, Any]:
+    async def start_research(self, product_service: str, area: str, context: str = None, angle: str = None, max_leads: int = 10, campaign_id: str = None) -> Dict[str, Any]:
         """
         Stage 1: Research leads
         
+        Args:
+            campaign_id: Existing campaign ID (a new one is created if omitted)
+        
         Returns:
             Campaign ID and list of researched leads
         """
         # Create campaign
-        campaign_id = str(uuid.uuid4())
+        campaign_id = campaign_id or str(uuid.uuid4())
         
-        # Run research agent in thread pool to avoid blocking
-        loop = asyncio.get_event_loop()
-        leads = await loop.run_in_executor(
-            None, 
-            self.research_agent.execute, 
-            product_service, area, context, angle, max_leads
-        )
+        # Run research agent natively on the event loop; LLM calls are queued fairly per campaign
+        with campaign_scope(campaign_id):
+            leads = await self.research_agent.execute_async(
+                product_service, area, context, angle, max_leads
+            )
         
         return {
             "campaign_id": campaign_id,
@@ -45,9 +54,27 @@ class CampaignOrchestrator:
             "status": "research_complete"
         }
     
+    async def stream_research(self, campaign_id: str, product_service: str, area: str, context: str = None, angle: str = None, max_leads: int = 10) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stage 1 (streaming): yield each lead as soon as it is researched
+        
+        Consume from a single task; the campaign scope is entered in the
+        consuming task's context.
+        
+        Args:
+            campaign_id: Campaign identifier
+        
+        Yields:
+            Lead dictionaries, in the order they finish research
+        """
+        with campaign_scope(campaign_id):
+            async for lead in self.research_agent.iter_leads(product_service, area, context, angle, max_leads):
+                yield lead
+    
     async def generate_content(self, campaign_id: str, selected_lead_ids: List[str], 
                               product_service: str, context: str = None, angle: str = None,
-                              all_leads: List[Dict[str, Any]] = None, company_name: str = None) -> List[Dict[str, Any]]:
+                              all_leads: List[Dict[str, Any]] = None, company_name: str = None,
+                              on_event: Optional[EventCallback] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
         """
         Stage 2: Generate content for selected leads
         
@@ -59,36 +86,114 @@ class CampaignOrchestrator:
             angle: Value proposition/angle
             all_leads: Full list of leads (to find selected ones)
             company_name: Your company name (from profile)
+            on_event: Optional async callback receiving progress events. Content agent
+                events carry "lead_id" and "company_name"; "lead_started" opens each
+                lead and "lead_complete" (with the finished "message") or
+                "lead_failed" (with the "error") closes it.
             
         Returns:
-            List of messages with generated content and quality scores
+            (messages, failures): messages with generated content and quality scores,
+            in lead order, and one {"lead_id", "company_name", "error"} per lead whose
+            generation failed (also recorded in the campaign's generation progress,
+            see agents.progress)
         """
         # Filter selected leads
         selected_leads = [lead for lead in (all_leads or []) if lead.get('id') in selected_lead_ids]
+        progress = start_generation_progress(campaign_id, len(selected_leads))
+        await progress.publish(force=True)
+        
+        # LLM calls are queued fairly per campaign
+        try:
+            with campaign_scope(campaign_id):
+                messages = await self._generate_for_leads(
+                    selected_leads, product_service, context, angle, company_name, on_event, progress
+                )
+        finally:
+            progress.finish()
+            await progress.publish(force=True)
+        return messages, progress.to_dict()["failures"]
+    
+    async def _generate_for_leads(self, selected_leads: List[Dict[str, Any]], product_service: str,
+                                  context: str = None, angle: str = None, company_name: str = None,
+                                  on_event: Optional[EventCallback] = None,
+                                  progress: Optional[GenerationProgress] = None) -> List[Dict[str, Any]]:
+        """Generate and refine content for the selected leads, up to generation_concurrency at a time"""
+        semaphore = asyncio.Semaphore(self.generation_concurrency)
         
-        messages = []
-        loop = asyncio.get_event_loop()
+        async def generate(lead: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                return await self._generate_for_lead(lead, product_service, context, angle, company_name, on_event, progress)
         
-        for lead in selected_leads:
-            # Generate content with automatic refinement in thread pool to avoid blocking
+        results = await asyncio.gather(*(generate(lead) for lead in selected_leads))
+        return [message for message in results if message is not None]
+    
+    async def _generate_for_lead(self, lead: Dict[str, Any], product_service: str,
+                                 context: str = None, angle: str = None, company_name: str = None,
+                                 on_event: Optional[EventCallback] = None,
+                                 progress: Optional[GenerationProgress] = None) -> Optional[Dict[str, Any]]:
+        """Generate and refine content for one lead (None if it failed)"""
+        lead_events = self._lead_events(on_event, lead)
+        if progress:
+            progress.lead_started()
+        if lead_events:
+            await lead_events("lead_started", {})
+        
+        try:
+            # Generate content with automatic refinement
             # This uses the agentic execute_with_refinement method that iteratively improves quality
-            content, quality = await loop.run_in_executor(
-                None,
-                self.content_agent.execute_with_refinement,
+            content, quality = await self.content_agent.execute_with_refinement_async(
                 lead, product_service, context, angle, company_name,
                 self.quality_agent,  # Pass quality agent for refinement
                 80,  # Minimum quality score threshold
-                3    # Maximum refinement iterations
+                3,   # Maximum refinement iterations
+                lead_events
             )
-            
-            messages.append({
-                "id": str(uuid.uuid4()),
-                "company_name": lead.get("name"),
-                "industry": lead.get("industry"),
-                "location": lead.get("location"),
-                "content": content,
-                "quality_score": quality["overall"]
-            })
-        
-        return messages
+        except Exception as e:
+            # One lead failing must not fail the rest of the campaign
+            print(f"[ORCHESTRATOR] Content generation failed for {lead.get('name')}: {e}")
+            if progress:
+                progress.lead_failed(lead, e)
+                await progress.publish()
+            if lead_events:
+                await lead_events("lead_failed", {"error": str(e)})
+            return None
+        
+        message = {
+            "id": str(uuid.uuid4()),
+            "lead_id": lead.get("id"),
+            "company_name": lead.get("name"),
+            "industry": lead.get("industry"),
+            "location": lead.get("location"),
+            "content": content,
+            "quality_score": quality["overall"]
+        }
+        if progress:
+            progress.lead_completed()
+            await progress.publish()
+        if lead_events:
+            await lead_events("lead_complete", {"message": message})
+        return message
+    
+    def _lead_events(self, on_event: Optional[EventCallback], lead: Dict[str, Any]) -> Optional[EventCallback]:
+        """
+        Wrap an event callback so every event names the lead it belongs to
+        
+        A failing callback (e.g. a disconnected stream) is logged and then
+        skipped for the rest of the lead; it never fails the generation.
+        """
+        if on_event is None:
+            return None
+        listener_failed = False
+        
+        async def forward(event: str, data: Dict[str, Any]):
+            nonlocal listener_failed
+            if listener_failed:
+                return
+            try:
+                await on_event(event, {"lead_id": lead.get("id"), "company_name": lead.get("name"), **data})
+            except Exception as e:
+                listener_failed = True
+                print(f"[ORCHESTRATOR] Event listener failed for {lead.get('name')}, dropping its events: {e}")
+        
+        return forward
 
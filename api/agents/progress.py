@@ -0,0 +1,142 @@
+"""
+Per-campaign content generation progress
+
+The orchestrator records how many selected leads are done, failed or still
+running, so clients can poll progress while a long generation runs. Runs
+are tracked in process memory and published to the shared campaign_state
+table (as "progress:<campaign id>" rows), so any API worker can answer a
+poll for a generation running in another worker or a job worker process.
+"""
+from typing import Any, Dict, List, Optional
+from collections import OrderedDict
+from datetime import datetime
+import asyncio
+import threading
+import time
+
+from .settings import env_float
+
+# Finished campaigns kept for polling before the oldest are dropped
+MAX_TRACKED_CAMPAIGNS = 500
+
+# Shared campaign_state key prefix for published progress
+PROGRESS_KEY_PREFIX = "progress:"
+
+
+class GenerationProgress:
+    """Counters and failures for one campaign's content generation run"""
+
+    def __init__(self, campaign_id: str, total: int):
+        self.campaign_id = campaign_id
+        self.total = total
+        self.completed = 0
+        self.in_progress = 0
+        self.failures: List[Dict[str, Any]] = []
+        self.status = "running"
+        self.started_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+        self._publish_lock = asyncio.Lock()
+        self._published_at: Optional[float] = None
+
+    def lead_started(self):
+        with self._lock:
+            self.in_progress += 1
+
+    def lead_completed(self):
+        with self._lock:
+            self.in_progress -= 1
+            self.completed += 1
+
+    def lead_failed(self, lead: Dict[str, Any], error: BaseException):
+        with self._lock:
+            self.in_progress -= 1
+            self.failures.append({
+                "lead_id": lead.get("id"),
+                "company_name": lead.get("name"),
+                "error": str(error)
+            })
+
+    def finish(self):
+        with self._lock:
+            self.status = "complete" if not self.failures else "partial" if self.completed else "failed"
+            self.finished_at = datetime.utcnow()
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "campaign_id": self.campaign_id,
+                "status": self.status,
+                "total": self.total,
+                "completed": self.completed,
+                "failed": len(self.failures),
+                "in_progress": self.in_progress,
+                "pending": self.total - self.completed - len(self.failures) - self.in_progress,
+                "failures": list(self.failures),
+                "started_at": self.started_at.isoformat(),
+                "finished_at": self.finished_at.isoformat() if self.finished_at else None
+            }
+
+    async def publish(self, force: bool = False):
+        """
+        Write the counters to the shared store (off the event loop)
+
+        Args:
+            force: Publish even if the last write was under PROGRESS_PUBLISH_INTERVAL
+                seconds ago (the first and final writes always go through)
+        """
+        interval = env_float("PROGRESS_PUBLISH_INTERVAL", 1.0)
+        async with self._publish_lock:
+            now = time.monotonic()
+            if not force and self._published_at is not None and now - self._published_at < interval:
+                return
+            self._published_at = now
+            # Snapshot under the lock, so publishes land in order
+            data = self.to_dict()
+            try:
+                await asyncio.to_thread(get_progress_store().set, PROGRESS_KEY_PREFIX + self.campaign_id, data)
+            except Exception as e:
+                print(f"[PROGRESS] Publishing progress for {self.campaign_id} failed: {e}")
+
+
+_progress: "OrderedDict[str, GenerationProgress]" = OrderedDict()
+_progress_lock = threading.Lock()
+
+
+def start_generation_progress(campaign_id: str, total: int) -> GenerationProgress:
+    """Begin tracking a generation run (replaces any earlier run for the campaign)"""
+    progress = GenerationProgress(campaign_id, total)
+    with _progress_lock:
+        _progress.pop(campaign_id, None)
+        _progress[campaign_id] = progress
+        while len(_progress) > MAX_TRACKED_CAMPAIGNS:
+            _progress.popitem(last=False)
+    return progress
+
+
+def get_generation_progress(campaign_id: str) -> Optional[GenerationProgress]:
+    """Get the latest generation run for a campaign, if one is tracked in this process"""
+    with _progress_lock:
+        return _progress.get(campaign_id)
+
+
+def load_generation_progress(campaign_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Get the latest generation progress published by any worker (blocking; call via to_thread)
+
+    Returns:
+        The progress as returned by GenerationProgress.to_dict(), or None if none was published
+    """
+    return get_progress_store().get(PROGRESS_KEY_PREFIX + campaign_id)
+
+
+_store = None
+
+
+def get_progress_store():
+    """Get the shared store progress is published to (the campaign state table, no local copies)"""
+    global _store
+    if _store is None:
+        from campaign_state import CampaignStateStore
+        _store = CampaignStateStore(loader=lambda _: None, memory_entries=0)
+    return _store
@@ -57,6 +57,34 @@ Format as JSON with keys: description, relevance_reason, recent_news
 Return ONLY valid JSON, no additional text."""
 
 
+COMPANY_BATCH_ENRICHMENT_PROMPT = """Analyze each of these companies and provide insights:
+
+{companies}
+
+Product/Service: {product_service}
+Context: {context}
+
+For EACH company provide:
+1. A brief company description (2-3 sentences)
+2. Why they might need {product_service}
+3. Any recent news or trends (if known)
+
+Return one JSON object keyed by the company number, each value with keys: description, relevance_reason, recent_news
+{{
+  "1": {{"description": "...", "relevance_reason": "...", "recent_news": "..."}},
+  ...
+}}
+
+Return ONLY valid JSON, no additional text."""
+
+
+COMPANY_BATCH_ENTRY = """Company {number}: {company_name}
+Industry: {industry}
+Location: {location}
+Description: {description}
+"""
+
+
 # ============================================================================
 # Content Generation Agent Prompts
 # ============================================================================
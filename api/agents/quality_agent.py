@@ -4,14 +4,15 @@ Quality Evaluation Agent
 Evaluates the quality of generated content.
 """
 from typing import Dict, Any
-from .base import BaseAgent, call_llm
+from .base import BaseAgent, call_llm_async
 from .prompts import QUALITY_EVALUATION_PROMPT
+from .json_stream import parse_json_object
 
 
 class QualityEvaluationAgent(BaseAgent):
     """Agent responsible for evaluating content quality"""
     
-    def execute(self, content: str, lead_data: Dict[str, Any], product_service: str) -> Dict[str, Any]:
+    async def execute_async(self, content: str, lead_data: Dict[str, Any], product_service: str) -> Dict[str, Any]:
         """
         Evaluate content quality
         
@@ -26,7 +27,7 @@ class QualityEvaluationAgent(BaseAgent):
         prompt = self._build_evaluation_prompt(content, lead_data, product_service)
         
         # Get evaluation from LLM
-        evaluation_text = call_llm(prompt, temperature=0.3, model="gpt-3.5-turbo")
+        evaluation_text = await call_llm_async(prompt, temperature=0.3, model="gpt-3.5-turbo")
         
         # Parse and calculate scores
         scores = self._parse_evaluation(evaluation_text)
@@ -56,13 +57,9 @@ class QualityEvaluationAgent(BaseAgent):
         import re
         
         try:
-            # Try to extract JSON from response (handle cases where LLM adds extra text)
-            if "{" in evaluation_text:
-                json_start = evaluation_text.find("{")
-                json_end = evaluation_text.rfind("}") + 1
-                json_str = evaluation_text[json_start:json_end]
-                parsed = json.loads(json_str)
-                
+            # Extract the JSON object from the response (tolerates extra text around it)
+            parsed = parse_json_object(evaluation_text)
+            if parsed is not None:
                 # Validate and ensure all required keys exist
                 required_keys = ["personalization", "clarity", "relevance", "call_to_action"]
                 scores = {}
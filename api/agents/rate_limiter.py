@@ -0,0 +1,415 @@
+"""
+Per-model rate limiting for LLM calls
+
+Each model gets:
+- Token buckets for its requests-per-minute and tokens-per-minute budgets
+- An AIMD concurrency limit: grows slowly while calls succeed quickly, halves
+  on a 429 and shrinks when latency climbs past the target
+- Fair queuing: waiting calls are granted round-robin across campaigns so one
+  large campaign cannot starve the others
+
+The limiter state is guarded by a thread lock so threaded callers (acquire)
+and asyncio callers on any loop (acquire_async) share the same budgets.
+"""
+from typing import Any, Callable, Dict, Optional
+from collections import OrderedDict, deque
+from contextlib import contextmanager, asynccontextmanager
+from contextvars import ContextVar
+import asyncio
+import json
+import os
+import threading
+import time
+
+from .settings import env_int, env_float
+
+# Campaign the current call belongs to (used for fair queuing)
+current_campaign: ContextVar[str] = ContextVar("current_campaign", default="default")
+
+# Budgets used when LLM_RATE_LIMITS does not configure a model
+DEFAULT_MODEL_LIMITS = {
+    "gpt-4": {"rpm": 500, "tpm": 10000, "max_concurrency": 8},
+    "gpt-3.5-turbo": {"rpm": 3500, "tpm": 90000, "max_concurrency": 32},
+}
+
+
+@contextmanager
+def campaign_scope(campaign_id: str):
+    """Attribute LLM calls made inside this block to a campaign"""
+    token = current_campaign.set(campaign_id or "default")
+    try:
+        yield
+    finally:
+        current_campaign.reset(token)
+
+
+def estimate_tokens(prompt: str, completion_tokens: int = None) -> int:
+    """
+    Rough token estimate for a request (about 4 characters per token plus the expected completion)
+
+    Args:
+        prompt: Prompt text
+        completion_tokens: Expected completion size (default: LLM_COMPLETION_TOKEN_ESTIMATE or 500)
+
+    Returns:
+        Estimated total tokens
+    """
+    if completion_tokens is None:
+        completion_tokens = env_int("LLM_COMPLETION_TOKEN_ESTIMATE", 500)
+    return len(prompt) // 4 + completion_tokens
+
+
+def rate_limit_details(error: BaseException):
+    """
+    Check whether an exception is an HTTP 429 from the provider
+
+    Returns:
+        (is_rate_limited, retry_after_seconds or None)
+    """
+    status = getattr(error, "status_code", None)
+    response = getattr(error, "response", None)
+    if status is None and response is not None:
+        status = getattr(response, "status_code", None)
+    if status != 429:
+        return False, None
+
+    retry_after = None
+    headers = getattr(response, "headers", None)
+    if headers is not None:
+        try:
+            retry_after = float(headers.get("retry-after"))
+        except (TypeError, ValueError):
+            retry_after = None
+    return True, retry_after
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a per-minute rate"""
+
+    def __init__(self, per_minute: float, capacity: float = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` tokens are available (0 if available now)"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        """Take tokens (may go negative to record debt from under-estimates)"""
+        self.tokens -= min(amount, self.capacity)
+
+    def refund(self, amount: float):
+        """Return unused tokens"""
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class _Waiter:
+    """A call waiting for a permit"""
+    __slots__ = ("campaign", "tokens", "granted", "wake", "enqueued_at")
+
+    def __init__(self, campaign: str, tokens: int, wake: Callable[[], None]):
+        self.campaign = campaign
+        self.tokens = tokens
+        self.granted = False
+        self.wake = wake
+        self.enqueued_at = time.monotonic()
+
+
+class Permit:
+    """Grant to make one request; report actual usage with record_usage()"""
+
+    def __init__(self, tokens: int):
+        self.tokens = tokens
+        self.tokens_used: Optional[int] = None
+        self.started = time.monotonic()
+
+    def record_usage(self, tokens_used: int):
+        """Record the tokens the request actually consumed"""
+        if tokens_used:
+            self.tokens_used = tokens_used
+
+
+class ModelRateLimiter:
+    """RPM/TPM budgets, AIMD concurrency and fair queuing for one model"""
+
+    # Upper bound on how long a waiter sleeps before re-checking the budgets
+    MAX_IDLE_WAIT = 1.0
+
+    def __init__(
+        self,
+        model: str,
+        rpm: float,
+        tpm: float,
+        max_concurrency: int = 16,
+        min_concurrency: int = 1,
+        initial_concurrency: int = None,
+        latency_target: float = None,
+        cooldown: float = None
+    ):
+        """
+        Args:
+            model: Model name (for reporting)
+            rpm: Requests-per-minute budget
+            tpm: Tokens-per-minute budget
+            max_concurrency: Ceiling for the adaptive concurrency limit
+            min_concurrency: Floor for the adaptive concurrency limit
+            initial_concurrency: Starting concurrency limit (default: half of max)
+            latency_target: Seconds above which a call counts as slow (default: LLM_LATENCY_TARGET or 30)
+            cooldown: Seconds to pause after a 429 without Retry-After (default: LLM_RATE_LIMIT_COOLDOWN or 2)
+        """
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.latency_target = latency_target if latency_target is not None else env_float("LLM_LATENCY_TARGET", 30.0)
+        self.cooldown = cooldown if cooldown is not None else env_float("LLM_RATE_LIMIT_COOLDOWN", 2.0)
+
+        self._lock = threading.Lock()
+        self._requests = TokenBucket(rpm)
+        self._tokens = TokenBucket(tpm)
+        self._limit = float(initial_concurrency or max(min_concurrency, max_concurrency // 2))
+        self._in_flight = 0
+        self._cooldown_until = 0.0
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+        self._stats = {"granted": 0, "rate_limited": 0, "slow_calls": 0, "total_wait": 0.0}
+
+    # ------------------------------------------------------------------
+    # Scheduling (all _locked methods expect the caller to hold the lock)
+    # ------------------------------------------------------------------
+
+    def _enqueue_locked(self, waiter: _Waiter):
+        self._queues.setdefault(waiter.campaign, deque()).append(waiter)
+
+    def _remove_locked(self, waiter: _Waiter):
+        queue = self._queues.get(waiter.campaign)
+        if queue is None:
+            return
+        try:
+            queue.remove(waiter)
+        except ValueError:
+            pass
+        if not queue:
+            del self._queues[waiter.campaign]
+
+    def _dispatch_locked(self) -> float:
+        """
+        Grant permits round-robin across campaigns while budgets allow
+
+        Returns:
+            Seconds until a budget refills enough for the next grant (0 when
+            only the concurrency limit is blocking, or nothing is queued)
+        """
+        now = time.monotonic()
+        while self._queues and self._in_flight < max(self.min_concurrency, int(self._limit)):
+            if now < self._cooldown_until:
+                return self._cooldown_until - now
+
+            campaign, queue = next(iter(self._queues.items()))
+            waiter = queue[0]
+            wait = max(self._requests.wait_time(1, now), self._tokens.wait_time(waiter.tokens, now))
+            if wait > 0:
+                return wait
+
+            # Move this campaign to the back of the rotation
+            queue.popleft()
+            del self._queues[campaign]
+            if queue:
+                self._queues[campaign] = queue
+
+            self._requests.consume(1)
+            self._tokens.consume(waiter.tokens)
+            self._in_flight += 1
+            self._stats["granted"] += 1
+            self._stats["total_wait"] += now - waiter.enqueued_at
+            waiter.granted = True
+            waiter.wake()
+        return 0.0
+
+    def _next_wait(self, retry: float) -> float:
+        return min(retry, self.MAX_IDLE_WAIT) if retry > 0 else self.MAX_IDLE_WAIT
+
+    # ------------------------------------------------------------------
+    # Acquire / release
+    # ------------------------------------------------------------------
+
+    def acquire(self, tokens: int) -> Permit:
+        """Block the calling thread until a permit is granted"""
+        event = threading.Event()
+        waiter = _Waiter(current_campaign.get(), tokens, event.set)
+
+        with self._lock:
+            self._enqueue_locked(waiter)
+            retry = self._dispatch_locked()
+
+        while not waiter.granted:
+            event.wait(self._next_wait(retry))
+            with self._lock:
+                if waiter.granted:
+                    break
+                retry = self._dispatch_locked()
+
+        return Permit(tokens)
+
+    async def acquire_async(self, tokens: int) -> Permit:
+        """Wait (without blocking the event loop) until a permit is granted"""
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def _wake():
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(None))
+
+        waiter = _Waiter(current_campaign.get(), tokens, _wake)
+
+        with self._lock:
+            self._enqueue_locked(waiter)
+            retry = self._dispatch_locked()
+
+        try:
+            while not waiter.granted:
+                try:
+                    await asyncio.wait_for(asyncio.shield(granted), self._next_wait(retry))
+                except asyncio.TimeoutError:
+                    pass
+                with self._lock:
+                    if waiter.granted:
+                        break
+                    retry = self._dispatch_locked()
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter.granted:
+                    # Hand the slot back so the next waiter can use it
+                    self._in_flight -= 1
+                    self._dispatch_locked()
+                else:
+                    self._remove_locked(waiter)
+            raise
+
+        return Permit(tokens)
+
+    def release(self, permit: Permit, error: BaseException = None):
+        """
+        Return a permit and adapt the concurrency limit
+
+        Args:
+            permit: Permit from acquire / acquire_async
+            error: Exception the request raised, if any (failures other than
+                a 429 release the slot without adapting the limit)
+        """
+        latency = time.monotonic() - permit.started
+        rate_limited, retry_after = rate_limit_details(error) if error is not None else (False, None)
+
+        with self._lock:
+            self._in_flight -= 1
+
+            if permit.tokens_used is not None:
+                difference = permit.tokens - permit.tokens_used
+                if difference > 0:
+                    self._tokens.refund(difference)
+                else:
+                    self._tokens.consume(-difference)
+
+            if rate_limited:
+                # Multiplicative decrease and a pause before the next grant
+                self._stats["rate_limited"] += 1
+                self._limit = max(self.min_concurrency, self._limit / 2)
+                self._cooldown_until = time.monotonic() + (retry_after or self.cooldown)
+            elif error is None and latency > self.latency_target:
+                self._stats["slow_calls"] += 1
+                self._limit = max(self.min_concurrency, self._limit * 0.9)
+            elif error is None:
+                # Additive increase: roughly +1 per window of successful calls
+                self._limit = min(self.max_concurrency, self._limit + 1 / self._limit)
+
+            self._dispatch_locked()
+
+    @contextmanager
+    def limit(self, tokens: int):
+        """Hold a permit for the duration of a threaded request"""
+        permit = self.acquire(tokens)
+        try:
+            yield permit
+        except BaseException as e:
+            self.release(permit, e)
+            raise
+        self.release(permit)
+
+    @asynccontextmanager
+    async def limit_async(self, tokens: int):
+        """Hold a permit for the duration of an async request"""
+        permit = await self.acquire_async(tokens)
+        try:
+            yield permit
+        except BaseException as e:
+            self.release(permit, e)
+            raise
+        self.release(permit)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report budgets, the current concurrency limit and queue depth
+
+        Returns:
+            Dict of limiter state and counters
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                "concurrency_limit": round(self._limit, 2),
+                "in_flight": self._in_flight,
+                "queued": sum(len(queue) for queue in self._queues.values()),
+                "queued_campaigns": len(self._queues),
+                "rpm": round(self._requests.rate * 60),
+                "tpm": round(self._tokens.rate * 60)
+            })
+        stats["average_wait"] = round(stats.pop("total_wait") / stats["granted"], 4) if stats["granted"] else 0.0
+        return stats
+
+
+def _configured_limits() -> Dict[str, Dict[str, Any]]:
+    """Merge DEFAULT_MODEL_LIMITS with the LLM_RATE_LIMITS JSON override"""
+    limits = {model: dict(values) for model, values in DEFAULT_MODEL_LIMITS.items()}
+    raw = os.getenv("LLM_RATE_LIMITS")
+    if raw:
+        try:
+            for model, values in json.loads(raw).items():
+                limits.setdefault(model, {}).update(values)
+        except (ValueError, AttributeError) as e:
+            print(f"[RATE LIMITER] Ignoring invalid LLM_RATE_LIMITS: {e}")
+    return limits
+
+
+_limiters: Dict[str, ModelRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(model: str) -> ModelRateLimiter:
+    """Get (or create) the process-wide rate limiter for a model"""
+    with _limiters_lock:
+        limiter = _limiters.get(model)
+        if limiter is None:
+            config = _configured_limits().get(model, {})
+            limiter = ModelRateLimiter(
+                model,
+                rpm=config.get("rpm", env_float("LLM_DEFAULT_RPM", 500)),
+                tpm=config.get("tpm", env_float("LLM_DEFAULT_TPM", 30000)),
+                max_concurrency=config.get("max_concurrency", env_int("LLM_DEFAULT_MAX_CONCURRENCY", 16)),
+                initial_concurrency=config.get("initial_concurrency")
+            )
+            _limiters[model] = limiter
+        return limiter
+
+
+def rate_limiter_stats() -> Dict[str, Dict[str, Any]]:
+    """Report statistics for every model limiter"""
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {limiter.model: limiter.stats() for limiter in limiters}
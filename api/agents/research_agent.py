@@ -4,24 +4,69 @@ Lead Research Agent
 Searches for and gathers company information based on criteria.
 Now with agentic capabilities: tool usage for verification and data enrichment.
 """
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, AsyncIterator
+import asyncio
+import collections
+import contextlib
+import math
 import os
-from .base import BaseAgent, call_llm
-from .prompts import COMPANY_GENERATION_PROMPT, COMPANY_ENRICHMENT_PROMPT
+from .base import BaseAgent, call_llm_async
+from .settings import env_int, env_float
+from .batching import MicroBatcher
+from .rate_limiter import estimate_tokens
+from .json_stream import JSONStreamParser, parse_json_object
+from .company_kb import CompanyKnowledgeBase, get_company_knowledge_base
+from .entity_resolution import CompanyIndex, merge_duplicate
+from .prompts import COMPANY_GENERATION_PROMPT, COMPANY_ENRICHMENT_PROMPT, COMPANY_BATCH_ENRICHMENT_PROMPT, COMPANY_BATCH_ENTRY
 
 # Import tools (will work even if API keys not set - graceful degradation)
 try:
-    from .tools import verify_company_exists, get_company_data
+    from .tools import check_company_exists_async, get_company_data_async
     TOOLS_AVAILABLE = True
 except ImportError:
     TOOLS_AVAILABLE = False
     print("[RESEARCH AGENT] Tools not available - running in basic mode")
 
+# Expected response size for one company in a batched enrichment call
+ENRICHMENT_RESPONSE_TOKENS = 150
+
 
 class LeadResearchAgent(BaseAgent):
     """Agent responsible for researching and finding potential leads"""
     
-    def execute(self, product_service: str, area: str, context: str = None, angle: str = None, max_leads: int = 10) -> List[Dict[str, Any]]:
+    def __init__(self, concurrency: int = None, verify_workers: int = None, company_data_workers: int = None, enrich_workers: int = None,
+                 enrich_batch_tokens: int = None, enrich_batch_wait: float = None, knowledge_base: CompanyKnowledgeBase = None,
+                 candidate_surplus: float = None):
+        """
+        Args:
+            concurrency: Companies processed at once (default: RESEARCH_CONCURRENCY or 10)
+            verify_workers: Concurrent web verifications (default: RESEARCH_VERIFY_WORKERS or 5)
+            company_data_workers: Concurrent company data lookups (default: RESEARCH_COMPANY_DATA_WORKERS or 5)
+            enrich_workers: Concurrent LLM enrichment calls (default: RESEARCH_ENRICH_WORKERS or 10)
+            enrich_batch_tokens: Token budget for packing several companies into one enrichment
+                call; 0 enriches each company separately (default: RESEARCH_ENRICH_BATCH_TOKENS or 3000)
+            enrich_batch_wait: Seconds a company waits for others to share its enrichment call
+                (default: RESEARCH_ENRICH_BATCH_WAIT or 0.2)
+            knowledge_base: What earlier research learned about companies, consulted
+                before each tool call (default: the process-wide company knowledge base)
+            candidate_surplus: Extra companies requested to make up for the ones verification
+                and duplicate merging drop, as a fraction of max_leads; research stops once
+                max_leads are ready
+                (default: RESEARCH_CANDIDATE_SURPLUS or 0.5)
+        """
+        super().__init__()
+        self.concurrency = max(1, concurrency or env_int("RESEARCH_CONCURRENCY", 10))
+        self.stage_workers = {
+            "verify": max(1, verify_workers or env_int("RESEARCH_VERIFY_WORKERS", 5)),
+            "company_data": max(1, company_data_workers or env_int("RESEARCH_COMPANY_DATA_WORKERS", 5)),
+            "enrich": max(1, enrich_workers or env_int("RESEARCH_ENRICH_WORKERS", 10))
+        }
+        self.enrich_batch_tokens = enrich_batch_tokens if enrich_batch_tokens is not None else env_int("RESEARCH_ENRICH_BATCH_TOKENS", 3000)
+        self.enrich_batch_wait = enrich_batch_wait if enrich_batch_wait is not None else env_float("RESEARCH_ENRICH_BATCH_WAIT", 0.2)
+        self.knowledge_base = knowledge_base or get_company_knowledge_base()
+        self.candidate_surplus = max(0.0, candidate_surplus if candidate_surplus is not None else env_float("RESEARCH_CANDIDATE_SURPLUS", 0.5))
+    
+    async def execute_async(self, product_service: str, area: str, context: str = None, angle: str = None, max_leads: int = 10) -> List[Dict[str, Any]]:
         """
         Research leads based on criteria with agentic capabilities
         
@@ -39,85 +84,293 @@ class LeadResearchAgent(BaseAgent):
         Returns:
             List of lead dictionaries with company information
         """
+        enriched_leads = [
+            lead async for lead in self.iter_leads(product_service, area, context, angle, max_leads)
+        ]
+        print(f"[RESEARCH AGENT] Returning {len(enriched_leads)} enriched leads")
+        return enriched_leads[:max_leads]  # Return up to max_leads
+    
+    async def iter_leads(self, product_service: str, area: str, context: str = None, angle: str = None, max_leads: int = 10) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Research leads, yielding each one as soon as it is verified and enriched
+        
+        Same steps and failure handling as execute_async; unverified companies
+        are skipped, and so are duplicates (another spelling of a company
+        already in this run).
+        
+        Verification and duplicate merging can both drop companies, so
+        candidate_surplus extra companies are generated to make up for them;
+        as soon as max_leads leads are ready, the remaining companies (and the
+        rest of the generation) are cancelled.
+        
+        Leads come out in generation order, except at that cut-off: the ready
+        leads are then yielded in generation order, and companies ahead of them
+        that are still being researched are dropped rather than awaited.
+        
+        Args:
+            product_service: Product or service being offered
+            area: Target geographic area
+            context: Additional context for search
+            max_leads: Maximum number of leads to find
+            
+        Yields:
+            Lead dictionaries with company information
+        """
+        # Step 1: Generate companies using LLM (streamed: enrichment of the first
+        # company starts while the rest are still being written)
+        # Step 2: Verify and enrich companies concurrently; each stage has its own
+        # worker limit and leads are yielded in generation order (up to the cut-off)
+        stage_limits = {stage: asyncio.Semaphore(workers) for stage, workers in self.stage_workers.items()}
+        in_flight = asyncio.Semaphore(self.concurrency)
+        order = collections.deque()  # Companies not yet yielded or dropped, in generation order
+        changed = asyncio.Event()  # A company finished, arrived, or generation ended
+        tasks = []
+        
+        # Duplicates are merged even without verification, so the surplus is always requested
+        candidates = max_leads + math.ceil(max_leads * self.candidate_surplus)
+        if candidates > max_leads:
+            print(f"[RESEARCH AGENT] Requesting {candidates} candidates for {max_leads} leads "
+                  f"(verification and duplicates drop some)")
+        
+        # Companies reaching the enrichment step together share one LLM call
+        enrich_batcher = None
+        if self.enrich_batch_tokens > 0:
+            async def enrich_batch(companies: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+                async with stage_limits["enrich"]:
+                    return await self._enrich_company_batch(companies, product_service, context)
+            
+            enrich_batcher = MicroBatcher(
+                enrich_batch,
+                max_weight=self.enrich_batch_tokens,
+                max_wait=self.enrich_batch_wait,
+                weigh=self._enrichment_tokens
+            )
+        
+        async def process(company: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            async with in_flight:
+                return await self._process_company(company, product_service, context, stage_limits, enrich_batcher)
+        
+        seen = CompanyIndex()
+        
+        async def produce():
+            try:
+                async for company in self._stream_companies_llm(product_service, area, context, candidates):
+                    if not await self._resolve_company(company, seen):
+                        continue
+                    task = asyncio.ensure_future(process(company))
+                    task.add_done_callback(lambda _: changed.set())
+                    tasks.append(task)
+                    order.append(task)
+                    changed.set()
+            finally:
+                changed.set()
+        
+        def ready(task: asyncio.Future) -> bool:
+            return task.done() and task.result() is not None
+        
+        producer = asyncio.ensure_future(produce())
+        yielded = 0
         try:
-            # Step 1: Generate companies using LLM
-            companies = self._generate_companies_llm(product_service, area, context, max_leads)
+            while yielded < max_leads:
+                changed.clear()
+                # Leads finished at the head of the line go out in generation order
+                while order and order[0].done() and yielded < max_leads:
+                    lead = order.popleft().result()
+                    if lead is not None:
+                        yielded += 1
+                        yield lead
+                if yielded >= max_leads or (not order and producer.done()):
+                    break
+                
+                # Enough later leads are ready: don't wait for the companies ahead of them
+                # (order is best-effort from here: unfinished earlier companies are skipped)
+                finished = [task for task in order if ready(task)]
+                if yielded + len(finished) >= max_leads:
+                    skipped = sum(1 for task in order if not task.done())
+                    for task in finished[:max_leads - yielded]:
+                        yielded += 1
+                        yield task.result()
+                    print(f"[RESEARCH AGENT] {max_leads} leads ready; cancelling {skipped} unfinished companies")
+                    break
+                
+                await changed.wait()
+            if producer.done():
+                await producer
+        except Exception as e:
+            import traceback
+            print(f"[RESEARCH AGENT] Error: {str(e)}")
+            print(f"[RESEARCH AGENT] Traceback: {traceback.format_exc()}")
+            raise
+        finally:
+            # Stop work nobody will consume (max_leads reached or the consumer went away)
+            for pending_task in [producer, *tasks]:
+                if not pending_task.done():
+                    pending_task.cancel()
+            if enrich_batcher is not None:
+                enrich_batcher.cancel()
+    
+    def _verification_enabled(self) -> bool:
+        """Whether companies are verified with web search (and unverified ones dropped)"""
+        return TOOLS_AVAILABLE and bool(os.getenv("SERPAPI_API_KEY") or os.getenv("GOOGLE_SEARCH_API_KEY"))
+    
+    async def _resolve_company(self, company: Dict[str, Any], seen: CompanyIndex) -> bool:
+        """
+        Deduplicate a generated company before any work is spent on it
+        
+        A company matching one already seen in this run is merged into it
+        (filling missing fields) and dropped. A new one that matches a company
+        in the knowledge base takes the stored name and domain, so the
+        knowledge base lookups that follow find it.
+        
+        Args:
+            seen: Companies of this run so far
+        
+        Returns:
+            True if the company should be researched
+        """
+        entity = seen.find(company)
+        if entity is not None:
+            first = seen.entities[entity]
+            merge_duplicate(first, company)
+            print(f"[RESEARCH AGENT] Skipping {company.get('name')} - duplicate of {first.get('name')}")
+            return False
+        
+        entity = seen.add(company)
+        # The first lookup loads the knowledge base's companies: keep it off the event loop
+        known = await asyncio.to_thread(self.knowledge_base.resolve, company.get("name", ""), company.get("website"))
+        if known is not None:
+            if known["name"] != company.get("name"):
+                print(f"[RESEARCH AGENT] Resolved {company.get('name')} to known company {known['name']}")
+            company["name"] = known["name"]
+            if known["domain"]:
+                company["website"] = f"https://{known['domain']}"
+            seen.add(company, entity=entity)
+        return True
+    
+    async def _process_company(self, company: Dict[str, Any], product_service: str, context: str = None,
+                               stage_limits: Dict[str, asyncio.Semaphore] = None, enrich_batcher: MicroBatcher = None) -> Optional[Dict[str, Any]]:
+        """
+        Verify and enrich one generated company
+        
+        Each step first consults the company knowledge base and only calls the
+        tool (or LLM) when it has nothing fresh; new results are written back.
+        
+        Args:
+            stage_limits: Semaphores bounding concurrent work per stage
+                ("verify", "company_data", "enrich"); unbounded if omitted
+            enrich_batcher: Batches the LLM enrichment step with other companies;
+                each company is enriched on its own if omitted
+        
+        Returns:
+            The enriched lead, or None if the company could not be verified.
+            Errors fall back to the LLM-generated company data.
+        """
+        import uuid
+        
+        stage_limits = stage_limits or {}
+        
+        def stage(name: str):
+            return stage_limits.get(name) or contextlib.nullcontext()
+        
+        try:
+            company_name = company.get('name', '')
+            location = company.get('location', '')
+            # Knowledge base key uses the generated website (provider data may replace it)
+            website = company.get('website')
+            kb = self.knowledge_base
+            # Knowledge base calls hit SQLite: keep them off the event loop
+            known = await asyncio.to_thread(kb.lookup, company_name, website)
             
-            # Step 2: Verify and enrich companies using tools (if available)
-            enriched_leads = []
-            import uuid
+            # Step 2a: Verify company exists (if tools available)
+            verified = True
+            if known["verified"] is not None:
+                verified = known["verified"]
+                if not verified:
+                    print(f"[RESEARCH AGENT] Skipping {company_name} - known not to be a real company")
+                    return None
+            elif self._verification_enabled():
+                try:
+                    async with stage("verify"):
+                        exists = await check_company_exists_async(company_name, location)
+                    if exists is not None:
+                        verified = exists
+                        await asyncio.to_thread(kb.record_verification, company_name, website, verified)
+                    else:
+                        print(f"[WARNING] Cannot verify {company_name} - search API not configured")
+                    if not verified:
+                        print(f"[RESEARCH AGENT] Skipping {company_name} - not verified as real company")
+                        return None  # Skip unverified companies
+                except Exception as e:
+                    print(f"[RESEARCH AGENT] Verification failed for {company_name}: {e}")
+                    # Continue anyway if verification fails
             
-            for company in companies:
+            # Step 2b: Get real company data (if tools available)
+            if known["provider_data"] is not None:
+                self._merge_company_data(company, known["provider_data"], verified)
+            elif TOOLS_AVAILABLE:
                 try:
-                    company_name = company.get('name', '')
-                    location = company.get('location', '')
-                    
-                    # Step 2a: Verify company exists (if tools available)
-                    verified = True
-                    if TOOLS_AVAILABLE and os.getenv("SERPAPI_API_KEY") or os.getenv("GOOGLE_SEARCH_API_KEY"):
-                        try:
-                            verified = verify_company_exists(company_name, location)
-                            if not verified:
-                                print(f"[RESEARCH AGENT] Skipping {company_name} - not verified as real company")
-                                continue  # Skip unverified companies
-                        except Exception as e:
-                            print(f"[RESEARCH AGENT] Verification failed for {company_name}: {e}")
-                            # Continue anyway if verification fails
-                    
-                    # Step 2b: Get real company data (if tools available)
-                    if TOOLS_AVAILABLE:
-                        try:
-                            company_data_result = get_company_data(company_name, company.get('website'))
-                            if company_data_result.get("success"):
-                                real_data = company_data_result.get("data", {})
-                                # Merge real data with LLM-generated data
-                                company.update({
-                                    "description": real_data.get("description", company.get("description", "")),
-                                    "website": real_data.get("website", company.get("website", "")),
-                                    "employees": real_data.get("employees", company.get("employees", "Unknown")),
-                                    "verified": verified,
-                                    "data_source": real_data.get("provider", "llm")
-                                })
-                                print(f"[RESEARCH AGENT] Enriched {company_name} with real data from {real_data.get('provider', 'unknown')}")
-                        except Exception as e:
-                            print(f"[RESEARCH AGENT] Data enrichment failed for {company_name}: {e}")
-                            # Continue with LLM data if enrichment fails
-                    
-                    # Step 2c: Enrich with LLM analysis (always done)
-                    enriched = self._enrich_company_data(company, product_service, context)
-                    
-                    # Ensure each lead has an ID
-                    if "id" not in enriched:
-                        enriched["id"] = str(uuid.uuid4())
-                    
-                    # Mark as verified if we checked
-                    if TOOLS_AVAILABLE:
-                        enriched["verified"] = verified
-                    
-                    enriched_leads.append(enriched)
-                    
+                    async with stage("company_data"):
+                        company_data_result = await get_company_data_async(company_name, website)
+                    if company_data_result.get("success"):
+                        real_data = company_data_result.get("data", {})
+                        await asyncio.to_thread(kb.record_provider_data, company_name, website, real_data)
+                        self._merge_company_data(company, real_data, verified)
+                        print(f"[RESEARCH AGENT] Enriched {company_name} with real data from {real_data.get('provider', 'unknown')}")
                 except Exception as e:
-                    print(f"[RESEARCH AGENT] Error processing {company.get('name', 'Unknown')}: {e}")
-                    # Continue with next company even if one fails
-                    if "id" not in company:
-                        company["id"] = str(uuid.uuid4())
-                    enriched_leads.append(company)
+                    print(f"[RESEARCH AGENT] Data enrichment failed for {company_name}: {e}")
+                    # Continue with LLM data if enrichment fails
+            
+            # Step 2c: Enrich with LLM analysis (always done, unless already known for this offer)
+            offer_key = kb.offer_key(product_service, context)
+            known_enrichment = await asyncio.to_thread(kb.get_enrichment, company_name, website, offer_key)
+            if known_enrichment is not None:
+                enriched = {**company, **known_enrichment}
+            else:
+                if enrich_batcher is not None:
+                    enriched = await enrich_batcher.submit(company)
+                else:
+                    async with stage("enrich"):
+                        enriched = await self._enrich_company_data(company, product_service, context)
+                # The generic fallback is not worth keeping
+                if enriched.get("relevance_reason") and enriched["relevance_reason"] != self._fallback_relevance(company, product_service):
+                    await asyncio.to_thread(kb.record_enrichment, company_name, website, offer_key, enriched)
+            
+            # Ensure each lead has an ID
+            if "id" not in enriched:
+                enriched["id"] = str(uuid.uuid4())
             
-            print(f"[RESEARCH AGENT] Returning {len(enriched_leads)} enriched leads")
-            return enriched_leads[:max_leads]  # Return up to max_leads
+            # Mark as verified if we checked
+            if TOOLS_AVAILABLE:
+                enriched["verified"] = verified
+            
+            return enriched
             
         except Exception as e:
-            import traceback
-            print(f"[RESEARCH AGENT] Error: {str(e)}")
-            print(f"[RESEARCH AGENT] Traceback: {traceback.format_exc()}")
-            raise
+            print(f"[RESEARCH AGENT] Error processing {company.get('name', 'Unknown')}: {e}")
+            # Continue with next company even if one fails
+            if "id" not in company:
+                company["id"] = str(uuid.uuid4())
+            return company
     
-    def _generate_companies_llm(self, product_service: str, area: str, context: str = None, max_leads: int = 10) -> List[Dict[str, Any]]:
+    def _merge_company_data(self, company: Dict[str, Any], real_data: Dict[str, Any], verified: bool):
+        """Merge provider data (Clearbit or web search) into LLM-generated company data"""
+        company.update({
+            "description": real_data.get("description", company.get("description", "")),
+            "website": real_data.get("website", company.get("website", "")),
+            "employees": real_data.get("employees", company.get("employees", "Unknown")),
+            "verified": verified,
+            "data_source": real_data.get("provider", "llm")
+        })
+    
+    async def _stream_companies_llm(self, product_service: str, area: str, context: str = None, max_leads: int = 10) -> AsyncIterator[Dict[str, Any]]:
         """
-        Generate companies directly using LLM
+        Generate companies directly using LLM, yielding each one as soon as it is written
         
         This approach uses the LLM to generate realistic company leads based on criteria,
         which is more reliable than web scraping and doesn't require external APIs.
+        The response is streamed through an incremental JSON parser, so each company
+        is available as soon as its object closes and a malformed entry only loses
+        that one company.
         """
         prompt = COMPANY_GENERATION_PROMPT.format(
             product_service=product_service,
@@ -126,41 +379,47 @@ class LeadResearchAgent(BaseAgent):
             max_leads=max_leads
         )
         
+        parser = JSONStreamParser()
+        ready: asyncio.Queue = asyncio.Queue()
+        
+        async def on_token(delta: str):
+            for company in parser.feed(delta):
+                ready.put_nowait(company)
+        
+        call = asyncio.ensure_future(
+            call_llm_async(prompt, temperature=0.8, model="gpt-4", use_cache=False, on_token=on_token)
+        )
+        call.add_done_callback(lambda _: ready.put_nowait(None))
+        
+        generated = 0
         try:
-            response = call_llm(prompt, temperature=0.8, model="gpt-4")
-            
-            # Parse JSON response
-            import json
-            
-            # Extract JSON from response (handle cases where LLM adds extra text)
-            if "[" in response:
-                json_start = response.find("[")
-                json_end = response.rfind("]") + 1
-                json_str = response[json_start:json_end]
-                companies = json.loads(json_str)
+            while generated < max_leads:
+                company = await ready.get()
+                if company is None:
+                    break
                 
                 # Ensure all required fields are present
-                for company in companies:
-                    if "employees" not in company:
-                        company["employees"] = "Unknown"
-                    if "website" not in company:
-                        company["website"] = f"https://{company.get('name', '').lower().replace(' ', '')}.com"
+                if "employees" not in company:
+                    company["employees"] = "Unknown"
+                if "website" not in company:
+                    company["website"] = f"https://{company.get('name', '').lower().replace(' ', '')}.com"
                 
-                print(f"[RESEARCH AGENT] Generated {len(companies)} companies using LLM")
-                return companies[:max_leads]
-            else:
-                print(f"[RESEARCH AGENT] Failed to parse LLM response: {response[:200]}")
-                return []
-                
-        except json.JSONDecodeError as e:
-            print(f"[RESEARCH AGENT] JSON decode error: {e}")
-            print(f"[RESEARCH AGENT] Response: {response[:500] if 'response' in locals() else 'N/A'}")
-            return []
-        except Exception as e:
-            import traceback
-            print(f"[RESEARCH AGENT] Error generating companies: {str(e)}")
-            print(f"[RESEARCH AGENT] Traceback: {traceback.format_exc()}")
-            return []
+                generated += 1
+                yield company
+        finally:
+            # Enough companies (or the consumer stopped): don't pay for the rest
+            if not call.done():
+                call.cancel()
+        
+        if call.done() and not call.cancelled():
+            if call.exception() is not None:
+                print(f"[RESEARCH AGENT] Error generating companies: {call.exception()}")
+            elif generated == 0:
+                print(f"[RESEARCH AGENT] Failed to parse LLM response: {call.result()[:200]}")
+        
+        if parser.errors:
+            print(f"[RESEARCH AGENT] Skipped {parser.errors} malformed companies in LLM response")
+        print(f"[RESEARCH AGENT] Generated {generated} companies using LLM")
     
     def _extract_domain(self, url: str) -> str:
         """Extract domain from URL"""
@@ -205,7 +464,7 @@ class LeadResearchAgent(BaseAgent):
                 return match.group(0)
         return "Unknown"
     
-    def _enrich_company_data(self, company: Dict[str, Any], product_service: str, context: str = None) -> Dict[str, Any]:
+    async def _enrich_company_data(self, company: Dict[str, Any], product_service: str, context: str = None) -> Dict[str, Any]:
         """Enrich company data using LLM"""
         prompt = COMPANY_ENRICHMENT_PROMPT.format(
             company_name=company.get('name', 'N/A'),
@@ -218,27 +477,18 @@ class LeadResearchAgent(BaseAgent):
         
         try:
             # Call LLM to enrich company data
-            response = call_llm(prompt, temperature=0.7, model="gpt-3.5-turbo")
+            response = await call_llm_async(prompt, temperature=0.7, model="gpt-3.5-turbo")
             
-            # Parse JSON response
-            import json
-            try:
-                # Extract JSON from response (handle cases where LLM adds extra text)
-                if "{" in response:
-                    json_start = response.find("{")
-                    json_end = response.rfind("}") + 1
-                    json_str = response[json_start:json_end]
-                    enriched_data = json.loads(json_str)
-                    
-                    # Merge with original company data
-                    return {
-                        **company,
-                        "description": enriched_data.get("description", company.get("description", "")),
-                        "relevance_reason": enriched_data.get("relevance_reason", ""),
-                        "recent_news": enriched_data.get("recent_news", "No recent news available")
-                    }
-            except json.JSONDecodeError:
-                pass
+            # First JSON object in the response (the LLM may add text around it)
+            enriched_data = parse_json_object(response)
+            if enriched_data is not None:
+                # Merge with original company data
+                return {
+                    **company,
+                    "description": enriched_data.get("description", company.get("description", "")),
+                    "relevance_reason": enriched_data.get("relevance_reason", ""),
+                    "recent_news": enriched_data.get("recent_news", "No recent news available")
+                }
         except Exception:
             pass
         
@@ -246,7 +496,75 @@ class LeadResearchAgent(BaseAgent):
         return {
             **company,
             "description": company.get("description", ""),
-            "relevance_reason": f"Company in {company.get('industry')} industry could benefit from {product_service}",
+            "relevance_reason": self._fallback_relevance(company, product_service),
             "recent_news": "No recent news available"
         }
 
+    
+    def _fallback_relevance(self, company: Dict[str, Any], product_service: str) -> str:
+        """Generic relevance used when the LLM enrichment fails"""
+        return f"Company in {company.get('industry')} industry could benefit from {product_service}"
+    
+    def _batch_entry(self, number: int, company: Dict[str, Any]) -> str:
+        """Describe one company inside a batched enrichment prompt"""
+        return COMPANY_BATCH_ENTRY.format(
+            number=number,
+            company_name=company.get('name', 'N/A'),
+            industry=company.get('industry', 'N/A'),
+            location=company.get('location', 'N/A'),
+            description=company.get('description', 'N/A')
+        )
+    
+    def _enrichment_tokens(self, company: Dict[str, Any]) -> int:
+        """Estimated prompt plus response tokens one company adds to a batched enrichment call"""
+        return estimate_tokens(self._batch_entry(0, company)) + ENRICHMENT_RESPONSE_TOKENS
+    
+    async def _enrich_company_batch(self, companies: List[Dict[str, Any]], product_service: str, context: str = None) -> List[Dict[str, Any]]:
+        """
+        Enrich several companies with one LLM call
+        
+        Companies missing from the response, or with malformed entries, are
+        enriched individually with _enrich_company_data.
+        
+        Returns:
+            Enriched companies (or the exception for a company that failed), in the same order
+        """
+        if len(companies) == 1:
+            return [await self._enrich_company_data(companies[0], product_service, context)]
+        
+        prompt = COMPANY_BATCH_ENRICHMENT_PROMPT.format(
+            companies="\n".join(self._batch_entry(number, company) for number, company in enumerate(companies, start=1)),
+            product_service=product_service,
+            context=context or "None"
+        )
+        
+        parsed = {}
+        try:
+            response = await call_llm_async(prompt, temperature=0.7, model="gpt-3.5-turbo")
+            parsed = parse_json_object(response) or {}
+        except Exception as e:
+            print(f"[RESEARCH AGENT] Batched enrichment failed, enriching individually: {e}")
+        
+        results: List[Any] = []
+        for number, company in enumerate(companies, start=1):
+            entry = parsed.get(str(number))
+            if isinstance(entry, dict) and entry.get("relevance_reason"):
+                results.append({
+                    **company,
+                    "description": entry.get("description", company.get("description", "")),
+                    "relevance_reason": entry.get("relevance_reason", ""),
+                    "recent_news": entry.get("recent_news", "No recent news available")
+                })
+            else:
+                results.append(None)
+        
+        missing = [index for index, result in enumerate(results) if result is None]
+        if missing:
+            fallbacks = await asyncio.gather(*(
+                self._enrich_company_data(companies[index], product_service, context) for index in missing
+            ), return_exceptions=True)
+            for index, enriched in zip(missing, fallbacks):
+                results[index] = enriched
+        
+        print(f"[RESEARCH AGENT] Enriched {len(companies)} companies in one call ({len(missing)} enriched individually)")
+        return results
@@ -0,0 +1,312 @@
+"""
+Resilience policy for external calls
+
+One layer shared by the LLM client and the search / company data providers:
+- Per-call deadlines: every attempt gets a timeout no longer than the time
+  left in the overall deadline
+- Exponential backoff with full jitter for retryable errors (timeouts,
+  connection errors, 408/429/5xx), honouring Retry-After on 429s
+- Per-provider circuit breakers that fail fast while a provider is down, so
+  callers with a fallback provider can move on immediately
+
+Wrapped functions must accept a `timeout` keyword argument (seconds).
+"""
+from typing import Any, Awaitable, Callable, Dict
+from dataclasses import dataclass
+import asyncio
+import random
+import threading
+import time
+
+from .settings import env_int, env_float
+from .rate_limiter import rate_limit_details
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit breaker is open"""
+    pass
+
+
+@dataclass
+class ResiliencePolicy:
+    """Timeouts and retry settings for one provider"""
+    attempt_timeout: float
+    deadline: float
+    max_attempts: int
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+
+    def backoff(self, attempt: int, retry_after: float = None) -> float:
+        """Delay before retry number `attempt` (1-based): full jitter, at least Retry-After"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+        if retry_after:
+            delay = max(delay, retry_after)
+        return delay
+
+
+# Defaults per provider; each value can be overridden with
+# RESILIENCE_<PROVIDER>_TIMEOUT / _DEADLINE / _MAX_ATTEMPTS
+DEFAULT_POLICIES = {
+    "openai": {"attempt_timeout": 60.0, "deadline": 150.0, "max_attempts": 3},
+    "serpapi": {"attempt_timeout": 10.0, "deadline": 20.0, "max_attempts": 2},
+    "google": {"attempt_timeout": 10.0, "deadline": 20.0, "max_attempts": 2},
+    "clearbit": {"attempt_timeout": 10.0, "deadline": 20.0, "max_attempts": 2},
+}
+
+
+def get_policy(provider: str) -> ResiliencePolicy:
+    """Build the resilience policy for a provider from defaults and env overrides"""
+    defaults = DEFAULT_POLICIES.get(provider, {"attempt_timeout": 10.0, "deadline": 20.0, "max_attempts": 2})
+    prefix = f"RESILIENCE_{provider.upper()}"
+    return ResiliencePolicy(
+        attempt_timeout=env_float(f"{prefix}_TIMEOUT", defaults["attempt_timeout"]),
+        deadline=env_float(f"{prefix}_DEADLINE", defaults["deadline"]),
+        max_attempts=max(1, env_int(f"{prefix}_MAX_ATTEMPTS", defaults["max_attempts"]))
+    )
+
+
+def _status_code(error: BaseException):
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Check whether a failed call is worth retrying
+
+    Timeouts, connection failures and 408/429/5xx responses are retryable;
+    other 4xx responses are caller errors and are not.
+    """
+    if isinstance(error, CircuitOpenError):
+        return False
+
+    status = _status_code(error)
+    if status is not None:
+        return status in (408, 429) or status >= 500
+
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+
+    # Client library timeout / connection errors (requests, httpx, openai) by name,
+    # so this module does not need to import every library
+    names = {cls.__name__ for cls in type(error).__mro__}
+    return bool(names & {
+        "Timeout", "ConnectionError", "TimeoutException", "TransportError",
+        "APITimeoutError", "APIConnectionError"
+    })
+
+
+class CircuitBreaker:
+    """Closed -> open after consecutive failures -> half-open trial after a cool-down"""
+
+    def __init__(self, name: str, failure_threshold: int = None, reset_timeout: float = None):
+        """
+        Args:
+            name: Provider name
+            failure_threshold: Consecutive failures that open the circuit (default: CIRCUIT_FAILURE_THRESHOLD or 5)
+            reset_timeout: Seconds the circuit stays open before a trial call (default: CIRCUIT_RESET_TIMEOUT or 30)
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold or env_int("CIRCUIT_FAILURE_THRESHOLD", 5)
+        self.reset_timeout = reset_timeout or env_float("CIRCUIT_RESET_TIMEOUT", 30.0)
+
+        self._lock = threading.Lock()
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._stats = {"calls": 0, "failures": 0, "retries": 0, "timeouts": 0, "short_circuited": 0, "opened": 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state_locked()
+
+    def _current_state_locked(self) -> str:
+        if self._state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = "half_open"
+            self._trial_in_flight = False
+        return self._state
+
+    def before_call(self):
+        """Raise CircuitOpenError if the provider should not be called right now"""
+        with self._lock:
+            state = self._current_state_locked()
+            if state == "open" or (state == "half_open" and self._trial_in_flight):
+                self._stats["short_circuited"] += 1
+                raise CircuitOpenError(f"{self.name} circuit is open - failing fast")
+            if state == "half_open":
+                self._trial_in_flight = True
+            self._stats["calls"] += 1
+
+    def record_success(self):
+        with self._lock:
+            self._state = "closed"
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self, error: BaseException):
+        """Count a provider failure (caller errors and 429s do not count toward opening)"""
+        with self._lock:
+            self._stats["failures"] += 1
+            if isinstance(error, (TimeoutError, asyncio.TimeoutError)) or "Timeout" in type(error).__name__:
+                self._stats["timeouts"] += 1
+
+            if not is_retryable(error) or rate_limit_details(error)[0]:
+                # The provider answered (a caller error or a 429, which the rate
+                # limiter handles); release a half-open trial without judging health
+                self._trial_in_flight = False
+                return
+
+            self._failures += 1
+            if self._state == "half_open" or self._failures >= self.failure_threshold:
+                if self._state != "open":
+                    self._stats["opened"] += 1
+                    print(f"[RESILIENCE] Circuit for {self.name} opened after {self._failures} failures")
+                self._state = "open"
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def abandon(self):
+        """The caller gave up mid-call; release a half-open trial without judging provider health"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_retry(self):
+        with self._lock:
+            self._stats["retries"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["state"] = self._current_state_locked()
+            stats["consecutive_failures"] = self._failures
+        return stats
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(provider: str) -> CircuitBreaker:
+    """Get (or create) the process-wide circuit breaker for a provider"""
+    with _breakers_lock:
+        breaker = _breakers.get(provider)
+        if breaker is None:
+            breaker = CircuitBreaker(provider)
+            _breakers[provider] = breaker
+        return breaker
+
+
+def reset_circuit_breakers(provider: str = None):
+    """
+    Forget circuit breaker state so the next call starts with a closed circuit
+
+    Args:
+        provider: Only reset this provider's breaker (default: all of them)
+    """
+    with _breakers_lock:
+        if provider is None:
+            _breakers.clear()
+        else:
+            _breakers.pop(provider, None)
+
+
+def circuit_breaker_stats() -> Dict[str, Dict[str, Any]]:
+    """Report state and counters for every provider circuit breaker"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.stats() for breaker in breakers}
+
+
+def _attempt_timeout(policy: ResiliencePolicy, started: float) -> float:
+    """Timeout for the next attempt, or raise TimeoutError once the deadline has passed"""
+    remaining = policy.deadline - (time.monotonic() - started)
+    if remaining <= 0:
+        raise TimeoutError("deadline exceeded")
+    return min(policy.attempt_timeout, remaining)
+
+
+def call_with_resilience(provider: str, fn: Callable[..., Any], *args, policy: ResiliencePolicy = None, **kwargs) -> Any:
+    """
+    Call fn(*args, timeout=..., **kwargs) with deadline, retries and the provider's circuit breaker
+
+    Args:
+        provider: Provider name (selects the policy and circuit breaker)
+        fn: Function performing one attempt; must accept a `timeout` keyword
+        policy: Override the provider's default policy
+
+    Returns:
+        The function's result
+
+    Raises:
+        CircuitOpenError: The provider's circuit is open
+        The last error once retries or the deadline are exhausted
+    """
+    policy = policy or get_policy(provider)
+    breaker = get_circuit_breaker(provider)
+    started = time.monotonic()
+
+    for attempt in range(1, policy.max_attempts + 1):
+        breaker.before_call()
+        try:
+            result = fn(*args, timeout=_attempt_timeout(policy, started), **kwargs)
+        except Exception as e:
+            breaker.record_failure(e)
+            delay = policy.backoff(attempt, rate_limit_details(e)[1])
+            out_of_time = time.monotonic() - started + delay >= policy.deadline
+            if attempt >= policy.max_attempts or not is_retryable(e) or out_of_time:
+                raise
+            breaker.record_retry()
+            print(f"[RESILIENCE] {provider} attempt {attempt} failed ({e}); retrying in {delay:.2f}s")
+            time.sleep(delay)
+        else:
+            breaker.record_success()
+            return result
+
+
+async def call_with_resilience_async(provider: str, fn: Callable[..., Awaitable[Any]], *args, policy: ResiliencePolicy = None, hard_timeout: bool = True, **kwargs) -> Any:
+    """
+    Await fn(*args, timeout=..., **kwargs) with deadline, retries and the provider's circuit breaker
+
+    Args:
+        provider: Provider name (selects the policy and circuit breaker)
+        fn: Coroutine function performing one attempt; must accept a `timeout` keyword
+        policy: Override the provider's default policy
+        hard_timeout: Also bound each attempt with asyncio.wait_for, so the
+            deadline holds even if the client ignores its timeout
+
+    Returns:
+        The coroutine's result
+
+    Raises:
+        CircuitOpenError: The provider's circuit is open
+        The last error once retries or the deadline are exhausted
+    """
+    policy = policy or get_policy(provider)
+    breaker = get_circuit_breaker(provider)
+    started = time.monotonic()
+
+    for attempt in range(1, policy.max_attempts + 1):
+        breaker.before_call()
+        try:
+            timeout = _attempt_timeout(policy, started)
+            attempt_call = fn(*args, timeout=timeout, **kwargs)
+            result = await (asyncio.wait_for(attempt_call, timeout) if hard_timeout else attempt_call)
+        except asyncio.CancelledError:
+            breaker.abandon()
+            raise
+        except Exception as e:
+            breaker.record_failure(e)
+            delay = policy.backoff(attempt, rate_limit_details(e)[1])
+            out_of_time = time.monotonic() - started + delay >= policy.deadline
+            if attempt >= policy.max_attempts or not is_retryable(e) or out_of_time:
+                raise
+            breaker.record_retry()
+            print(f"[RESILIENCE] {provider} attempt {attempt} failed ({e}); retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+        else:
+            breaker.record_success()
+            return result
@@ -0,0 +1,82 @@
+"""
+Event loop helpers for the agents
+
+The agents are implemented as coroutines. Synchronous callers (tests, scripts,
+the tool-calling helpers) go through run_sync, which drives them on one
+long-lived background loop so pooled async connections survive between calls.
+"""
+from typing import Any, Awaitable, Callable, Dict
+import asyncio
+import threading
+import weakref
+
+_loop = None
+_thread = None
+_lock = threading.Lock()
+
+
+def _get_background_loop() -> asyncio.AbstractEventLoop:
+    """Start (once) and return the background event loop"""
+    global _loop, _thread
+
+    if _loop is not None:
+        return _loop
+
+    with _lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="agents-event-loop", daemon=True)
+            thread.start()
+            _loop, _thread = loop, thread
+
+    return _loop
+
+
+def run_sync(coro: Awaitable) -> Any:
+    """
+    Run a coroutine to completion from synchronous code
+
+    Args:
+        coro: Coroutine to run
+
+    Returns:
+        The coroutine's result (exceptions are re-raised in the caller)
+    """
+    loop = _get_background_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        raise RuntimeError("run_sync() cannot be called from the agents event loop; await the coroutine instead")
+
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+class LoopLocal:
+    """Lazily created value with one instance per running event loop"""
+
+    def __init__(self, factory: Callable[[], Any]):
+        self._factory = factory
+        self._values: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        """Get the value for the running loop, creating it on first use"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            value = self._values.get(loop)
+            if value is None:
+                value = self._factory()
+                self._values[loop] = value
+        return value
+
+    def pop(self) -> Any:
+        """Remove and return the value for the running loop (None if absent)"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            return self._values.pop(loop, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._values)
@@ -0,0 +1,145 @@
+"""
+Single-flight request coalescing
+
+When several callers ask for the same key at the same time, only the first
+one (the leader) runs the underlying call; the others wait for it and share
+its result or exception. Works for both threaded callers (do) and asyncio
+callers (do_async).
+"""
+from typing import Any, Awaitable, Callable, Dict, Hashable
+import asyncio
+import copy
+import threading
+
+from .runtime import LoopLocal
+
+
+class _InFlightCall:
+    """Result slot for a threaded call that other threads can wait on"""
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlightGroup:
+    """Coalesces concurrent calls that share a key"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _InFlightCall] = {}
+        # asyncio tasks are bound to their loop, so in-flight tasks are tracked per loop
+        self._async_calls = LoopLocal(dict)
+        self._stats = {"calls": 0, "executions": 0, "coalesced": 0}
+
+    def _register(self, leader: bool):
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["executions" if leader else "coalesced"] += 1
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs) unless an identical call is already in flight
+
+        Args:
+            key: Identity of the call; callers with equal keys share one execution
+            fn: Function to call
+
+        Returns:
+            The function's result (followers receive a copy)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _InFlightCall()
+                self._calls[key] = call
+        self._register(leader)
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    async def do_async(self, key: Hashable, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """
+        Await fn(*args, **kwargs) unless an identical call is already in flight on this loop
+
+        The shared call runs as its own task, so a caller that is cancelled
+        does not cancel the request for the others waiting on it.
+
+        Args:
+            key: Identity of the call; callers with equal keys share one execution
+            fn: Coroutine function to call
+
+        Returns:
+            The coroutine's result (followers receive a copy)
+        """
+        calls = self._async_calls.get()
+        task = calls.get(key)
+        leader = task is None
+        if leader:
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            calls[key] = task
+
+            def _finished(done_task, key=key):
+                if calls.get(key) is done_task:
+                    del calls[key]
+                # Mark the exception as retrieved even if every caller was cancelled
+                if not done_task.cancelled():
+                    done_task.exception()
+
+            task.add_done_callback(_finished)
+        self._register(leader)
+
+        result = await asyncio.shield(task)
+        return result if leader else copy.deepcopy(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report how many calls were made, executed and coalesced
+
+        Returns:
+            Dict with call counters and the number of calls currently in flight
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls)
+        stats["coalesce_rate"] = round(stats["coalesced"] / stats["calls"], 4) if stats["calls"] else 0.0
+        return stats
+
+
+_groups: Dict[str, SingleFlightGroup] = {}
+_groups_lock = threading.Lock()
+
+
+def get_flight_group(name: str) -> SingleFlightGroup:
+    """Get (or create) the process-wide single-flight group with this name"""
+    with _groups_lock:
+        group = _groups.get(name)
+        if group is None:
+            group = SingleFlightGroup(name)
+            _groups[name] = group
+        return group
+
+
+def singleflight_stats() -> Dict[str, Dict[str, Any]]:
+    """Report statistics for every single-flight group"""
+    with _groups_lock:
+        groups = list(_groups.values())
+    return {group.name: group.stats() for group in groups}
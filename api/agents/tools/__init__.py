@@ -3,12 +3,15 @@ Tools for agentic capabilities
 
 These tools enable agents to interact with external APIs and services.
 """
-from .web_search import search_web, verify_company_exists
-from .company_data import get_company_data
+from .web_search import search_web, verify_company_exists, search_web_async, verify_company_exists_async, check_company_exists_async
+from .company_data import get_company_data, get_company_data_async
 
 __all__ = [
     "search_web",
     "verify_company_exists", 
-    "get_company_data"
+    "get_company_data",
+    "search_web_async",
+    "verify_company_exists_async",
+    "check_company_exists_async",
+    "get_company_data_async"
 ]
-
@@ -7,12 +7,61 @@ import os
 import requests
 from typing import Dict, Any, Optional
 
+from .http_client import get_async_http_client
+from ..singleflight import get_flight_group
+from ..resilience import call_with_resilience, call_with_resilience_async
+
+CLEARBIT_COMPANY_URL = "https://company.clearbit.com/v2/companies/find"
+CLEARBIT_NAME_TO_DOMAIN_URL = "https://company.clearbit.com/v1/domains/find"
+
+# Concurrent lookups for the same company share one provider request
+_company_flights = get_flight_group("company_data")
+
+
+def _clearbit_domain(domain: Optional[str]) -> Optional[str]:
+    """Reduce a website URL to the bare domain Clearbit expects"""
+    if not domain:
+        return None
+    domain = domain.strip().lower()
+    for prefix in ("https://", "http://"):
+        if domain.startswith(prefix):
+            domain = domain[len(prefix):]
+    domain = domain.split("/")[0]
+    return domain[4:] if domain.startswith("www.") else domain
+
+
+def _format_clearbit_company(company: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a Clearbit company record into the common company data format"""
+    return {
+        "success": True,
+        "data": {
+            "name": company.get("name"),
+            "domain": company.get("domain"),
+            "description": company.get("description"),
+            "industry": (company.get("category") or {}).get("industry"),
+            "employees": (company.get("metrics") or {}).get("employees"),
+            "location": f"{(company.get('geo') or {}).get('city', '')}, {(company.get('geo') or {}).get('state', '')}",
+            "founded": company.get("foundedYear"),
+            "website": company.get("domain"),
+            "provider": "clearbit"
+        }
+    }
+
+
+def _clearbit_not_found(message: str = "Company not found in Clearbit") -> Dict[str, Any]:
+    return {
+        "success": False,
+        "error": message,
+        "data": {}
+    }
+
 
 def get_company_data_clearbit(company_name: str, domain: str = None) -> Dict[str, Any]:
     """
     Get company data from Clearbit API
     
-    Requires: pip install clearbit
+    Calls the Clearbit Company and Name-to-Domain HTTP APIs directly so each
+    request gets a timeout, retries and the Clearbit circuit breaker.
     Get API key from: https://clearbit.com/ (Free tier available)
     
     Args:
@@ -31,46 +80,26 @@ def get_company_data_clearbit(company_name: str, domain: str = None) -> Dict[str
             "data": {}
         }
     
+    def _get(url: str, params: Dict[str, str], timeout: float) -> Optional[Dict[str, Any]]:
+        response = requests.get(url, params=params, auth=(api_key, ""), timeout=timeout)
+        # 202: lookup queued on Clearbit's side, 404: unknown company
+        if response.status_code in (202, 404):
+            return None
+        response.raise_for_status()
+        return response.json()
+    
     try:
-        from clearbit import Clearbit
-        clearbit = Clearbit(api_key)
-        
-        # Try domain first if provided
-        if domain:
-            company = clearbit.Company.find(domain=domain)
-        else:
-            # Search by name
-            results = clearbit.NameToDomain.find(name=company_name)
-            if results and results.get("domain"):
-                company = clearbit.Company.find(domain=results["domain"])
-            else:
-                return {
-                    "success": False,
-                    "error": "Company not found in Clearbit",
-                    "data": {}
-                }
+        # Try domain first if provided, otherwise search by name
+        lookup_domain = _clearbit_domain(domain)
+        if not lookup_domain:
+            match = call_with_resilience("clearbit", _get, CLEARBIT_NAME_TO_DOMAIN_URL, {"name": company_name})
+            lookup_domain = (match or {}).get("domain")
+            if not lookup_domain:
+                return _clearbit_not_found()
         
+        company = call_with_resilience("clearbit", _get, CLEARBIT_COMPANY_URL, {"domain": lookup_domain})
         if company:
-            return {
-                "success": True,
-                "data": {
-                    "name": company.get("name"),
-                    "domain": company.get("domain"),
-                    "description": company.get("description"),
-                    "industry": company.get("category", {}).get("industry"),
-                    "employees": company.get("metrics", {}).get("employees"),
-                    "location": f"{company.get('geo', {}).get('city', '')}, {company.get('geo', {}).get('state', '')}",
-                    "founded": company.get("foundedYear"),
-                    "website": company.get("domain"),
-                    "provider": "clearbit"
-                }
-            }
-    except ImportError:
-        return {
-            "success": False,
-            "error": "clearbit package not installed. Run: pip install clearbit",
-            "data": {}
-        }
+            return _format_clearbit_company(company)
     except Exception as e:
         return {
             "success": False,
@@ -78,11 +107,7 @@ def get_company_data_clearbit(company_name: str, domain: str = None) -> Dict[str
             "data": {}
         }
     
-    return {
-        "success": False,
-        "error": "Company not found",
-        "data": {}
-    }
+    return _clearbit_not_found("Company not found")
 
 
 def get_company_data_from_web(company_name: str) -> Dict[str, Any]:
@@ -124,6 +149,8 @@ def get_company_data(company_name: str, domain: str = None) -> Dict[str, Any]:
     2. Web search (if search API is configured)
     3. Returns empty data with warning
     
+    Concurrent calls for the same company and domain share one lookup.
+    
     Args:
         company_name: Company name
         domain: Optional company website domain
@@ -131,6 +158,11 @@ def get_company_data(company_name: str, domain: str = None) -> Dict[str, Any]:
     Returns:
         Dict with company data or error message
     """
+    return _company_flights.do((company_name, domain), _get_company_data, company_name, domain)
+
+
+def _get_company_data(company_name: str, domain: str = None) -> Dict[str, Any]:
+    """Run the provider fallback chain for get_company_data"""
     # Try Clearbit first
     if os.getenv("CLEARBIT_API_KEY"):
         result = get_company_data_clearbit(company_name, domain)
@@ -150,3 +182,113 @@ def get_company_data(company_name: str, domain: str = None) -> Dict[str, Any]:
         "note": "Company data enrichment will be limited without API keys"
     }
 
+
+# ============================================================================
+# Async variants (used by the agents' execute_async paths)
+# ============================================================================
+
+async def get_company_data_clearbit_async(company_name: str, domain: str = None) -> Dict[str, Any]:
+    """
+    Get company data from Clearbit API without blocking the event loop
+    
+    Same lookups, timeouts and retries as get_company_data_clearbit.
+    """
+    api_key = os.getenv("CLEARBIT_API_KEY")
+    
+    if not api_key:
+        return {
+            "success": False,
+            "error": "CLEARBIT_API_KEY not found",
+            "data": {}
+        }
+    
+    async def _get(url: str, params: Dict[str, str], timeout: float) -> Optional[Dict[str, Any]]:
+        response = await get_async_http_client().get(url, params=params, auth=(api_key, ""), timeout=timeout)
+        if response.status_code in (202, 404):
+            return None
+        response.raise_for_status()
+        return response.json()
+    
+    try:
+        lookup_domain = _clearbit_domain(domain)
+        if not lookup_domain:
+            match = await call_with_resilience_async("clearbit", _get, CLEARBIT_NAME_TO_DOMAIN_URL, {"name": company_name})
+            lookup_domain = (match or {}).get("domain")
+            if not lookup_domain:
+                return _clearbit_not_found()
+        
+        company = await call_with_resilience_async("clearbit", _get, CLEARBIT_COMPANY_URL, {"domain": lookup_domain})
+        if company:
+            return _format_clearbit_company(company)
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "data": {}
+        }
+    
+    return _clearbit_not_found("Company not found")
+
+
+async def get_company_data_from_web_async(company_name: str) -> Dict[str, Any]:
+    """
+    Fallback: Get company data from web search (async)
+    """
+    from .web_search import search_web_async
+    
+    query = f"{company_name} company information about"
+    search_results = await search_web_async(query)
+    
+    if search_results.get("success") and search_results.get("results"):
+        first_result = search_results["results"][0]
+        return {
+            "success": True,
+            "data": {
+                "name": company_name,
+                "description": first_result.get("snippet", ""),
+                "website": first_result.get("link", ""),
+                "provider": "web_search"
+            }
+        }
+    
+    return {
+        "success": False,
+        "error": "No data found via web search",
+        "data": {}
+    }
+
+
+async def get_company_data_async(company_name: str, domain: str = None) -> Dict[str, Any]:
+    """
+    Get detailed company information without blocking the event loop
+    
+    Same provider order and fallbacks as get_company_data. Concurrent calls
+    for the same company and domain share one lookup.
+    
+    Args:
+        company_name: Company name
+        domain: Optional company website domain
+    
+    Returns:
+        Dict with company data or error message
+    """
+    return await _company_flights.do_async((company_name, domain), _get_company_data_async, company_name, domain)
+
+
+async def _get_company_data_async(company_name: str, domain: str = None) -> Dict[str, Any]:
+    """Run the provider fallback chain for get_company_data_async"""
+    if os.getenv("CLEARBIT_API_KEY"):
+        result = await get_company_data_clearbit_async(company_name, domain)
+        if result.get("success"):
+            return result
+    
+    result = await get_company_data_from_web_async(company_name)
+    if result.get("success"):
+        return result
+    
+    return {
+        "success": False,
+        "error": "No company data API configured. Set CLEARBIT_API_KEY or configure web search",
+        "data": {},
+        "note": "Company data enrichment will be limited without API keys"
+    }
@@ -0,0 +1,15 @@
+"""
+Shared async HTTP client for the agentic tools
+
+One pooled httpx.AsyncClient per event loop, reused by every async tool call.
+"""
+import httpx
+
+from ..runtime import LoopLocal
+
+_async_http_clients = LoopLocal(lambda: httpx.AsyncClient(timeout=10))
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Get the pooled async HTTP client for the running event loop"""
+    return _async_http_clients.get()
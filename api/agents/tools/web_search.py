@@ -5,7 +5,75 @@ Supports multiple search providers with graceful fallbacks.
 """
 import os
 import requests
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
+
+from .http_client import get_async_http_client
+from ..singleflight import get_flight_group
+from ..resilience import call_with_resilience, call_with_resilience_async
+
+SERPAPI_URL = "https://serpapi.com/search.json"
+GOOGLE_SEARCH_URL = "https://www.googleapis.com/customsearch/v1"
+
+# Concurrent identical searches share one provider request
+_search_flights = get_flight_group("search_web")
+
+
+def _format_serpapi_results(results: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a raw SerpAPI response into the common search result format"""
+    organic_results = results.get("organic_results", [])
+    
+    # Format results
+    formatted_results = []
+    for result in organic_results[:5]:  # Top 5 results
+        formatted_results.append({
+            "title": result.get("title", ""),
+            "link": result.get("link", ""),
+            "snippet": result.get("snippet", ""),
+            "position": result.get("position", 0)
+        })
+    
+    return {
+        "success": True,
+        "results": formatted_results,
+        "total_results": results.get("search_information", {}).get("total_results", 0),
+        "provider": "serpapi"
+    }
+
+
+def _format_google_results(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a raw Google Custom Search response into the common search result format"""
+    items = data.get("items", [])
+    formatted_results = []
+    for position, item in enumerate(items[:5], start=1):  # Top 5 results
+        formatted_results.append({
+            "title": item.get("title", ""),
+            "link": item.get("link", ""),
+            "snippet": item.get("snippet", ""),
+            "position": position
+        })
+    
+    return {
+        "success": True,
+        "results": formatted_results,
+        "total_results": data.get("searchInformation", {}).get("totalResults", 0),
+        "provider": "google"
+    }
+
+
+def _results_mention_company(company_name: str, search_results: List[Dict[str, Any]]) -> bool:
+    """Check whether any search result title or snippet mentions the company name"""
+    if len(search_results) == 0:
+        return False
+    
+    company_lower = company_name.lower()
+    for result in search_results:
+        title = result.get("title", "").lower()
+        snippet = result.get("snippet", "").lower()
+        
+        if company_lower in title or company_lower in snippet:
+            return True
+    
+    return False
 
 
 def search_web_serpapi(query: str, location: str = None) -> Dict[str, Any]:
@@ -48,28 +116,18 @@ def search_web_serpapi(query: str, location: str = None) -> Dict[str, Any]:
     if location:
         params["location"] = location
     
+    params["output"] = "json"
+    
+    def _fetch(timeout: float) -> Dict[str, Any]:
+        search = GoogleSearch(dict(params))
+        search.timeout = timeout
+        response = search.get_response()
+        response.raise_for_status()
+        return response.json()
+    
     try:
-        search = GoogleSearch(params)
-        results = search.get_dict()
-        
-        organic_results = results.get("organic_results", [])
-        
-        # Format results
-        formatted_results = []
-        for result in organic_results[:5]:  # Top 5 results
-            formatted_results.append({
-                "title": result.get("title", ""),
-                "link": result.get("link", ""),
-                "snippet": result.get("snippet", ""),
-                "position": result.get("position", 0)
-            })
-        
-        return {
-            "success": True,
-            "results": formatted_results,
-            "total_results": results.get("search_information", {}).get("total_results", 0),
-            "provider": "serpapi"
-        }
+        results = call_with_resilience("serpapi", _fetch)
+        return _format_serpapi_results(results)
     except Exception as e:
         return {
             "success": False,
@@ -102,34 +160,20 @@ def search_web_google(query: str) -> Dict[str, Any]:
             "results": []
         }
     
-    url = "https://www.googleapis.com/customsearch/v1"
+    url = GOOGLE_SEARCH_URL
     params = {
         "key": api_key,
         "cx": search_engine_id,
         "q": query
     }
     
-    try:
-        response = requests.get(url, params=params, timeout=10)
+    def _fetch(timeout: float) -> Dict[str, Any]:
+        response = requests.get(url, params=params, timeout=timeout)
         response.raise_for_status()
-        data = response.json()
-        
-        items = data.get("items", [])
-        formatted_results = []
-        for item in items[:5]:  # Top 5 results
-            formatted_results.append({
-                "title": item.get("title", ""),
-                "link": item.get("link", ""),
-                "snippet": item.get("snippet", ""),
-                "position": items.index(item) + 1
-            })
-        
-        return {
-            "success": True,
-            "results": formatted_results,
-            "total_results": data.get("searchInformation", {}).get("totalResults", 0),
-            "provider": "google"
-        }
+        return response.json()
+    
+    try:
+        return _format_google_results(call_with_resilience("google", _fetch))
     except Exception as e:
         return {
             "success": False,
@@ -148,6 +192,10 @@ def search_web(query: str, location: str = None) -> Dict[str, Any]:
     2. Google Custom Search (if GOOGLE_SEARCH_API_KEY is set)
     3. Returns empty results with warning
     
+    Each provider call has a deadline and retries; a provider whose circuit
+    breaker is open fails immediately so the next one is tried right away.
+    Concurrent calls with the same query and location share one search.
+    
     Args:
         query: Search query
         location: Optional location filter
@@ -155,6 +203,11 @@ def search_web(query: str, location: str = None) -> Dict[str, Any]:
     Returns:
         Dict with search results or error message
     """
+    return _search_flights.do((query, location), _search_web, query, location)
+
+
+def _search_web(query: str, location: str = None) -> Dict[str, Any]:
+    """Run the provider fallback chain for search_web"""
     # Try SerpAPI first (easiest to set up)
     if os.getenv("SERPAPI_API_KEY"):
         result = search_web_serpapi(query, location)
@@ -202,20 +255,176 @@ def verify_company_exists(company_name: str, location: str = None) -> bool:
         print(f"[WARNING] Cannot verify {company_name} - search API not configured")
         return True  # Assume exists if we can't verify
     
-    # Check if we found relevant results
-    search_results = results.get("results", [])
+    return _results_mention_company(company_name, results.get("results", []))
+
+
+# ============================================================================
+# Async variants (used by the agents' execute_async paths)
+# ============================================================================
+
+async def search_web_serpapi_async(query: str, location: str = None) -> Dict[str, Any]:
+    """
+    Search web using SerpAPI without blocking the event loop
     
-    if len(search_results) == 0:
-        return False
+    Calls the SerpAPI JSON endpoint directly over the shared async HTTP client.
     
-    # Check if any result mentions the company name
-    company_lower = company_name.lower()
-    for result in search_results:
-        title = result.get("title", "").lower()
-        snippet = result.get("snippet", "").lower()
-        
-        if company_lower in title or company_lower in snippet:
-            return True
+    Args:
+        query: Search query
+        location: Optional location filter (e.g., "San Francisco, CA")
     
-    return False
+    Returns:
+        Dict with search results
+    """
+    api_key = os.getenv("SERPAPI_API_KEY")
+    if not api_key:
+        return {
+            "success": False,
+            "error": "SERPAPI_API_KEY not found in environment variables",
+            "results": []
+        }
+    
+    params = {
+        "q": query,
+        "api_key": api_key,
+        "engine": "google"
+    }
+    
+    if location:
+        params["location"] = location
+    
+    async def _fetch(timeout: float) -> Dict[str, Any]:
+        response = await get_async_http_client().get(SERPAPI_URL, params=params, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+    
+    try:
+        return _format_serpapi_results(await call_with_resilience_async("serpapi", _fetch))
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "results": [],
+            "provider": "serpapi"
+        }
 
+
+async def search_web_google_async(query: str) -> Dict[str, Any]:
+    """
+    Search web using Google Custom Search API without blocking the event loop
+    
+    Args:
+        query: Search query
+    
+    Returns:
+        Dict with search results
+    """
+    api_key = os.getenv("GOOGLE_SEARCH_API_KEY")
+    search_engine_id = os.getenv("GOOGLE_SEARCH_ENGINE_ID")
+    
+    if not api_key or not search_engine_id:
+        return {
+            "success": False,
+            "error": "GOOGLE_SEARCH_API_KEY and GOOGLE_SEARCH_ENGINE_ID required",
+            "results": []
+        }
+    
+    params = {
+        "key": api_key,
+        "cx": search_engine_id,
+        "q": query
+    }
+    
+    async def _fetch(timeout: float) -> Dict[str, Any]:
+        response = await get_async_http_client().get(GOOGLE_SEARCH_URL, params=params, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+    
+    try:
+        return _format_google_results(await call_with_resilience_async("google", _fetch))
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "results": [],
+            "provider": "google"
+        }
+
+
+async def search_web_async(query: str, location: str = None) -> Dict[str, Any]:
+    """
+    Search the web for information without blocking the event loop
+    
+    Same provider order and fallbacks as search_web. Concurrent calls with
+    the same query and location share one search.
+    
+    Args:
+        query: Search query
+        location: Optional location filter
+    
+    Returns:
+        Dict with search results or error message
+    """
+    return await _search_flights.do_async((query, location), _search_web_async, query, location)
+
+
+async def _search_web_async(query: str, location: str = None) -> Dict[str, Any]:
+    """Run the provider fallback chain for search_web_async"""
+    if os.getenv("SERPAPI_API_KEY"):
+        result = await search_web_serpapi_async(query, location)
+        if result.get("success"):
+            return result
+    
+    if os.getenv("GOOGLE_SEARCH_API_KEY"):
+        result = await search_web_google_async(query)
+        if result.get("success"):
+            return result
+    
+    return {
+        "success": False,
+        "error": "No search API configured. Set SERPAPI_API_KEY or GOOGLE_SEARCH_API_KEY in .env file",
+        "results": [],
+        "provider": "none",
+        "note": "Web search will not work without an API key. Get free SerpAPI key from https://serpapi.com/"
+    }
+
+
+async def check_company_exists_async(company_name: str, location: str = None) -> Optional[bool]:
+    """
+    Check if a company actually exists by searching the web (async)
+    
+    Args:
+        company_name: Company name to verify
+        location: Optional company location
+    
+    Returns:
+        True if company appears to exist (found in search results), False if
+        not, None if it could not be checked (search not configured or failed)
+    """
+    query = f'"{company_name}" company'
+    if location:
+        query += f" {location}"
+    
+    results = await search_web_async(query, location)
+    
+    if not results.get("success"):
+        return None
+    
+    return _results_mention_company(company_name, results.get("results", []))
+
+
+async def verify_company_exists_async(company_name: str, location: str = None) -> bool:
+    """
+    Verify if a company actually exists by searching the web (async)
+    
+    Args:
+        company_name: Company name to verify
+        location: Optional company location
+    
+    Returns:
+        True if company appears to exist (found in search results), False otherwise
+    """
+    exists = await check_company_exists_async(company_name, location)
+    if exists is None:
+        print(f"[WARNING] Cannot verify {company_name} - search API not configured")
+        return True  # Assume exists if we can't verify
+    return exists
@@ -0,0 +1,205 @@
+"""
+Campaign persistence and state shared by the campaign endpoints and job runners
+
+Creating campaigns, saving researched leads and generated messages, and
+keeping the in-progress campaign state, independent of FastAPI so the job
+worker processes can use them without importing the routers.
+
+The database helpers take a synchronous Session as their first argument:
+job workers pass a SessionLocal session, the async endpoints run them on
+their AsyncSession with `await db.run_sync(helper, ...)`. They touch only
+that session; the campaign state store is updated by separate helpers.
+"""
+from typing import List, Dict, Any, Tuple
+from datetime import datetime
+import uuid
+
+from sqlalchemy.orm import Session
+
+from campaign_state import get_campaign_state_store
+from lead_store import save_leads, load_leads
+from message_store import upsert_messages
+from models import (
+    ResearchRequest, LeadResponse, GenerateRequest, MessageResponse,
+    FailedLeadResponse, GenerateResponse
+)
+from db_models import Campaign as DBCampaign, CampaignStatusEnum, UserProfile as DBUserProfile
+
+
+class CampaignNotFoundError(Exception):
+    """The campaign, or the leads it needs, does not exist (the API answers 404)"""
+
+
+def create_campaign_record(db: Session, request: ResearchRequest) -> str:
+    """
+    Save a new campaign with RESEARCH_IN_PROGRESS status
+    
+    Returns:
+        The new campaign's id
+    """
+    campaign_id = str(uuid.uuid4())
+    db_campaign = DBCampaign(
+        id=campaign_id,
+        product_service=request.product_service,
+        area=request.area,
+        context=request.context,
+        angle=request.angle,
+        max_leads=request.max_leads,
+        status=CampaignStatusEnum.RESEARCH_IN_PROGRESS,
+        leads_found=0,  # Will be updated after research
+        leads_selected=0,
+        created_at=datetime.utcnow()
+    )
+    db.add(db_campaign)
+    db.commit()
+    return campaign_id
+
+
+def remember_research(campaign_id: str, request: ResearchRequest, leads: List[Dict[str, Any]]):
+    """Store campaign data temporarily (for content generation)"""
+    get_campaign_state_store().set(campaign_id, {
+        "campaign_id": campaign_id,
+        "product_service": request.product_service,
+        "area": request.area,
+        "context": request.context,
+        "angle": request.angle,
+        "max_leads": request.max_leads,
+        "leads": leads,
+        "status": "research_complete"
+    })
+
+
+def save_research_leads(db: Session, campaign_id: str, leads: List[Dict[str, Any]], complete: bool = False, start: int = 0):
+    """
+    Persist the leads found so far (and mark research complete once done)
+    
+    Args:
+        leads: All leads found so far
+        start: Index of the first lead not yet persisted (earlier rows are left alone)
+    """
+    db_campaign = db.query(DBCampaign).filter(DBCampaign.id == campaign_id).first()
+    if not db_campaign:
+        raise CampaignNotFoundError("Campaign not found")
+    save_leads(db, campaign_id, leads[start:], start_position=start)
+    db_campaign.leads_found = len(leads)
+    if complete:
+        db_campaign.status = CampaignStatusEnum.RESEARCH_COMPLETE
+    db.commit()
+
+
+def remember_generated_messages(campaign_id: str, messages: List[Dict[str, Any]]):
+    """Add saved messages to the campaign's working state"""
+    get_campaign_state_store().update(campaign_id, messages=messages, status="generation_complete")
+
+
+def lead_response(lead: Dict[str, Any]) -> LeadResponse:
+    """Convert a lead to response format"""
+    return LeadResponse(
+        id=lead.get("id", str(uuid.uuid4())),
+        name=lead.get("name", "Unknown"),
+        industry=lead.get("industry", "Unknown"),
+        location=lead.get("location", "Unknown"),
+        description=lead.get("description", ""),
+        relevance_reason=lead.get("relevance_reason"),
+        recent_news=lead.get("recent_news")
+    )
+
+
+def load_generation_inputs(db: Session, request: GenerateRequest) -> Tuple[List[Dict[str, Any]], str]:
+    """
+    Mark the campaign as generating and load what content generation needs
+    
+    Everything is read before the status update, so the session holds no
+    open transaction (or writer connection) once this returns.
+    
+    Returns:
+        (selected_leads, company_name)
+    """
+    # Get campaign from database first
+    db_campaign = db.query(DBCampaign).filter(DBCampaign.id == request.campaign_id).first()
+    if not db_campaign:
+        raise CampaignNotFoundError("Campaign not found")
+    
+    # Load only the selected leads (one indexed query, no full-campaign parse)
+    selected_leads = load_leads(db, request.campaign_id, request.selected_lead_ids)
+    if not selected_leads:
+        raise CampaignNotFoundError("Campaign leads not found. Please restart research.")
+    
+    # Get company name from profile
+    company_profile = db.query(DBUserProfile).filter(DBUserProfile.id == "default").first()
+    if company_profile and company_profile.company_name:
+        company_name = company_profile.company_name
+    else:
+        company_name = "Marketmind AI Hub"  # Default fallback
+    
+    # Update status to GENERATION_IN_PROGRESS and leads_selected immediately
+    db_campaign.status = CampaignStatusEnum.GENERATION_IN_PROGRESS
+    db_campaign.leads_selected = len(request.selected_lead_ids)  # Update immediately when user selects
+    db.commit()
+    
+    return selected_leads, company_name
+
+
+def save_generated_messages(db: Session, campaign_id: str, messages: List[Dict[str, Any]],
+                             failures: List[Dict[str, Any]] = None) -> GenerateResponse:
+    """
+    Persist generated messages, mark generation complete and build the response
+    
+    Callers then add the messages to the campaign state with
+    remember_generated_messages. Leads that failed are reported in failed_leads; if every lead failed the
+    generation as a whole fails.
+    
+    Args:
+        failures: Per-lead failures returned by the orchestrator's generate_content
+    
+    Returns:
+        Messages sorted by quality score with the average score
+    """
+    failures = failures or []
+    if failures and not messages:
+        raise RuntimeError(f"all {len(failures)} leads failed; first error: {failures[0]['error']}")
+    
+    db_campaign = db.query(DBCampaign).filter(DBCampaign.id == campaign_id).first()
+    
+    # Update campaign status to GENERATION_COMPLETE
+    if db_campaign:
+        db_campaign.status = CampaignStatusEnum.GENERATION_COMPLETE
+    
+    # Save messages to database immediately (before approval): one upsert that
+    # updates the existing message for a lead (keeping its id and created_at)
+    # or inserts a new one
+    stored_ids = upsert_messages(db, campaign_id, messages)
+    for msg in messages:
+        msg["id"] = stored_ids.get(msg.get("lead_id"), msg["id"])
+    
+    # Note: We do NOT delete messages for companies not in this generation batch
+    # This allows users to regenerate only some messages while keeping others unchanged
+    
+    db.commit()
+    
+    # Convert to response format and sort by quality_score descending
+    message_responses = [
+        MessageResponse(
+            id=msg["id"],
+            lead_id=msg.get("lead_id"),
+            company_name=msg["company_name"],
+            industry=msg["industry"],
+            location=msg["location"],
+            content=msg["content"],
+            quality_score=msg["quality_score"]
+        )
+        for msg in messages
+    ]
+    
+    # Sort by quality_score descending (highest first)
+    message_responses.sort(key=lambda x: x.quality_score, reverse=True)
+    
+    # Calculate average quality score
+    avg_score = sum(msg["quality_score"] for msg in messages) / len(messages) if messages else 0
+    
+    return GenerateResponse(
+        campaign_id=campaign_id,
+        messages=message_responses,
+        average_quality_score=round(avg_score, 2),
+        failed_leads=[FailedLeadResponse(**failure) for failure in failures]
+    )
@@ -0,0 +1,317 @@
+"""
+Working state of in-progress campaigns
+
+Research results (and later generated messages) are kept between the
+research, generation and save steps. Two tiers:
+- In-process LRU with a TTL, bounded by entry count and serialized bytes
+- Shared `campaign_state` table, so every API worker and job worker sees
+  the same state
+
+Each shared row carries a version that is bumped on every write; a local
+copy is only used while its version matches, so a worker never serves
+state another worker has replaced. On a miss in both tiers the state is
+rebuilt from the campaign's persisted leads (read-through).
+"""
+from typing import Any, Callable, Dict, Optional
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import json
+import threading
+import time
+
+from sqlalchemy.orm import Session, undefer
+
+from agents.settings import env_int, env_float, env_bool
+from database import SessionLocal, upsert_insert
+from db_models import Campaign as DBCampaign, CampaignState, CampaignStatusEnum, Message as DBMessage
+from lead_store import load_leads
+
+
+def campaign_state_from_record(db_campaign: DBCampaign, db: Session) -> Optional[Dict[str, Any]]:
+    """
+    Build a campaign's working state from its database record
+
+    Returns:
+        The state, or None if the campaign has no persisted leads
+    """
+    if not db_campaign:
+        return None
+    leads = load_leads(db, db_campaign.id)
+    if not leads:
+        return None
+
+    messages = []
+    if db_campaign.status == CampaignStatusEnum.GENERATION_COMPLETE:
+        db_messages = db.query(DBMessage).options(undefer(DBMessage.content)).filter(
+            DBMessage.campaign_id == db_campaign.id
+        ).order_by(DBMessage.quality_score.desc()).all()
+        messages = [
+            {
+                "id": msg.id,
+                "lead_id": msg.lead_id,
+                "company_name": msg.company_name,
+                "industry": msg.industry,
+                "location": msg.location,
+                "content": msg.content,
+                "quality_score": msg.quality_score
+            }
+            for msg in db_messages
+        ]
+
+    return {
+        "campaign_id": db_campaign.id,
+        "product_service": db_campaign.product_service,
+        "area": db_campaign.area,
+        "context": db_campaign.context,
+        "max_leads": db_campaign.max_leads,
+        "angle": getattr(db_campaign, 'angle', None),  # Backward compatibility
+        "leads": leads,
+        "messages": messages,
+        "status": db_campaign.status.value
+    }
+
+
+class _Entry:
+    __slots__ = ("state", "size", "version", "expires_at")
+
+    def __init__(self, state: Dict[str, Any], size: int, version: Optional[int], expires_at: float):
+        self.state = state
+        self.size = size
+        self.version = version
+        self.expires_at = expires_at
+
+
+class CampaignStateStore:
+    """Two-tier (memory LRU + shared table) store for in-progress campaign state"""
+
+    # Purge expired shared rows once every N writes instead of on every write
+    PURGE_INTERVAL = 100
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = None,
+        loader: Callable[[str], Optional[Dict[str, Any]]] = None,
+        memory_entries: int = None,
+        memory_bytes: int = None,
+        ttl_seconds: float = None,
+        shared: bool = None
+    ):
+        """
+        Configure the store (values default to CAMPAIGN_STATE_* env vars)
+
+        Args:
+            session_factory: Creates database sessions for the shared tier (default: database.SessionLocal)
+            loader: Rebuilds a campaign's state on a miss in both tiers (default: from the leads table)
+            memory_entries: Maximum campaigns kept in process memory
+            memory_bytes: Maximum serialized bytes kept in process memory
+            ttl_seconds: How long untouched state is kept
+            shared: Use the shared table tier (off: process memory only)
+        """
+        self.session_factory = session_factory or SessionLocal
+        self.loader = loader or self._load_from_campaign
+        self.memory_entries = memory_entries if memory_entries is not None else env_int("CAMPAIGN_STATE_MEMORY_ENTRIES", 256)
+        self.memory_bytes = memory_bytes if memory_bytes is not None else env_int("CAMPAIGN_STATE_MEMORY_BYTES", 64 * 1024 * 1024)
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else env_float("CAMPAIGN_STATE_TTL", 24 * 3600)
+        self.shared = shared if shared is not None else env_bool("CAMPAIGN_STATE_SHARED", True)
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._memory_size = 0
+        self._writes_since_purge = 0
+        self._stats = {
+            "memory_hits": 0,
+            "shared_hits": 0,
+            "loads": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0
+        }
+
+    def get(self, campaign_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a campaign's state (memory, then shared tier, then rebuilt from the database)
+
+        The returned dict is shared with the cache: change it through
+        set()/update(), not in place.
+
+        Returns:
+            The state, or None if the campaign has no state or persisted leads
+        """
+        with self._lock:
+            entry = self._memory.get(campaign_id)
+            if entry and entry.expires_at <= time.monotonic():
+                self._drop(campaign_id)
+                entry = None
+
+        if self.shared:
+            try:
+                version = self._shared_version(campaign_id)
+            except Exception as e:
+                # Shared tier unavailable: fall back to this process's copy
+                print(f"[CAMPAIGN_STATE] Shared lookup failed: {e}")
+                version = entry.version if entry else None
+            if entry and version is not None and entry.version == version:
+                return self._memory_hit(campaign_id, entry)
+            state = self._shared_get(campaign_id) if version is not None else None
+            if state is not None:
+                self._stats["shared_hits"] += 1
+                return state
+        elif entry:
+            return self._memory_hit(campaign_id, entry)
+
+        state = self.loader(campaign_id)
+        if state is None:
+            self._stats["misses"] += 1
+            return None
+        self._stats["loads"] += 1
+        self.set(campaign_id, state)
+        return state
+
+    def set(self, campaign_id: str, state: Dict[str, Any]):
+        """Store a campaign's state in both tiers"""
+        data = json.dumps(state)
+        version = self._shared_set(campaign_id, data) if self.shared else None
+        self._stats["writes"] += 1
+        self._remember(campaign_id, state, len(data), version)
+
+    def update(self, campaign_id: str, **fields) -> Optional[Dict[str, Any]]:
+        """
+        Change some fields of a campaign's state
+
+        Returns:
+            The new state, or None if the campaign has no state
+        """
+        state = self.get(campaign_id)
+        if state is None:
+            return None
+        state = {**state, **fields}
+        self.set(campaign_id, state)
+        return state
+
+    def delete(self, campaign_id: str):
+        """Forget a campaign's state (e.g. once it is saved)"""
+        with self._lock:
+            self._drop(campaign_id)
+        if self.shared:
+            try:
+                with self.session_factory() as db:
+                    db.query(CampaignState).filter(CampaignState.campaign_id == campaign_id).delete(synchronize_session=False)
+                    db.commit()
+            except Exception as e:
+                print(f"[CAMPAIGN_STATE] Shared delete failed: {e}")
+
+    def clear(self):
+        """Drop the in-process tier (the shared tier is left alone)"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["memory_bytes"] = self._memory_size
+        stats["shared"] = self.shared
+        return stats
+
+    def _memory_hit(self, campaign_id: str, entry: _Entry) -> Dict[str, Any]:
+        with self._lock:
+            if campaign_id in self._memory:
+                self._memory.move_to_end(campaign_id)
+        self._stats["memory_hits"] += 1
+        return entry.state
+
+    def _remember(self, campaign_id: str, state: Dict[str, Any], size: int, version: Optional[int]):
+        """Put state in the memory tier, evicting least recently used entries over budget"""
+        with self._lock:
+            self._drop(campaign_id)
+            if size > self.memory_bytes or self.memory_entries <= 0:
+                return  # Too large to keep locally; served from the shared tier
+            self._memory[campaign_id] = _Entry(state, size, version, time.monotonic() + self.ttl_seconds)
+            self._memory_size += size
+            while len(self._memory) > self.memory_entries or self._memory_size > self.memory_bytes:
+                oldest = next(iter(self._memory))
+                self._drop(oldest)
+                self._stats["evictions"] += 1
+
+    def _drop(self, campaign_id: str):
+        """Remove an entry from the memory tier (caller holds the lock)"""
+        entry = self._memory.pop(campaign_id, None)
+        if entry:
+            self._memory_size -= entry.size
+
+    def _shared_version(self, campaign_id: str) -> Optional[int]:
+        """Version of the shared row, or None if there is no live row"""
+        with self.session_factory() as db:
+            return db.query(CampaignState.version).filter(
+                CampaignState.campaign_id == campaign_id,
+                CampaignState.expires_at > datetime.utcnow()
+            ).scalar()
+
+    def _shared_get(self, campaign_id: str) -> Optional[Dict[str, Any]]:
+        """Load state from the shared tier into memory"""
+        try:
+            with self.session_factory() as db:
+                row = db.query(CampaignState).filter(CampaignState.campaign_id == campaign_id).first()
+                if row is None:
+                    return None
+                data, version = row.data, row.version
+        except Exception as e:
+            print(f"[CAMPAIGN_STATE] Shared read failed: {e}")
+            return None
+        state = json.loads(data)
+        self._remember(campaign_id, state, len(data), version)
+        return state
+
+    def _shared_set(self, campaign_id: str, data: str) -> Optional[int]:
+        """Write state to the shared tier and return its new version"""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl_seconds)
+        try:
+            with self.session_factory() as db:
+                # The bump happens in the database, so concurrent writers always get distinct versions
+                statement = upsert_insert(db, CampaignState).values(
+                    campaign_id=campaign_id, data=data, version=1, updated_at=now, expires_at=expires_at
+                )
+                statement = statement.on_conflict_do_update(
+                    index_elements=[CampaignState.campaign_id],
+                    set_={
+                        "data": statement.excluded.data,
+                        "version": CampaignState.version + 1,
+                        "updated_at": statement.excluded.updated_at,
+                        "expires_at": statement.excluded.expires_at
+                    }
+                ).returning(CampaignState.version)
+                version = db.execute(statement).scalar_one()
+                db.commit()
+
+                self._writes_since_purge += 1
+                if self._writes_since_purge >= self.PURGE_INTERVAL:
+                    self._writes_since_purge = 0
+                    db.query(CampaignState).filter(CampaignState.expires_at <= now).delete(synchronize_session=False)
+                    db.commit()
+                return version
+        except Exception as e:
+            print(f"[CAMPAIGN_STATE] Shared write failed: {e}")
+            return None
+
+    def _load_from_campaign(self, campaign_id: str) -> Optional[Dict[str, Any]]:
+        """Default loader: rebuild state from the campaign's persisted leads"""
+        try:
+            with self.session_factory() as db:
+                db_campaign = db.query(DBCampaign).filter(DBCampaign.id == campaign_id).first()
+                return campaign_state_from_record(db_campaign, db)
+        except Exception as e:
+            print(f"[CAMPAIGN_STATE] Loading campaign {campaign_id} failed: {e}")
+            return None
+
+
+_store: Optional[CampaignStateStore] = None
+
+
+def get_campaign_state_store() -> CampaignStateStore:
+    """Get the process-wide campaign state store"""
+    global _store
+    if _store is None:
+        _store = CampaignStateStore()
+    return _store
@@ -1,22 +1,109 @@
 """
 Database configuration and session management
+
+Two ways to reach the database:
+- Async sessions for the request path: every API endpoint writes through
+  the dedicated writer engine (`get_async_db`, one pooled connection with
+  SQLite) and reads through a separate pool of read-only connections
+  (`get_read_db`), so with SQLite in WAL mode a dashboard or history read
+  never waits for a generation commit. Helpers written against the
+  synchronous Session API (campaign_service, lead_store, message_store)
+  run on these sessions via `AsyncSession.run_sync`.
+- Synchronous `SessionLocal` / `get_db`, used outside the request path:
+  job worker processes, the job queue and campaign state store (called
+  from worker threads) and startup migrations. Their writes reach SQLite
+  through another connection and wait for the write lock (busy_timeout)
+  rather than queueing behind the async writer.
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 
 # SQLite database URL for local development
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./smartreach.db")
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+
+def _async_database_url(url: str) -> str:
+    """Async driver URL for DATABASE_URL (override with ASYNC_DATABASE_URL)"""
+    if os.getenv("ASYNC_DATABASE_URL"):
+        return os.getenv("ASYNC_DATABASE_URL")
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgresql:"):
+        return url.replace("postgresql:", "postgresql+asyncpg:", 1)
+    return url
+
+
+ASYNC_DATABASE_URL = _async_database_url(DATABASE_URL)
 
 # Create engine
 engine = create_engine(
     DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
+    connect_args={"check_same_thread": False} if IS_SQLITE else {}
 )
 
-# Create session factory
+
+def _sqlite_pragmas(read_only: bool = False):
+    """
+    Connection hook applying the SQLite tuning below
+
+    - WAL: readers run alongside the single writer, also across processes
+      (API and `python -m worker`)
+    - synchronous=NORMAL: safe with WAL and far fewer fsyncs than FULL
+    - busy_timeout: wait for the write lock instead of failing with
+      "database is locked"
+    - larger page cache, in-memory temp tables and memory-mapped reads
+    """
+    synchronous = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL").upper()
+    busy_timeout = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    cache_size_kb = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+    mmap_size = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+    def configure(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={synchronous}")
+        cursor.execute(f"PRAGMA busy_timeout={busy_timeout}")
+        cursor.execute(f"PRAGMA cache_size=-{cache_size_kb}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute(f"PRAGMA mmap_size={mmap_size}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+    return configure
+
+
+if IS_SQLITE:
+    event.listen(engine, "connect", _sqlite_pragmas())
+
+    # SQLite allows one writer at a time: a single pooled writer connection makes
+    # concurrent requests queue (without blocking the event loop) instead of
+    # contending for the file lock, while reads use their own connections
+    async_write_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=float(os.getenv("DB_WRITE_POOL_TIMEOUT", "30"))
+    )
+    async_read_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        pool_size=int(os.getenv("DB_READ_POOL_SIZE", "5")),
+        max_overflow=int(os.getenv("DB_READ_MAX_OVERFLOW", "10"))
+    )
+    event.listen(async_write_engine.sync_engine, "connect", _sqlite_pragmas())
+    event.listen(async_read_engine.sync_engine, "connect", _sqlite_pragmas(read_only=True))
+else:
+    async_write_engine = create_async_engine(ASYNC_DATABASE_URL)
+    async_read_engine = async_write_engine
+
+# Create session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_write_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
 # Base class for models
 Base = declarative_base()
@@ -34,6 +121,43 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """
+    Dependency function to get an async database session for reads and writes
+    Use with FastAPI Depends()
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_read_db():
+    """
+    Dependency function to get an async read-only database session
+    Use with FastAPI Depends() in endpoints that only read
+    """
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+
+def upsert_insert(db, model):
+    """
+    INSERT statement for the session's database that supports
+    on_conflict_do_update (SQLite and PostgreSQL)
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
+
+
+async def close_async_engines():
+    """Close pooled async database connections (application shutdown)"""
+    await async_write_engine.dispose()
+    if async_read_engine is not async_write_engine:
+        await async_read_engine.dispose()
+
+
 def init_db():
     """
     Initialize database - create all tables
@@ -60,4 +184,76 @@ def init_db():
     except Exception as e:
         # If migration fails, continue anyway (column might already exist or table doesn't exist yet)
         print(f"[DATABASE] Migration note: {e}")
+    
+    # Campaign listing indexes, and triggers that keep campaign_rollups in step with campaigns (SQLite)
+    try:
+        if IS_SQLITE:
+            from sqlalchemy import text
+            from rollups import install_campaign_rollups
+            with engine.begin() as conn:
+                # create_all does not add indexes to existing tables
+                conn.execute(text("CREATE INDEX IF NOT EXISTS ix_campaigns_created_at_id ON campaigns (created_at, id)"))
+                conn.execute(text(
+                    "CREATE INDEX IF NOT EXISTS ix_campaigns_status_created_at_id ON campaigns (status, created_at, id)"
+                ))
+                if install_campaign_rollups(conn):
+                    print("[DATABASE] Installed campaign rollup triggers and rebuilt dashboard counters")
+    except Exception as e:
+        print(f"[DATABASE] Rollups migration note: {e}")
+    
+    # Full-text search: FTS5 index over messages, kept in sync by triggers (SQLite)
+    try:
+        if IS_SQLITE:
+            from search_index import install_search_index
+            with engine.begin() as conn:
+                if install_search_index(conn):
+                    print("[DATABASE] Built the message_search full-text index")
+    except Exception as e:
+        print(f"[DATABASE] Search index migration note: {e}")
+    
+    # Migration: move legacy leads_data JSON blobs into the leads table
+    try:
+        from lead_store import migrate_leads_data
+        with SessionLocal() as db:
+            migrated = migrate_leads_data(db)
+        if migrated:
+            print(f"[DATABASE] Moved leads of {migrated} campaigns from leads_data into the leads table")
+    except Exception as e:
+        print(f"[DATABASE] Leads migration note: {e}")
+    
+    # Migration: messages remember the lead they were written for, so generated messages can be
+    # bulk upserted per lead (runs after the leads migration, which the backfill reads)
+    try:
+        from sqlalchemy import text
+        with engine.begin() as conn:
+            if "sqlite" in DATABASE_URL:
+                has_lead_id = conn.execute(text(
+                    "SELECT COUNT(*) FROM pragma_table_info('messages') WHERE name='lead_id'"
+                )).scalar()
+                if not has_lead_id:
+                    conn.execute(text("ALTER TABLE messages ADD COLUMN lead_id TEXT"))
+                    # Backfill only unambiguous matches: the campaign's only lead with that
+                    # name, and its only message for it. Other rows keep a NULL lead id;
+                    # nothing is deleted.
+                    backfilled = conn.execute(text("""
+                        UPDATE messages SET lead_id = (
+                            SELECT leads.id FROM leads
+                            WHERE leads.campaign_id = messages.campaign_id AND leads.name = messages.company_name
+                        )
+                        WHERE (
+                            SELECT COUNT(*) FROM leads
+                            WHERE leads.campaign_id = messages.campaign_id AND leads.name = messages.company_name
+                        ) = 1 AND (
+                            SELECT COUNT(*) FROM messages AS other
+                            WHERE other.campaign_id = messages.campaign_id AND other.company_name = messages.company_name
+                        ) = 1
+                    """)).rowcount
+                    print(f"[DATABASE] Added lead_id to messages ({backfilled} matched to their lead)")
+                # The per-company index merged different leads with the same company name
+                conn.execute(text("DROP INDEX IF EXISTS uq_messages_campaign_company"))
+                conn.execute(text(
+                    "CREATE UNIQUE INDEX IF NOT EXISTS uq_messages_campaign_lead ON messages (campaign_id, lead_id)"
+                ))
+    except Exception as e:
+        print(f"[DATABASE] Messages lead_id migration note: {e}")
 
@@ -1,12 +1,13 @@
 """
 SQLAlchemy database models
 """
-from sqlalchemy import Column, String, Integer, Text, DateTime, ForeignKey, Enum as SQLEnum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Integer, Text, Boolean, DateTime, ForeignKey, Index, Enum as SQLEnum
+from sqlalchemy.orm import deferred, relationship
 from datetime import datetime
 import enum
 
 from database import Base
+from storage_compression import CompressedText
 
 
 class CampaignStatusEnum(str, enum.Enum):
@@ -31,36 +32,86 @@ class Campaign(Base):
     status = Column(SQLEnum(CampaignStatusEnum), nullable=False, default=CampaignStatusEnum.RESEARCH_IN_PROGRESS)
     leads_found = Column(Integer, default=0)
     leads_selected = Column(Integer, default=0)
-    leads_data = Column(Text, nullable=True)  # JSON string storing leads for in-progress campaigns
+    leads_data = Column(Text, nullable=True)  # Legacy JSON leads blob; migrated into the leads table by init_db
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
     # Relationships
     messages = relationship("Message", back_populates="campaign", cascade="all, delete-orphan")
+    leads = relationship("Lead", back_populates="campaign", cascade="all, delete-orphan", order_by="Lead.position")
+    
+    __table_args__ = (
+        # Newest-first listings (dashboard recent activity, history)
+        Index("ix_campaigns_created_at_id", "created_at", "id"),
+        # History filtered by status, paginated on (created_at, id)
+        Index("ix_campaigns_status_created_at_id", "status", "created_at", "id"),
+    )
     
     def __repr__(self):
         return f"<Campaign(id={self.id}, product_service={self.product_service}, status={self.status})>"
 
 
+class CampaignRollup(Base):
+    """Materialized campaign counters for the dashboard, kept up to date by triggers on campaigns"""
+    __tablename__ = "campaign_rollups"
+    
+    period = Column(String, primary_key=True)  # "all" (totals) or "day"
+    bucket = Column(String, primary_key=True)  # "all", or the day as YYYY-MM-DD
+    campaigns = Column(Integer, nullable=False, default=0)
+    leads_found = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<CampaignRollup(period={self.period}, bucket={self.bucket}, campaigns={self.campaigns})>"
+
+
 class Message(Base):
     """Message database model"""
     __tablename__ = "messages"
     
     id = Column(String, primary_key=True, index=True)
     campaign_id = Column(String, ForeignKey("campaigns.id"), nullable=False)
+    lead_id = Column(String, nullable=True)  # Lead the message was written for (None on older rows)
     company_name = Column(String, nullable=False)
     industry = Column(String, nullable=False)
     location = Column(String, nullable=False)
-    content = Column(Text, nullable=False)
+    content = deferred(Column(CompressedText, nullable=False))  # Loaded only when accessed or undeferred
     quality_score = Column(Integer, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
     # Relationships
     campaign = relationship("Campaign", back_populates="messages")
     
+    __table_args__ = (
+        # One message per lead in a campaign; target of the bulk upsert. Rows
+        # without a lead id never conflict (NULLs are distinct)
+        Index("uq_messages_campaign_lead", "campaign_id", "lead_id", unique=True),
+    )
+    
     def __repr__(self):
         return f"<Message(id={self.id}, company_name={self.company_name}, quality_score={self.quality_score})>"
 
 
+class Lead(Base):
+    """Researched lead of an in-progress campaign"""
+    __tablename__ = "leads"
+    
+    campaign_id = Column(String, ForeignKey("campaigns.id"), primary_key=True)
+    id = Column(String, primary_key=True)  # Lead id, unique within the campaign
+    position = Column(Integer, nullable=False, default=0)  # Order in which research found the lead
+    name = Column(String, nullable=False, index=True)
+    industry = Column(String, nullable=True, index=True)
+    location = Column(String, nullable=True, index=True)
+    verified = Column(Boolean, nullable=True, index=True)  # None when verification was not run
+    data = deferred(Column(CompressedText, nullable=False))  # Full lead as JSON (description, website, news, ...)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    # Relationships
+    campaign = relationship("Campaign", back_populates="leads")
+    
+    def __repr__(self):
+        return f"<Lead(id={self.id}, campaign_id={self.campaign_id}, name={self.name})>"
+
+
 class UserProfile(Base):
     """Company profile model for storing company info and services"""
     __tablename__ = "user_profiles"
@@ -74,3 +125,73 @@ class UserProfile(Base):
     def __repr__(self):
         return f"<UserProfile(id={self.id}, company_name={self.company_name})>"
 
+
+
+class CampaignState(Base):
+    """Shared working state of an in-progress campaign (leads, messages), visible to every API worker"""
+    __tablename__ = "campaign_state"
+    
+    campaign_id = Column(String, primary_key=True)
+    data = Column(Text, nullable=False)  # JSON state
+    version = Column(Integer, nullable=False, default=1)  # Bumped on every write so local copies can be validated
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f"<CampaignState(campaign_id={self.campaign_id}, version={self.version})>"
+
+
+class JobStatusEnum(str, enum.Enum):
+    """Background job status enumeration"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class Job(Base):
+    """Background job for a campaign stage (research or content generation)"""
+    __tablename__ = "jobs"
+    
+    id = Column(String, primary_key=True, index=True)
+    kind = Column(String, nullable=False)  # "research" or "generate"
+    campaign_id = Column(String, ForeignKey("campaigns.id"), nullable=False, index=True)
+    status = Column(SQLEnum(JobStatusEnum), nullable=False, default=JobStatusEnum.QUEUED)
+    payload = Column(Text, nullable=False)  # JSON request for the stage
+    checkpoint = Column(Text, nullable=True)  # JSON per-lead progress, used to resume after a crash
+    result = Column(Text, nullable=True)  # JSON response once succeeded
+    error = Column(Text, nullable=True)
+    progress_total = Column(Integer, default=0)
+    progress_completed = Column(Integer, default=0)
+    attempts = Column(Integer, default=0)
+    claimed_by = Column(String, nullable=True)  # Worker currently holding the lease
+    lease_expires_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        # Workers look for the oldest claimable job
+        Index("ix_jobs_status_created_at", "status", "created_at"),
+    )
+    
+    def __repr__(self):
+        return f"<Job(id={self.id}, kind={self.kind}, status={self.status})>"
+
+
+class JobWorker(Base):
+    """Heartbeat row for a running job worker pool (API process or `python -m worker` process)"""
+    __tablename__ = "job_workers"
+    
+    id = Column(String, primary_key=True)  # host:pid
+    host = Column(String, nullable=False)
+    pid = Column(Integer, nullable=False)
+    workers = Column(Integer, default=0)  # Concurrent jobs the pool runs
+    running = Column(Integer, default=0)  # Jobs currently running
+    started_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_seen_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f"<JobWorker(id={self.id}, running={self.running}/{self.workers})>"
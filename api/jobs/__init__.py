@@ -0,0 +1,19 @@
+"""
+Durable background jobs for campaign stages
+
+Research and content generation can run as jobs stored in the SQLite
+`jobs` table instead of inside the HTTP request. Workers claim jobs with a
+renewable lease, checkpoint after every lead and resume from the last
+checkpoint if a worker dies.
+"""
+from .queue import JobQueue, get_job_queue
+from .pool import JobWorkerPool, start_job_workers, stop_job_workers, job_worker_stats
+
+__all__ = [
+    "JobQueue",
+    "get_job_queue",
+    "JobWorkerPool",
+    "start_job_workers",
+    "stop_job_workers",
+    "job_worker_stats"
+]
@@ -0,0 +1,203 @@
+"""
+Job workers
+
+A JobWorkerPool runs N asyncio workers on the current event loop. Each
+worker claims a job, runs it while renewing its lease (heartbeat), and
+records the result. If the lease is lost (the job was cancelled or another
+worker took it over) the run is abandoned; on shutdown running jobs are
+released back to the queue. The pool itself also reports a heartbeat to
+the `job_workers` table so every process's pool is visible in /stats.
+"""
+from typing import Any, Dict, Optional
+import asyncio
+import os
+import socket
+
+from agents.settings import env_int, env_float
+from .queue import JobQueue, get_job_queue
+
+
+class JobLeaseLost(Exception):
+    """The worker no longer holds the job (cancelled or reclaimed after an expired lease)"""
+    pass
+
+
+class JobWorkerPool:
+    """Claims and runs jobs with a fixed number of concurrent workers"""
+
+    def __init__(self, workers: int = None, lease_seconds: float = None, poll_interval: float = None,
+                 queue: JobQueue = None, name: str = None):
+        """
+        Args:
+            workers: Concurrent jobs (default: JOB_WORKERS or 2)
+            lease_seconds: Lease length; renewed every third of it (default: JOB_LEASE_SECONDS or 60)
+            poll_interval: Seconds between claim attempts when the queue is empty (default: JOB_POLL_INTERVAL or 1)
+            queue: Job queue to consume (default: the application queue)
+            name: Worker name prefix (default: host:pid)
+        """
+        self.workers = env_int("JOB_WORKERS", 2) if workers is None else workers
+        self.lease_seconds = lease_seconds or env_float("JOB_LEASE_SECONDS", 60.0)
+        self.poll_interval = poll_interval or env_float("JOB_POLL_INTERVAL", 1.0)
+        self.queue = queue or get_job_queue()
+        self.host = socket.gethostname()
+        self.pid = os.getpid()
+        self.name = name or f"{self.host}:{self.pid}"
+
+        self._workers: Dict[str, asyncio.Task] = {}  # worker id -> worker task
+        self._reporter: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._running: Dict[str, str] = {}  # worker id -> job id
+        self._work: Dict[str, asyncio.Future] = {}  # worker id -> running job's runner
+        self._stats = {"claimed": 0, "succeeded": 0, "failed": 0, "retried": 0, "lost": 0, "released": 0}
+
+    async def start(self):
+        """Start the worker tasks on the running event loop"""
+        self._stopping = False
+        self._workers = {
+            worker_id: asyncio.ensure_future(self._worker(worker_id))
+            for worker_id in (f"{self.name}/{index}" for index in range(self.workers))
+        }
+        self._reporter = asyncio.ensure_future(self._report())
+        print(f"[JOBS] Started {self.workers} job workers ({self.name})")
+
+    async def stop(self):
+        """Stop the workers, releasing running jobs back to the queue"""
+        self._stopping = True
+        # A worker with a job only has its runner cancelled, so it still releases the job
+        # or finishes recording an outcome it is already writing
+        for worker_id, task in self._workers.items():
+            (self._work.get(worker_id) or task).cancel()
+        tasks = [*self._workers.values(), *([self._reporter] if self._reporter else [])]
+        if self._reporter:
+            self._reporter.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = {}
+        self._reporter = None
+        try:
+            await asyncio.to_thread(self.queue.remove_worker, self.name)
+        except Exception as e:
+            print(f"[JOBS] Failed to unregister worker pool {self.name}: {e}")
+
+    async def _report(self):
+        """Report this pool's heartbeat until it stops"""
+        while not self._stopping:
+            try:
+                await asyncio.to_thread(
+                    self.queue.heartbeat, self.name, self.host, self.pid, self.workers, len(self._running)
+                )
+            except Exception as e:
+                print(f"[JOBS] Worker pool heartbeat failed: {e}")
+            await asyncio.sleep(self.lease_seconds / 3)
+
+    async def _worker(self, worker_id: str):
+        while not self._stopping:
+            try:
+                job = await asyncio.to_thread(self.queue.claim, worker_id, self.lease_seconds)
+            except Exception as e:
+                print(f"[JOBS] {worker_id} failed to claim a job: {e}")
+                job = None
+
+            if job is None:
+                await asyncio.sleep(self.poll_interval)
+                continue
+
+            self._stats["claimed"] += 1
+            await self.run_job(job, worker_id)
+
+    async def run_job(self, job: Dict[str, Any], worker_id: str):
+        """Run one claimed job to completion, failure or loss of its lease"""
+        from .runner import JOB_RUNNERS
+
+        job_id = job["job_id"]
+        runner = JOB_RUNNERS.get(job["kind"])
+        if runner is None:
+            await asyncio.to_thread(self.queue.fail, job_id, worker_id, f"Unknown job kind: {job['kind']}")
+            self._stats["failed"] += 1
+            return
+
+        lease_lost = asyncio.Event()
+
+        async def checkpoint(state: Dict[str, Any], completed: int, total: Optional[int] = None):
+            if not await asyncio.to_thread(self.queue.checkpoint, job_id, worker_id, state, completed, total):
+                raise JobLeaseLost(f"lost lease on job {job_id}")
+
+        print(f"[JOBS] {worker_id} running {job['kind']} job {job_id} (attempt {job['attempts']})")
+        self._running[worker_id] = job_id
+        work = self._work[worker_id] = asyncio.ensure_future(runner(job, checkpoint))
+        heartbeat = asyncio.ensure_future(self._heartbeat(job_id, worker_id, work, lease_lost))
+        try:
+            result = await work
+        except JobLeaseLost:
+            self._stats["lost"] += 1
+            print(f"[JOBS] {worker_id} lost job {job_id}; abandoning it")
+        except asyncio.CancelledError:
+            if lease_lost.is_set() and not self._stopping:
+                self._stats["lost"] += 1
+                print(f"[JOBS] {worker_id} lost job {job_id}; abandoning it")
+                return
+            # Shutting down: hand the job back so it resumes from its checkpoint
+            if await asyncio.to_thread(self.queue.release, job_id, worker_id):
+                self._stats["released"] += 1
+            raise
+        except Exception as e:
+            status = await asyncio.to_thread(self.queue.fail, job_id, worker_id, str(e))
+            self._stats["retried" if status == "queued" else "failed"] += 1
+            print(f"[JOBS] {job['kind']} job {job_id} failed ({status}): {e}")
+        else:
+            if await asyncio.to_thread(self.queue.complete, job_id, worker_id, result):
+                self._stats["succeeded"] += 1
+                print(f"[JOBS] {job['kind']} job {job_id} succeeded")
+            else:
+                self._stats["lost"] += 1
+        finally:
+            heartbeat.cancel()
+            self._running.pop(worker_id, None)
+            self._work.pop(worker_id, None)
+
+    async def _heartbeat(self, job_id: str, worker_id: str, work: asyncio.Future, lease_lost: asyncio.Event):
+        """Renew the lease until the job finishes; stop the job if the lease is lost"""
+        while not work.done():
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                renewed = await asyncio.to_thread(self.queue.renew, job_id, worker_id, self.lease_seconds)
+            except Exception as e:
+                print(f"[JOBS] Heartbeat for job {job_id} failed: {e}")
+                continue
+            if not renewed and not work.done():
+                lease_lost.set()
+                work.cancel()
+                return
+
+    def stats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        stats["workers"] = self.workers
+        stats["running"] = dict(self._running)
+        return stats
+
+
+_pool: Optional[JobWorkerPool] = None
+
+
+async def start_job_workers(workers: int = None) -> Optional[JobWorkerPool]:
+    """Start the process-wide job worker pool (no-op when JOB_WORKERS is 0)"""
+    global _pool
+    pool = JobWorkerPool(workers=workers)
+    if pool.workers <= 0:
+        print("[JOBS] In-process job workers disabled (JOB_WORKERS=0)")
+        return None
+    await pool.start()
+    _pool = pool
+    return pool
+
+
+async def stop_job_workers():
+    """Stop the process-wide job worker pool"""
+    global _pool
+    if _pool is not None:
+        await _pool.stop()
+        _pool = None
+
+
+def job_worker_stats() -> Dict[str, Any]:
+    """Statistics for this process's job workers"""
+    return _pool.stats() if _pool is not None else {"workers": 0}
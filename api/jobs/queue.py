@@ -0,0 +1,294 @@
+"""
+SQLite-backed job queue
+
+Jobs move queued -> running -> succeeded / failed / cancelled. A running
+job is held by one worker through a lease that the worker renews while it
+works; a job whose lease has expired (its worker crashed or hung) can be
+claimed again and resumes from its checkpoint.
+"""
+from typing import Any, Callable, Dict, List, Optional
+from datetime import datetime, timedelta
+import json
+import uuid
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from agents.settings import env_int, env_float
+from database import SessionLocal
+from db_models import Job, JobStatusEnum, JobWorker
+
+TERMINAL_STATUSES = (JobStatusEnum.SUCCEEDED, JobStatusEnum.FAILED, JobStatusEnum.CANCELLED)
+
+
+def _loads(value: Optional[str]) -> Any:
+    return json.loads(value) if value else None
+
+
+def job_to_dict(job: Job) -> Dict[str, Any]:
+    """Public view of a job (no payload or checkpoint internals)"""
+    return {
+        "job_id": job.id,
+        "kind": job.kind,
+        "campaign_id": job.campaign_id,
+        "status": job.status.value,
+        "progress": {"total": job.progress_total or 0, "completed": job.progress_completed or 0},
+        "attempts": job.attempts or 0,
+        "error": job.error,
+        "result": _loads(job.result),
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "updated_at": job.updated_at.isoformat() if job.updated_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None
+    }
+
+
+class JobQueue:
+    """Enqueue, claim and update background jobs"""
+
+    def __init__(self, session_factory: Callable[[], Session] = None, max_attempts: int = None):
+        """
+        Args:
+            session_factory: Creates database sessions (default: database.SessionLocal)
+            max_attempts: Claims allowed per job before it is failed (default: JOB_MAX_ATTEMPTS or 3)
+        """
+        self.session_factory = session_factory or SessionLocal
+        self.max_attempts = max(1, max_attempts or env_int("JOB_MAX_ATTEMPTS", 3))
+
+    def enqueue(self, kind: str, campaign_id: str, payload: Dict[str, Any], total: int = 0) -> Dict[str, Any]:
+        """
+        Add a job to the queue
+
+        Args:
+            kind: Job type ("research" or "generate")
+            campaign_id: Campaign the job works on
+            payload: JSON-serialisable request for the job
+            total: Expected number of leads, for progress reporting
+
+        Returns:
+            The queued job
+        """
+        now = datetime.utcnow()
+        job = Job(
+            id=str(uuid.uuid4()),
+            kind=kind,
+            campaign_id=campaign_id,
+            status=JobStatusEnum.QUEUED,
+            payload=json.dumps(payload),
+            progress_total=total,
+            progress_completed=0,
+            attempts=0,
+            created_at=now,
+            updated_at=now
+        )
+        with self.session_factory() as db:
+            db.add(job)
+            db.commit()
+            db.refresh(job)
+            return job_to_dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job's public state"""
+        with self.session_factory() as db:
+            job = db.query(Job).filter(Job.id == job_id).first()
+            return job_to_dict(job) if job else None
+
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        """
+        Claim the oldest queued job, or a running job whose lease expired
+
+        Returns:
+            The claimed job with its "payload" and "checkpoint", or None if nothing is claimable
+        """
+        now = datetime.utcnow()
+        claimable = or_(
+            Job.status == JobStatusEnum.QUEUED,
+            and_(Job.status == JobStatusEnum.RUNNING, Job.lease_expires_at < now)
+        )
+
+        with self.session_factory() as db:
+            candidates = db.query(Job.id, Job.attempts).filter(claimable).order_by(Job.created_at).limit(5).all()
+            for job_id, attempts in candidates:
+                if (attempts or 0) >= self.max_attempts:
+                    # Crashed its workers too many times; stop retrying it
+                    db.query(Job).filter(Job.id == job_id, claimable).update({
+                        Job.status: JobStatusEnum.FAILED,
+                        Job.error: f"Gave up after {attempts} attempts",
+                        Job.claimed_by: None,
+                        Job.finished_at: now,
+                        Job.updated_at: now
+                    }, synchronize_session=False)
+                    db.commit()
+                    continue
+
+                # Conditional update: only one worker can win the claim
+                claimed = db.query(Job).filter(Job.id == job_id, claimable).update({
+                    Job.status: JobStatusEnum.RUNNING,
+                    Job.claimed_by: worker_id,
+                    Job.lease_expires_at: now + timedelta(seconds=lease_seconds),
+                    Job.attempts: Job.attempts + 1,
+                    Job.started_at: func.coalesce(Job.started_at, now),
+                    Job.updated_at: now
+                }, synchronize_session=False)
+                db.commit()
+                if claimed:
+                    job = db.query(Job).filter(Job.id == job_id).first()
+                    claimed_job = job_to_dict(job)
+                    claimed_job["payload"] = _loads(job.payload)
+                    claimed_job["checkpoint"] = _loads(job.checkpoint)
+                    return claimed_job
+        return None
+
+    def _update_owned(self, job_id: str, worker_id: str, values: Dict[Any, Any]) -> bool:
+        """Update a job only while this worker still holds it; False if the lease was lost or the job cancelled"""
+        values[Job.updated_at] = datetime.utcnow()
+        with self.session_factory() as db:
+            updated = db.query(Job).filter(
+                Job.id == job_id,
+                Job.claimed_by == worker_id,
+                Job.status == JobStatusEnum.RUNNING
+            ).update(values, synchronize_session=False)
+            db.commit()
+            return bool(updated)
+
+    def renew(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        """Extend the worker's lease (heartbeat)"""
+        return self._update_owned(job_id, worker_id, {
+            Job.lease_expires_at: datetime.utcnow() + timedelta(seconds=lease_seconds)
+        })
+
+    def checkpoint(self, job_id: str, worker_id: str, checkpoint: Dict[str, Any], completed: int, total: int = None) -> bool:
+        """Record per-lead progress so a new worker can resume from here"""
+        values = {
+            Job.checkpoint: json.dumps(checkpoint),
+            Job.progress_completed: completed
+        }
+        if total is not None:
+            values[Job.progress_total] = total
+        return self._update_owned(job_id, worker_id, values)
+
+    def complete(self, job_id: str, worker_id: str, result: Dict[str, Any]) -> bool:
+        """Mark the job succeeded with its result"""
+        now = datetime.utcnow()
+        return self._update_owned(job_id, worker_id, {
+            Job.status: JobStatusEnum.SUCCEEDED,
+            Job.result: json.dumps(result),
+            Job.error: None,
+            Job.claimed_by: None,
+            Job.lease_expires_at: None,
+            Job.finished_at: now
+        })
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> Optional[str]:
+        """
+        Record a failed attempt: the job is queued again (keeping its checkpoint)
+        until it runs out of attempts, then marked failed
+
+        Returns:
+            The job's new status, or None if the worker no longer held it
+        """
+        with self.session_factory() as db:
+            job = db.query(Job).filter(Job.id == job_id).first()
+            retry = job is not None and (job.attempts or 0) < self.max_attempts
+        status = JobStatusEnum.QUEUED if retry else JobStatusEnum.FAILED
+        values = {
+            Job.status: status,
+            Job.error: error,
+            Job.claimed_by: None,
+            Job.lease_expires_at: None
+        }
+        if not retry:
+            values[Job.finished_at] = datetime.utcnow()
+        return status.value if self._update_owned(job_id, worker_id, values) else None
+
+    def release(self, job_id: str, worker_id: str) -> bool:
+        """Give a running job back to the queue without counting the attempt (worker shutting down)"""
+        return self._update_owned(job_id, worker_id, {
+            Job.status: JobStatusEnum.QUEUED,
+            Job.attempts: Job.attempts - 1,
+            Job.claimed_by: None,
+            Job.lease_expires_at: None
+        })
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Cancel a queued or running job (a running worker stops at its next heartbeat)
+
+        Returns:
+            The job's state, or None if it does not exist
+        """
+        now = datetime.utcnow()
+        with self.session_factory() as db:
+            db.query(Job).filter(Job.id == job_id, Job.status.notin_(TERMINAL_STATUSES)).update({
+                Job.status: JobStatusEnum.CANCELLED,
+                Job.claimed_by: None,
+                Job.lease_expires_at: None,
+                Job.finished_at: now,
+                Job.updated_at: now
+            }, synchronize_session=False)
+            db.commit()
+            job = db.query(Job).filter(Job.id == job_id).first()
+            return job_to_dict(job) if job else None
+
+    def heartbeat(self, name: str, host: str, pid: int, workers: int, running: int):
+        """Record that a worker pool is alive and how busy it is"""
+        now = datetime.utcnow()
+        with self.session_factory() as db:
+            updated = db.query(JobWorker).filter(JobWorker.id == name).update({
+                JobWorker.workers: workers,
+                JobWorker.running: running,
+                JobWorker.last_seen_at: now
+            }, synchronize_session=False)
+            if not updated:
+                db.add(JobWorker(id=name, host=host, pid=pid, workers=workers, running=running,
+                                 started_at=now, last_seen_at=now))
+            db.commit()
+
+    def remove_worker(self, name: str):
+        """Forget a worker pool that shut down cleanly"""
+        with self.session_factory() as db:
+            db.query(JobWorker).filter(JobWorker.id == name).delete(synchronize_session=False)
+            db.commit()
+
+    def live_workers(self, max_age: float = None) -> List[Dict[str, Any]]:
+        """
+        Worker pools (in any process or host) that reported within max_age seconds
+        (default: JOB_LEASE_SECONDS, i.e. three missed heartbeats)
+
+        Returns:
+            One entry per pool with its concurrency and running job count
+        """
+        if max_age is None:
+            max_age = env_float("JOB_LEASE_SECONDS", 60.0)
+        cutoff = datetime.utcnow() - timedelta(seconds=max_age)
+        with self.session_factory() as db:
+            rows = db.query(JobWorker).filter(JobWorker.last_seen_at >= cutoff).order_by(JobWorker.started_at).all()
+            return [
+                {
+                    "name": row.id,
+                    "host": row.host,
+                    "pid": row.pid,
+                    "workers": row.workers,
+                    "running": row.running,
+                    "started_at": row.started_at.isoformat(),
+                    "last_seen_at": row.last_seen_at.isoformat()
+                }
+                for row in rows
+            ]
+
+    def stats(self) -> Dict[str, int]:
+        """Number of jobs in each status"""
+        with self.session_factory() as db:
+            counts = dict(db.query(Job.status, func.count(Job.id)).group_by(Job.status).all())
+        return {status.value: counts.get(status, 0) for status in JobStatusEnum}
+
+
+_job_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """Get the process-wide job queue bound to the application database"""
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue()
+    return _job_queue
@@ -0,0 +1,146 @@
+"""
+Runners for campaign stage jobs
+
+Each runner performs one orchestrator stage for a claimed job and calls
+`checkpoint` after every completed lead. When a job is claimed again after
+a crash, the runner starts from the checkpoint instead of from scratch.
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import uuid
+
+from agents.orchestrator import CampaignOrchestrator
+from database import SessionLocal
+from campaign_service import (
+    lead_response, load_generation_inputs, remember_generated_messages, remember_research,
+    save_generated_messages, save_research_leads
+)
+from models import ResearchRequest, ResearchResponse, GenerateRequest
+
+# checkpoint(state, completed, total) - persists per-lead progress for the job
+CheckpointFn = Callable[[Dict[str, Any], int, Optional[int]], Awaitable[None]]
+
+
+# Database helpers; runners call them in a worker thread so the event loop keeps serving
+def _persist_leads(campaign_id: str, leads: List[Dict[str, Any]], complete: bool, start: int):
+    with SessionLocal() as db:
+        save_research_leads(db, campaign_id, leads, complete=complete, start=start)
+
+
+def _load_inputs(request: GenerateRequest) -> Tuple[List[Dict[str, Any]], str]:
+    with SessionLocal() as db:
+        return load_generation_inputs(db, request)
+
+
+def _save_messages(campaign_id: str, messages: List[Dict[str, Any]], failures: List[Dict[str, Any]]) -> Dict[str, Any]:
+    with SessionLocal() as db:
+        response = save_generated_messages(db, campaign_id, messages, failures)
+    remember_generated_messages(campaign_id, messages)
+    return response.model_dump()
+
+
+async def run_research_job(job: Dict[str, Any], checkpoint: CheckpointFn) -> Dict[str, Any]:
+    """
+    Research leads for the job's campaign
+
+    Checkpoint: {"leads": [...]} - leads found so far. On resume only the
+    missing leads are researched, and companies already found are excluded.
+
+    Returns:
+        Same body as POST /api/campaigns/research
+    """
+    request = ResearchRequest(**job["payload"])
+    campaign_id = job["campaign_id"]
+    leads = (job.get("checkpoint") or {}).get("leads", [])
+    remaining = request.max_leads - len(leads)
+
+    if remaining > 0:
+        context = request.context
+        if leads:
+            found = ", ".join(lead.get("name", "") for lead in leads)
+            context = f"{context or ''}\nAlready found (do not repeat): {found}".strip()
+            print(f"[JOBS] Resuming research job {job['job_id']} with {len(leads)}/{request.max_leads} leads")
+
+        seen = {lead.get("name", "").lower() for lead in leads}
+        orchestrator = CampaignOrchestrator()
+        async for lead in orchestrator.stream_research(
+            campaign_id=campaign_id,
+            product_service=request.product_service,
+            area=request.area,
+            context=context,
+            angle=request.angle,
+            max_leads=remaining
+        ):
+            name = lead.get("name", "").lower()
+            if name in seen:
+                continue
+            seen.add(name)
+            if "id" not in lead:
+                lead["id"] = str(uuid.uuid4())
+            leads.append(lead)
+
+            await asyncio.to_thread(_persist_leads, campaign_id, leads, False, len(leads) - 1)
+            await checkpoint({"leads": leads}, len(leads), request.max_leads)
+
+    await asyncio.to_thread(_persist_leads, campaign_id, leads, True, len(leads))
+    await asyncio.to_thread(remember_research, campaign_id, request, leads)
+
+    return ResearchResponse(
+        campaign_id=campaign_id,
+        leads=[lead_response(lead) for lead in leads],
+        status="research_complete"
+    ).model_dump()
+
+
+async def run_generate_job(job: Dict[str, Any], checkpoint: CheckpointFn) -> Dict[str, Any]:
+    """
+    Generate content for the job's selected leads
+
+    Checkpoint: {"messages": {lead_id: message}} - finished messages. On
+    resume only leads without a message are generated.
+
+    Returns:
+        Same body as POST /api/campaigns/generate
+    """
+    request = GenerateRequest(**job["payload"])
+    campaign_id = request.campaign_id
+    done: Dict[str, Dict[str, Any]] = (job.get("checkpoint") or {}).get("messages", {})
+    total = len(request.selected_lead_ids)
+
+    selected_leads, company_name = await asyncio.to_thread(_load_inputs, request)
+
+    remaining = [lead_id for lead_id in request.selected_lead_ids if lead_id not in done]
+    if done:
+        print(f"[JOBS] Resuming generation job {job['job_id']} with {len(done)}/{total} messages")
+
+    # Leads finish concurrently; write checkpoints one at a time so a stale one never lands last
+    checkpoint_lock = asyncio.Lock()
+
+    async def on_event(event: str, data: Dict[str, Any]):
+        if event == "lead_complete":
+            async with checkpoint_lock:
+                done[data["lead_id"]] = data["message"]
+                await checkpoint({"messages": done}, len(done), total)
+
+    failures: List[Dict[str, Any]] = []
+    if remaining:
+        orchestrator = CampaignOrchestrator()
+        _, failures = await orchestrator.generate_content(
+            campaign_id=campaign_id,
+            selected_lead_ids=remaining,
+            product_service=request.product_service,
+            context=request.context,
+            angle=request.angle,
+            all_leads=selected_leads,
+            company_name=company_name,
+            on_event=on_event
+        )
+
+    messages = [done[lead_id] for lead_id in request.selected_lead_ids if lead_id in done]
+    return await asyncio.to_thread(_save_messages, campaign_id, messages, failures)
+
+
+JOB_RUNNERS: Dict[str, Callable[[Dict[str, Any], CheckpointFn], Awaitable[Dict[str, Any]]]] = {
+    "research": run_research_job,
+    "generate": run_generate_job
+}
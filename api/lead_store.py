@@ -0,0 +1,118 @@
+"""
+Persistence for researched leads
+
+Leads live in the `leads` table, one row per (campaign_id, lead id), with
+the columns used for lookups (name, industry, location, verified) indexed
+and the full lead kept as JSON. Research appends rows as leads are found,
+and generation loads just the selected leads with one indexed query.
+"""
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+import json
+import uuid
+
+from sqlalchemy.orm import Session
+
+from database import upsert_insert
+from db_models import Campaign as DBCampaign, Lead as DBLead
+
+# Rows per multi-row INSERT (10 bound parameters each)
+MAX_ROWS_PER_STATEMENT = 500
+
+
+def _lead_row(campaign_id: str, lead: Dict[str, Any], position: int, now: datetime) -> Dict[str, Any]:
+    """Column values for one lead"""
+    if "id" not in lead:
+        lead["id"] = str(uuid.uuid4())
+    verified = lead.get("verified")
+    return {
+        "campaign_id": campaign_id,
+        "id": lead["id"],
+        "position": position,
+        "name": lead.get("name") or "Unknown",
+        "industry": lead.get("industry"),
+        "location": lead.get("location"),
+        "verified": verified if isinstance(verified, bool) else None,
+        "data": json.dumps(lead),
+        "created_at": now,
+        "updated_at": now
+    }
+
+
+def save_leads(db: Session, campaign_id: str, leads: List[Dict[str, Any]], start_position: int = 0):
+    """
+    Insert or update leads of a campaign with multi-row upserts (caller commits)
+
+    Args:
+        db: Database session
+        campaign_id: Campaign the leads belong to
+        leads: Leads to write (each gets an "id" if missing)
+        start_position: Position of the first lead in the campaign's lead order
+    """
+    now = datetime.utcnow()
+    rows = [_lead_row(campaign_id, lead, start_position + offset, now) for offset, lead in enumerate(leads)]
+    # Stay well under SQLite's bound-parameter limit for very large campaigns
+    for chunk_start in range(0, len(rows), MAX_ROWS_PER_STATEMENT):
+        statement = upsert_insert(db, DBLead).values(rows[chunk_start:chunk_start + MAX_ROWS_PER_STATEMENT])
+        statement = statement.on_conflict_do_update(
+            index_elements=[DBLead.campaign_id, DBLead.id],
+            set_={
+                "position": statement.excluded.position,
+                "name": statement.excluded.name,
+                "industry": statement.excluded.industry,
+                "location": statement.excluded.location,
+                "verified": statement.excluded.verified,
+                "data": statement.excluded.data,
+                "updated_at": statement.excluded.updated_at
+            }
+        )
+        db.execute(statement)
+
+
+def load_leads(db: Session, campaign_id: str, lead_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Load a campaign's leads in research order
+
+    Args:
+        db: Database session
+        campaign_id: Campaign to load
+        lead_ids: Only these leads (default: all)
+
+    Returns:
+        Leads as dicts
+    """
+    query = db.query(DBLead.data).filter(DBLead.campaign_id == campaign_id)
+    if lead_ids is not None:
+        if not lead_ids:
+            return []
+        query = query.filter(DBLead.id.in_(lead_ids))
+    return [json.loads(data) for (data,) in query.order_by(DBLead.position).all()]
+
+
+def delete_leads(db: Session, campaign_id: str):
+    """Delete a campaign's leads (caller commits)"""
+    db.query(DBLead).filter(DBLead.campaign_id == campaign_id).delete(synchronize_session=False)
+
+
+def migrate_leads_data(db: Session) -> int:
+    """
+    Move legacy Campaign.leads_data JSON blobs into the leads table
+
+    Returns:
+        Number of campaigns migrated
+    """
+    migrated = 0
+    campaigns = db.query(DBCampaign.id, DBCampaign.leads_data).filter(DBCampaign.leads_data.isnot(None)).all()
+    for campaign_id, leads_data in campaigns:
+        try:
+            leads = json.loads(leads_data)
+        except (TypeError, ValueError):
+            print(f"[DATABASE] Skipping unreadable leads_data for campaign {campaign_id}")
+            continue
+        save_leads(db, campaign_id, [lead for lead in leads if isinstance(lead, dict)])
+        db.query(DBCampaign).filter(DBCampaign.id == campaign_id).update(
+            {DBCampaign.leads_data: None}, synchronize_session=False
+        )
+        db.commit()
+        migrated += 1
+    return migrated
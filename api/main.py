@@ -1,18 +1,41 @@
 """
 SmartReach API - Main application entry point
 """
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routers import dashboard, history, campaigns, profile
-from database import init_db
+from routers import dashboard, history, campaigns, profile, jobs, search
+from database import init_db, close_async_engines
+from agents.llm_client import init_llm_clients, shutdown_llm_clients, get_llm_registry
+from agents.llm_cache import get_llm_cache
+from agents.company_kb import get_company_knowledge_base
+from agents.singleflight import singleflight_stats
+from agents.rate_limiter import rate_limiter_stats
+from agents.resilience import circuit_breaker_stats
+from campaign_state import get_campaign_state_store
+from jobs import get_job_queue, start_job_workers, stop_job_workers, job_worker_stats
+from storage_compression import start_storage_compaction, stop_storage_compaction, storage_compaction_stats
 
 app = FastAPI(title="SmartReach API", version="0.1.0")
 
 # Initialize database on startup
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database tables on application startup"""
+    """Initialize database tables, the shared LLM client, job workers and storage compaction on application startup"""
     init_db()
+    await init_llm_clients()
+    await start_job_workers()
+    start_storage_compaction()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background work and close pooled LLM and database connections on application shutdown"""
+    await stop_storage_compaction()
+    await stop_job_workers()
+    await shutdown_llm_clients()
+    await close_async_engines()
 
 # CORS middleware for frontend communication
 app.add_middleware(
@@ -21,6 +44,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # History pagination
 )
 
 # Include routers
@@ -28,6 +52,8 @@ app.include_router(dashboard.router)
 app.include_router(history.router)
 app.include_router(campaigns.router)
 app.include_router(profile.router)
+app.include_router(jobs.router)
+app.include_router(search.router)
 
 
 @app.get("/")
@@ -39,3 +65,27 @@ async def root():
 async def health():
     return {"status": "healthy"}
 
+
+@app.get("/stats")
+async def stats():
+    # The job queue and company knowledge base counts are SQLite queries: run them off the event loop
+    job_counts, live_workers, company_kb = await asyncio.gather(
+        asyncio.to_thread(get_job_queue().stats),
+        asyncio.to_thread(get_job_queue().live_workers),
+        asyncio.to_thread(get_company_knowledge_base().stats)
+    )
+    return {
+        "llm_pool": get_llm_registry().stats(),
+        "llm_cache": get_llm_cache().stats(),
+        "company_kb": company_kb,
+        "singleflight": singleflight_stats(),
+        "rate_limits": rate_limiter_stats(),
+        "circuit_breakers": circuit_breaker_stats(),
+        "campaign_state": get_campaign_state_store().stats(),
+        "jobs": {
+            "queue": job_counts,
+            "workers": job_worker_stats(),
+            "pools": live_workers
+        },
+        "storage_compaction": storage_compaction_stats()
+    }
@@ -0,0 +1,96 @@
+"""
+Bulk persistence for generated messages
+
+A campaign has at most one message per lead (unique index on
+campaign_id, lead_id; several leads may share a company name). Messages
+are written with multi-row INSERT ... ON CONFLICT DO UPDATE statements
+instead of one ORM flush each. Messages without a lead id (stored before
+lead ids were kept) are always inserted.
+"""
+from typing import Any, Dict, List
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from database import upsert_insert
+from db_models import Message as DBMessage
+
+# Rows per multi-row INSERT (9 bound parameters each)
+MAX_ROWS_PER_STATEMENT = 500
+
+
+def _message_row(campaign_id: str, msg: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    """Column values for one message"""
+    return {
+        "id": msg["id"],
+        "campaign_id": campaign_id,
+        "lead_id": msg.get("lead_id"),
+        "company_name": msg["company_name"],
+        "industry": msg["industry"],
+        "location": msg["location"],
+        "content": msg["content"],
+        "quality_score": msg["quality_score"],
+        "created_at": now
+    }
+
+
+def upsert_messages(db: Session, campaign_id: str, messages: List[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    Insert messages, or update the existing message for the same lead (caller commits)
+
+    Updated rows keep their id and created_at; a later message for the same
+    lead in `messages` wins.
+
+    Args:
+        db: Database session
+        campaign_id: Campaign the messages belong to
+        messages: Dicts with id, lead_id, company_name, industry, location, content, quality_score
+
+    Returns:
+        Stored message id per lead id
+    """
+    now = datetime.utcnow()
+    rows_by_lead = {}
+    for index, msg in enumerate(messages):
+        # Messages without a lead id cannot conflict: give each its own slot
+        rows_by_lead[msg.get("lead_id") or ("", index)] = _message_row(campaign_id, msg, now)
+    rows = list(rows_by_lead.values())
+
+    stored_ids = {}
+    for start in range(0, len(rows), MAX_ROWS_PER_STATEMENT):
+        statement = upsert_insert(db, DBMessage).values(rows[start:start + MAX_ROWS_PER_STATEMENT])
+        statement = statement.on_conflict_do_update(
+            index_elements=[DBMessage.campaign_id, DBMessage.lead_id],
+            set_={
+                "company_name": statement.excluded.company_name,
+                "industry": statement.excluded.industry,
+                "location": statement.excluded.location,
+                "content": statement.excluded.content,
+                "quality_score": statement.excluded.quality_score
+            }
+        ).returning(DBMessage.lead_id, DBMessage.id)
+        stored_ids.update({lead_id: message_id for lead_id, message_id in db.execute(statement) if lead_id is not None})
+    return stored_ids
+
+
+def replace_messages(db: Session, campaign_id: str, messages: List[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    Replace all of a campaign's messages: one DELETE plus multi-row inserts (caller commits)
+
+    A message sent back without its lead id keeps the lead id stored with
+    the same message id.
+
+    Returns:
+        Stored message id per lead id
+    """
+    known_leads = dict(
+        db.query(DBMessage.id, DBMessage.lead_id)
+        .filter(DBMessage.campaign_id == campaign_id, DBMessage.lead_id.isnot(None))
+        .all()
+    )
+    messages = [
+        msg if msg.get("lead_id") or msg["id"] not in known_leads else {**msg, "lead_id": known_leads[msg["id"]]}
+        for msg in messages
+    ]
+    db.query(DBMessage).filter(DBMessage.campaign_id == campaign_id).delete(synchronize_session=False)
+    return upsert_messages(db, campaign_id, messages)
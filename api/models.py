@@ -2,7 +2,7 @@
 Data models for SmartReach API
 """
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
 from datetime import datetime
 from enum import Enum
 
@@ -84,3 +84,84 @@ class UpdateCompanyProfileRequest(BaseModel):
     company_name: Optional[str] = None
     services: Optional[list[str]] = None
 
+
+# --- Campaign Workflow Models ---
+class ResearchRequest(BaseModel):
+    """Request to start lead research"""
+    product_service: str
+    area: str
+    context: Optional[str] = None
+    angle: Optional[str] = None  # How the user can help potential leads
+    max_leads: int = 10
+
+
+class LeadResponse(BaseModel):
+    """Lead information response"""
+    id: str
+    name: str
+    industry: str
+    location: str
+    description: str
+    relevance_reason: Optional[str] = None
+    recent_news: Optional[str] = None
+
+
+class ResearchResponse(BaseModel):
+    """Response from research endpoint"""
+    campaign_id: str
+    leads: List[LeadResponse]
+    status: str
+
+
+class GenerateRequest(BaseModel):
+    """Request to generate content for selected leads"""
+    campaign_id: str
+    selected_lead_ids: List[str]
+    product_service: str
+    context: Optional[str] = None
+    angle: Optional[str] = None  # How the user can help potential leads
+
+
+class MessageResponse(BaseModel):
+    """Generated message response"""
+    id: str
+    lead_id: Optional[str] = None
+    company_name: str
+    industry: str
+    location: str
+    content: str
+    quality_score: int
+
+
+class FailedLeadResponse(BaseModel):
+    """A selected lead whose content generation failed"""
+    lead_id: Optional[str] = None
+    company_name: Optional[str] = None
+    error: str
+
+
+class GenerateResponse(BaseModel):
+    """Response from content generation endpoint"""
+    campaign_id: str
+    messages: List[MessageResponse]
+    average_quality_score: float
+    failed_leads: List[FailedLeadResponse] = []
+
+
+class SaveCampaignRequest(BaseModel):
+    """Request to save a completed campaign"""
+    campaign_id: str
+    product_service: str
+    area: str
+    context: Optional[str] = None
+    max_leads: int
+    leads_found: int
+    leads_selected: int
+    messages: List[MessageResponse]
+
+
+class SaveCampaignResponse(BaseModel):
+    """Response from save campaign endpoint"""
+    campaign_id: str
+    status: str
+    message: str
@@ -0,0 +1,78 @@
+"""
+Materialized campaign counters for the dashboard
+
+`campaign_rollups` holds one "all" row with totals and one "day" row per
+creation day (campaign count and leads found). SQLite triggers on
+`campaigns` maintain them inside the same transaction as the insert,
+update or delete, whichever code path or process makes it, so the
+dashboard reads a handful of rows instead of aggregating the whole table.
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+PERIOD_ALL = "all"
+PERIOD_DAY = "day"
+
+_TRIGGER_NAMES = ("campaigns_rollup_insert", "campaigns_rollup_update", "campaigns_rollup_delete")
+
+# Add one campaign (NEW.*) to the totals and to its creation day
+_ADD_NEW = """
+    INSERT INTO campaign_rollups (period, bucket, campaigns, leads_found)
+    VALUES ('all', 'all', 1, COALESCE(NEW.leads_found, 0)), ('day', date(NEW.created_at), 1, COALESCE(NEW.leads_found, 0))
+    ON CONFLICT (period, bucket) DO UPDATE SET
+        campaigns = campaigns + 1,
+        leads_found = leads_found + excluded.leads_found;
+"""
+
+# Remove one campaign (OLD.*) from the totals and from its creation day
+_REMOVE_OLD = """
+    UPDATE campaign_rollups SET
+        campaigns = campaigns - 1,
+        leads_found = leads_found - COALESCE(OLD.leads_found, 0)
+    WHERE (period = 'all' AND bucket = 'all') OR (period = 'day' AND bucket = date(OLD.created_at));
+"""
+
+_TRIGGERS = [
+    f"CREATE TRIGGER IF NOT EXISTS campaigns_rollup_insert AFTER INSERT ON campaigns BEGIN {_ADD_NEW} END",
+    f"""CREATE TRIGGER IF NOT EXISTS campaigns_rollup_update AFTER UPDATE OF leads_found, created_at ON campaigns
+        WHEN COALESCE(OLD.leads_found, 0) != COALESCE(NEW.leads_found, 0) OR OLD.created_at IS NOT NEW.created_at
+        BEGIN {_REMOVE_OLD} {_ADD_NEW} END""",
+    f"CREATE TRIGGER IF NOT EXISTS campaigns_rollup_delete AFTER DELETE ON campaigns BEGIN {_REMOVE_OLD} END",
+]
+
+
+def rebuild_campaign_rollups(conn: Connection):
+    """Recompute every rollup row from the campaigns table (caller commits)"""
+    conn.execute(text("DELETE FROM campaign_rollups"))
+    conn.execute(text("""
+        INSERT INTO campaign_rollups (period, bucket, campaigns, leads_found)
+        SELECT 'all', 'all', COUNT(*), COALESCE(SUM(leads_found), 0) FROM campaigns
+    """))
+    conn.execute(text("""
+        INSERT INTO campaign_rollups (period, bucket, campaigns, leads_found)
+        SELECT 'day', date(created_at), COUNT(*), COALESCE(SUM(leads_found), 0)
+        FROM campaigns WHERE created_at IS NOT NULL GROUP BY date(created_at)
+    """))
+
+
+def install_campaign_rollups(conn: Connection) -> bool:
+    """
+    Create the maintenance triggers and backfill the rollups (SQLite)
+
+    Only does work when a trigger is missing, i.e. on a new database or the
+    first start after upgrading; the triggers and the backfill are created
+    in one transaction so no write is counted twice or missed.
+
+    Returns:
+        True if the rollups were (re)built
+    """
+    existing = conn.execute(text(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type='trigger' AND name IN (:a, :b, :c)"
+    ), dict(zip("abc", _TRIGGER_NAMES))).scalar()
+    if existing == len(_TRIGGER_NAMES):
+        return False
+    for statement in _TRIGGERS:
+        conn.execute(text(statement))
+    rebuild_campaign_rollups(conn)
+    return True
+
@@ -2,99 +2,36 @@
 Campaign endpoints for lead generation workflow
 """
 from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any, Optional
-from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Any
 from datetime import datetime
 import uuid
 import asyncio
 
 from agents.orchestrator import CampaignOrchestrator
-from models import CampaignStatus
-from database import get_db, SessionLocal
-from db_models import Campaign as DBCampaign, Message as DBMessage, CampaignStatusEnum, UserProfile as DBUserProfile
+from agents.progress import get_generation_progress, load_generation_progress
+from campaign_service import (
+    CampaignNotFoundError, create_campaign_record, remember_research, save_research_leads,
+    lead_response, load_generation_inputs, save_generated_messages, remember_generated_messages
+)
+from campaign_state import get_campaign_state_store, campaign_state_from_record
+from lead_store import delete_leads
+from message_store import replace_messages
+from models import (
+    CampaignStatus, ResearchRequest, ResearchResponse, GenerateRequest, GenerateResponse,
+    SaveCampaignRequest, SaveCampaignResponse
+)
+from utils import sse_event
+from database import get_async_db, get_read_db, AsyncSessionLocal
+from db_models import Campaign as DBCampaign, CampaignStatusEnum
 
 router = APIRouter(prefix="/api/campaigns", tags=["campaigns"])
 
-# In-memory storage for active campaigns (will be replaced with database)
-active_campaigns: Dict[str, Dict[str, Any]] = {}
-
-
-# Request/Response Models
-class ResearchRequest(BaseModel):
-    """Request to start lead research"""
-    product_service: str
-    area: str
-    context: Optional[str] = None
-    angle: Optional[str] = None  # How the user can help potential leads
-    max_leads: int = 10
-
-
-class LeadResponse(BaseModel):
-    """Lead information response"""
-    id: str
-    name: str
-    industry: str
-    location: str
-    description: str
-    relevance_reason: Optional[str] = None
-    recent_news: Optional[str] = None
-
-
-class ResearchResponse(BaseModel):
-    """Response from research endpoint"""
-    campaign_id: str
-    leads: List[LeadResponse]
-    status: str
-
-
-class GenerateRequest(BaseModel):
-    """Request to generate content for selected leads"""
-    campaign_id: str
-    selected_lead_ids: List[str]
-    product_service: str
-    context: Optional[str] = None
-    angle: Optional[str] = None  # How the user can help potential leads
-
-
-class MessageResponse(BaseModel):
-    """Generated message response"""
-    id: str
-    company_name: str
-    industry: str
-    location: str
-    content: str
-    quality_score: int
-
-
-class GenerateResponse(BaseModel):
-    """Response from content generation endpoint"""
-    campaign_id: str
-    messages: List[MessageResponse]
-    average_quality_score: float
-
-
-class SaveCampaignRequest(BaseModel):
-    """Request to save a completed campaign"""
-    campaign_id: str
-    product_service: str
-    area: str
-    context: Optional[str] = None
-    max_leads: int
-    leads_found: int
-    leads_selected: int
-    messages: List[MessageResponse]
-
-
-class SaveCampaignResponse(BaseModel):
-    """Response from save campaign endpoint"""
-    campaign_id: str
-    status: str
-    message: str
-
 
 @router.post("/research", response_model=ResearchResponse)
-async def start_research(request: ResearchRequest, db: Session = Depends(get_db)):
+async def start_research(request: ResearchRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Start lead research for a new campaign
     
@@ -104,25 +41,8 @@ async def start_research(request: ResearchRequest, db: Session = Depends(get_db)
     try:
         orchestrator = CampaignOrchestrator()
         
-        # Create campaign ID first
-        campaign_id = str(uuid.uuid4())
-        
         # Save campaign to database immediately with RESEARCH_IN_PROGRESS status
-        db_campaign = DBCampaign(
-            id=campaign_id,
-            product_service=request.product_service,
-            area=request.area,
-            context=request.context,
-            angle=request.angle,
-            max_leads=request.max_leads,
-            status=CampaignStatusEnum.RESEARCH_IN_PROGRESS,
-            leads_found=0,  # Will be updated after research
-            leads_selected=0,
-            created_at=datetime.utcnow()
-        )
-        db.add(db_campaign)
-        db.commit()
-        db.refresh(db_campaign)
+        campaign_id = await db.run_sync(create_campaign_record, request)
         
         # Start research
         result = await orchestrator.start_research(
@@ -130,7 +50,8 @@ async def start_research(request: ResearchRequest, db: Session = Depends(get_db)
             area=request.area,
             context=request.context,
             angle=request.angle,
-            max_leads=request.max_leads
+            max_leads=request.max_leads,
+            campaign_id=campaign_id
         )
         
         leads = result["leads"]
@@ -140,54 +61,113 @@ async def start_research(request: ResearchRequest, db: Session = Depends(get_db)
             if "id" not in lead:
                 lead["id"] = str(uuid.uuid4())
         
-        # Update campaign with leads_found, persist leads_data, and set status to RESEARCH_COMPLETE
-        import json
-        db_campaign.leads_found = len(leads)
-        db_campaign.leads_data = json.dumps(leads)  # Persist leads to database
-        db_campaign.status = CampaignStatusEnum.RESEARCH_COMPLETE
-        db.commit()
-        
-        # Store campaign data temporarily (for content generation)
-        active_campaigns[campaign_id] = {
-            "campaign_id": campaign_id,
-            "product_service": request.product_service,
-            "area": request.area,
-            "context": request.context,
-            "angle": request.angle,
-            "max_leads": request.max_leads,
-            "leads": leads,
-            "status": "research_complete"
-        }
+        # Persist leads, update leads_found and set status to RESEARCH_COMPLETE
+        await db.run_sync(save_research_leads, campaign_id, leads, complete=True)
         
-        # Convert leads to response format
-        lead_responses = [
-            LeadResponse(
-                id=lead.get("id", str(uuid.uuid4())),
-                name=lead.get("name", "Unknown"),
-                industry=lead.get("industry", "Unknown"),
-                location=lead.get("location", "Unknown"),
-                description=lead.get("description", ""),
-                relevance_reason=lead.get("relevance_reason"),
-                recent_news=lead.get("recent_news")
-            )
-            for lead in leads
-        ]
+        await asyncio.to_thread(remember_research, campaign_id, request, leads)
         
         return ResearchResponse(
             campaign_id=campaign_id,
-            leads=lead_responses,
+            leads=[lead_response(lead) for lead in leads],
             status="research_complete"
         )
     except HTTPException:
-        db.rollback()
+        await db.rollback()
         raise
+    except CampaignNotFoundError as e:
+        await db.rollback()
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Research failed: {str(e)}")
+
+
+@router.post("/research/stream")
+async def start_research_stream(request: ResearchRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Start lead research for a new campaign, streaming leads as Server-Sent Events
+    
+    Each lead is added to the campaign's leads as soon as it is
+    researched, so leads found before a disconnect can still be restored.
+    
+    Events (JSON data):
+    - campaign: {"campaign_id"} as soon as the campaign is created
+    - lead: one researched lead (same shape as the leads in POST /research)
+    - complete: same body as POST /research
+    - error: research failed; the stream ends
+    """
+    try:
+        orchestrator = CampaignOrchestrator()
+        campaign_id = await db.run_sync(create_campaign_record, request)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Research failed: {str(e)}")
+    
+    events: asyncio.Queue = asyncio.Queue()
+    
+    async def run_research():
+        # The request's session may already be closed once streaming starts
+        stream_db = AsyncSessionLocal()
+        try:
+            leads = []
+            
+            async for lead in orchestrator.stream_research(
+                campaign_id=campaign_id,
+                product_service=request.product_service,
+                area=request.area,
+                context=request.context,
+                angle=request.angle,
+                max_leads=request.max_leads
+            ):
+                if "id" not in lead:
+                    lead["id"] = str(uuid.uuid4())
+                leads.append(lead)
+                
+                # Persist incrementally so completed leads survive a disconnect
+                await stream_db.run_sync(save_research_leads, campaign_id, leads, start=len(leads) - 1)
+                
+                await events.put(("lead", lead_response(lead).model_dump()))
+            
+            await stream_db.run_sync(save_research_leads, campaign_id, leads, complete=True, start=len(leads))
+            
+            await asyncio.to_thread(remember_research, campaign_id, request, leads)
+            
+            response = ResearchResponse(
+                campaign_id=campaign_id,
+                leads=[lead_response(lead) for lead in leads],
+                status="research_complete"
+            )
+            await events.put(("complete", response.model_dump()))
+        except Exception as e:
+            await stream_db.rollback()
+            await events.put(("error", {"detail": f"Research failed: {str(e)}"}))
+        finally:
+            await stream_db.close()
+            await events.put(None)
+    
+    async def stream():
+        yield sse_event("campaign", {"campaign_id": campaign_id})
+        task = asyncio.create_task(run_research())
+        try:
+            while True:
+                item = await events.get()
+                if item is None:
+                    break
+                yield sse_event(*item)
+        finally:
+            # Client disconnected: stop researching (persisted leads are kept)
+            if not task.done():
+                task.cancel()
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.post("/generate", response_model=GenerateResponse)
-async def generate_content(request: GenerateRequest, db: Session = Depends(get_db)):
+async def generate_content(request: GenerateRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Generate content for selected leads
     
@@ -195,194 +175,152 @@ async def generate_content(request: GenerateRequest, db: Session = Depends(get_d
         List of generated messages with quality scores
     """
     try:
-        # Get campaign from database first
-        db_campaign = db.query(DBCampaign).filter(DBCampaign.id == request.campaign_id).first()
-        if not db_campaign:
-            raise HTTPException(status_code=404, detail="Campaign not found")
-        
-        # Update status to GENERATION_IN_PROGRESS and leads_selected immediately
-        db_campaign.status = CampaignStatusEnum.GENERATION_IN_PROGRESS
-        db_campaign.leads_selected = len(request.selected_lead_ids)  # Update immediately when user selects
-        db.commit()
-        
-        # Get campaign data from active_campaigns or restore from DB
-        if request.campaign_id not in active_campaigns:
-            # Restore from database if not in active_campaigns
-            if not db_campaign.leads_data:
-                raise HTTPException(status_code=404, detail="Campaign leads not found. Please restart research.")
-            
-            import json
-            all_leads = json.loads(db_campaign.leads_data)
-            
-            # Restore to active_campaigns for future use
-            active_campaigns[request.campaign_id] = {
-                "campaign_id": request.campaign_id,
-                "product_service": db_campaign.product_service,
-                "area": db_campaign.area,
-                "context": db_campaign.context,
-                "max_leads": db_campaign.max_leads,
-                "angle": getattr(db_campaign, 'angle', None),  # Backward compatibility
-                "leads": all_leads,
-                "status": "research_complete"
-            }
-        
-        # Get campaign_data (now guaranteed to exist)
-        campaign_data = active_campaigns[request.campaign_id]
-        all_leads = campaign_data["leads"]
-        
-        # Get company name from profile
-        import json
-        company_profile = db.query(DBUserProfile).filter(DBUserProfile.id == "default").first()
-        company_name = None
-        if company_profile and company_profile.company_name:
-            company_name = company_profile.company_name
-        else:
-            company_name = "Marketmind AI Hub"  # Default fallback
+        selected_leads, company_name = await db.run_sync(load_generation_inputs, request)
         
         orchestrator = CampaignOrchestrator()
         
         # Generate content
-        messages = await orchestrator.generate_content(
+        messages, failures = await orchestrator.generate_content(
             campaign_id=request.campaign_id,
             selected_lead_ids=request.selected_lead_ids,
             product_service=request.product_service,
             context=request.context,
             angle=request.angle,
-            all_leads=all_leads,
+            all_leads=selected_leads,
             company_name=company_name
         )
         
-        # Update campaign status to GENERATION_COMPLETE
-        db_campaign.status = CampaignStatusEnum.GENERATION_COMPLETE
-        
-        # Save messages to database immediately (before approval)
-        # Update existing messages or create new ones (don't delete all)
-        existing_messages = {
-            msg.company_name: msg 
-            for msg in db.query(DBMessage).filter(DBMessage.campaign_id == request.campaign_id).all()
-        }
-        
-        # Get set of company names being generated
-        generated_company_names = {msg["company_name"] for msg in messages}
-        
-        # Update or create messages for generated companies
-        for msg in messages:
-            company_name = msg["company_name"]
-            if company_name in existing_messages:
-                # Update existing message
-                existing_msg = existing_messages[company_name]
-                existing_msg.content = msg["content"]
-                existing_msg.quality_score = msg["quality_score"]
-                existing_msg.industry = msg["industry"]
-                existing_msg.location = msg["location"]
-                # Keep existing created_at
-            else:
-                # Create new message
-                db_message = DBMessage(
-                    id=msg["id"],
-                    campaign_id=request.campaign_id,
-                    company_name=msg["company_name"],
-                    industry=msg["industry"],
-                    location=msg["location"],
-                    content=msg["content"],
-                    quality_score=msg["quality_score"],
-                    created_at=datetime.utcnow()
-                )
-                db.add(db_message)
-        
-        # Note: We do NOT delete messages for companies not in this generation batch
-        # This allows users to regenerate only some messages while keeping others unchanged
-        
-        db.commit()
-        
-        # Update campaign data
-        campaign_data["messages"] = messages
-        campaign_data["status"] = "generation_complete"
-        
-        # Convert to response format and sort by quality_score descending
-        message_responses = [
-            MessageResponse(
-                id=msg["id"],
-                company_name=msg["company_name"],
-                industry=msg["industry"],
-                location=msg["location"],
-                content=msg["content"],
-                quality_score=msg["quality_score"]
-            )
-            for msg in messages
-        ]
-        
-        # Sort by quality_score descending (highest first)
-        message_responses.sort(key=lambda x: x.quality_score, reverse=True)
-        
-        # Calculate average quality score
-        avg_score = sum(msg["quality_score"] for msg in messages) / len(messages) if messages else 0
-        
-        return GenerateResponse(
-            campaign_id=request.campaign_id,
-            messages=message_responses,
-            average_quality_score=round(avg_score, 2)
-        )
+        response = await db.run_sync(save_generated_messages, request.campaign_id, messages, failures)
+        await asyncio.to_thread(remember_generated_messages, request.campaign_id, messages)
+        return response
     except HTTPException:
         raise
+    except CampaignNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Content generation failed: {str(e)}")
 
 
-@router.post("/save", response_model=SaveCampaignResponse)
-async def save_campaign(request: SaveCampaignRequest, db: Session = Depends(get_db)):
+@router.post("/generate/stream")
+async def generate_content_stream(request: GenerateRequest, db: AsyncSession = Depends(get_async_db)):
     """
-    Save a completed campaign to the database
+    Generate content for selected leads, streaming progress as Server-Sent Events
+    
+    Events (JSON data; per-lead events include lead_id and company_name):
+    - lead_started: generation for a lead began
+    - token: text delta from the draft ("stage": "draft") or a refinement ("stage": "refine")
+    - draft: first complete draft for a lead
+    - quality: quality scores after each evaluation
+    - refined: refined email after each refinement iteration
+    - lead_complete: final message for a lead
+    - lead_failed: generation failed for a lead ("error"); the other leads continue
+    - complete: same body as POST /generate, sent once everything is saved
+    - error: generation failed; the stream ends
     """
     try:
-        # Check if campaign already exists in database
-        existing_campaign = db.query(DBCampaign).filter(DBCampaign.id == request.campaign_id).first()
-        if existing_campaign:
-            # Update existing campaign instead of creating new one
-            existing_campaign.status = CampaignStatusEnum.COMPLETED
-            existing_campaign.leads_found = request.leads_found
-            existing_campaign.leads_selected = request.leads_selected
-            existing_campaign.leads_data = None  # Clear leads data when completed
-            db_campaign = existing_campaign
-            
-            # Update existing messages (they should already exist from generation, but update them anyway)
-            # Delete and recreate to ensure consistency
-            db.query(DBMessage).filter(DBMessage.campaign_id == request.campaign_id).delete()
-        else:
-            # Create new campaign record
-            db_campaign = DBCampaign(
-                id=request.campaign_id,
+        selected_leads, company_name = await db.run_sync(load_generation_inputs, request)
+        orchestrator = CampaignOrchestrator()
+    except HTTPException:
+        raise
+    except CampaignNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Content generation failed: {str(e)}")
+    
+    events: asyncio.Queue = asyncio.Queue()
+    
+    async def on_event(event: str, data: Dict[str, Any]):
+        await events.put((event, data))
+    
+    async def run_generation():
+        try:
+            messages, failures = await orchestrator.generate_content(
+                campaign_id=request.campaign_id,
+                selected_lead_ids=request.selected_lead_ids,
                 product_service=request.product_service,
-                area=request.area,
                 context=request.context,
-                max_leads=request.max_leads,
-                status=CampaignStatusEnum.COMPLETED,
-                leads_found=request.leads_found,
-                leads_selected=request.leads_selected,
-                created_at=datetime.utcnow()
-            )
-            db.add(db_campaign)
-        
-        # Create message records
-        for msg in request.messages:
-            db_message = DBMessage(
-                id=msg.id,
-                campaign_id=request.campaign_id,
-                company_name=msg.company_name,
-                industry=msg.industry,
-                location=msg.location,
-                content=msg.content,
-                quality_score=msg.quality_score,
-                created_at=datetime.utcnow()
+                angle=request.angle,
+                all_leads=selected_leads,
+                company_name=company_name,
+                on_event=on_event
             )
-            db.add(db_message)
-        
-        # Commit to database
-        db.commit()
+            # The request's session may already be closed once streaming starts
+            async with AsyncSessionLocal() as save_db:
+                response = await save_db.run_sync(save_generated_messages, request.campaign_id, messages, failures)
+            await asyncio.to_thread(remember_generated_messages, request.campaign_id, messages)
+            await events.put(("complete", response.model_dump()))
+        except Exception as e:
+            await events.put(("error", {"detail": f"Content generation failed: {str(e)}"}))
+        finally:
+            await events.put(None)
+    
+    async def stream():
+        task = asyncio.create_task(run_generation())
+        try:
+            while True:
+                item = await events.get()
+                if item is None:
+                    break
+                yield sse_event(*item)
+        finally:
+            # Client disconnected: stop generating
+            if not task.done():
+                task.cancel()
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _save_campaign_record(db: Session, request: SaveCampaignRequest):
+    """Mark the campaign completed with its final messages"""
+    # Check if campaign already exists in database
+    existing_campaign = db.query(DBCampaign).filter(DBCampaign.id == request.campaign_id).first()
+    if existing_campaign:
+        # Update existing campaign instead of creating new one
+        existing_campaign.status = CampaignStatusEnum.COMPLETED
+        existing_campaign.leads_found = request.leads_found
+        existing_campaign.leads_selected = request.leads_selected
+        existing_campaign.leads_data = None  # Clear leads data when completed
+        delete_leads(db, request.campaign_id)
+        db_campaign = existing_campaign
+    else:
+        # Create new campaign record
+        db_campaign = DBCampaign(
+            id=request.campaign_id,
+            product_service=request.product_service,
+            area=request.area,
+            context=request.context,
+            max_leads=request.max_leads,
+            status=CampaignStatusEnum.COMPLETED,
+            leads_found=request.leads_found,
+            leads_selected=request.leads_selected,
+            created_at=datetime.utcnow()
+        )
+        db.add(db_campaign)
+    
+        db.flush()  # Campaign row first, so the messages' campaign exists
+    
+    # Replace the messages (they should already exist from generation, but the
+    # saved versions win): one bulk delete plus multi-row inserts
+    replace_messages(db, request.campaign_id, [msg.model_dump() for msg in request.messages])
+    
+    # Commit to database
+    db.commit()
+
+
+@router.post("/save", response_model=SaveCampaignResponse)
+async def save_campaign(request: SaveCampaignRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Save a completed campaign to the database
+    """
+    try:
+        await db.run_sync(_save_campaign_record, request)
         
         # Remove from active campaigns
-        if request.campaign_id in active_campaigns:
-            del active_campaigns[request.campaign_id]
+        await asyncio.to_thread(get_campaign_state_store().delete, request.campaign_id)
         
         return SaveCampaignResponse(
             campaign_id=request.campaign_id,
@@ -392,17 +330,32 @@ async def save_campaign(request: SaveCampaignRequest, db: Session = Depends(get_
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to save campaign: {str(e)}")
 
 
-@router.get("/{campaign_id}/restore", response_model=ResearchResponse)
-async def restore_campaign(campaign_id: str, db: Session = Depends(get_db)):
+@router.get("/{campaign_id}/progress")
+async def get_generation_progress_endpoint(campaign_id: str):
     """
-    Restore an in-progress campaign state
+    Get progress of the campaign's latest content generation run
     
-    Returns campaign data including leads for continuing the workflow
+    Runs in this process answer from memory; runs in other API workers or job
+    workers answer from the progress they publish to the shared state table.
+    
+    Returns:
+        Counts of completed, failed, in-progress and pending leads plus failure details
     """
+    progress = get_generation_progress(campaign_id)
+    if progress:
+        return progress.to_dict()
+    published = await asyncio.to_thread(load_generation_progress, campaign_id)
+    if not published:
+        raise HTTPException(status_code=404, detail="No content generation found for this campaign")
+    return published
+
+
+def _load_campaign_state(db: Session, campaign_id: str) -> Dict[str, Any]:
+    """Rebuild an in-progress campaign's state from the database"""
     # Get campaign from database
     db_campaign = db.query(DBCampaign).filter(DBCampaign.id == campaign_id).first()
     if not db_campaign:
@@ -412,60 +365,27 @@ async def restore_campaign(campaign_id: str, db: Session = Depends(get_db)):
     if db_campaign.status == CampaignStatusEnum.COMPLETED:
         raise HTTPException(status_code=400, detail="Campaign is already completed")
     
-    if not db_campaign.leads_data:
+    # Rebuild campaign state (leads, plus messages once generation is complete) from the database
+    campaign_state = campaign_state_from_record(db_campaign, db)
+    if not campaign_state:
         raise HTTPException(status_code=404, detail="Campaign leads not found")
+    return campaign_state
+
+
+@router.get("/{campaign_id}/restore", response_model=ResearchResponse)
+async def restore_campaign(campaign_id: str, db: AsyncSession = Depends(get_read_db)):
+    """
+    Restore an in-progress campaign state
     
-    # Parse leads from database
-    import json
-    leads = json.loads(db_campaign.leads_data)
-    
-    # Get messages from database if they exist (for generation-complete status)
-    messages = []
-    if db_campaign.status == CampaignStatusEnum.GENERATION_COMPLETE:
-        db_messages = db.query(DBMessage).filter(DBMessage.campaign_id == campaign_id).order_by(DBMessage.quality_score.desc()).all()
-        messages = [
-            {
-                "id": msg.id,
-                "company_name": msg.company_name,
-                "industry": msg.industry,
-                "location": msg.location,
-                "content": msg.content,
-                "quality_score": msg.quality_score
-            }
-            for msg in db_messages
-        ]
-    
-    # Restore to active_campaigns
-    active_campaigns[campaign_id] = {
-        "campaign_id": campaign_id,
-        "product_service": db_campaign.product_service,
-        "area": db_campaign.area,
-        "context": db_campaign.context,
-        "max_leads": db_campaign.max_leads,
-        "angle": getattr(db_campaign, 'angle', None),  # Backward compatibility
-        "leads": leads,
-        "messages": messages,
-        "status": db_campaign.status.value
-    }
-    
-    # Convert leads to response format
-    lead_responses = [
-        LeadResponse(
-            id=lead.get("id", str(uuid.uuid4())),
-            name=lead.get("name", "Unknown"),
-            industry=lead.get("industry", "Unknown"),
-            location=lead.get("location", "Unknown"),
-            description=lead.get("description", ""),
-            relevance_reason=lead.get("relevance_reason"),
-            recent_news=lead.get("recent_news")
-        )
-        for lead in leads
-    ]
+    Returns campaign data including leads for continuing the workflow
+    """
+    campaign_state = await db.run_sync(_load_campaign_state, campaign_id)
+    await asyncio.to_thread(get_campaign_state_store().set, campaign_id, campaign_state)
     
     return ResearchResponse(
         campaign_id=campaign_id,
-        leads=lead_responses,
-        status=db_campaign.status.value
+        leads=[lead_response(lead) for lead in campaign_state["leads"]],
+        status=campaign_state["status"]
     )
 
 
@@ -476,8 +396,9 @@ async def get_campaign(campaign_id: str):
     
     Returns campaign data including leads and messages if available
     """
-    if campaign_id not in active_campaigns:
+    campaign_state = await asyncio.to_thread(get_campaign_state_store().get, campaign_id)
+    if not campaign_state:
         raise HTTPException(status_code=404, detail="Campaign not found")
     
-    return active_campaigns[campaign_id]
+    return campaign_state
 
@@ -1,22 +1,93 @@
 """
 Dashboard endpoints for homepage data
+
+Counters come from the campaign_rollups table (maintained by triggers on
+campaigns), and the response is cached in memory for a few seconds. A
+commit that inserted, updated or deleted campaigns in this process drops
+the cache; writes from other processes show up once it expires
+(DASHBOARD_CACHE_TTL).
 """
 from fastapi import APIRouter, Depends
-from datetime import datetime, timedelta
-from typing import List
+from datetime import datetime
+from typing import Optional
+import time
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import event, func, select
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 
-from models import DashboardResponse, DashboardStats, RecentActivity, CampaignStatus
-from database import get_db
-from db_models import Campaign as DBCampaign, CampaignStatusEnum
+from models import DashboardResponse, DashboardStats, RecentActivity
+from database import get_read_db, IS_SQLITE
+from db_models import Campaign as DBCampaign, CampaignRollup
+from rollups import PERIOD_ALL, PERIOD_DAY
+from agents.settings import env_float
 from utils import map_db_status_to_pydantic
 
 router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
 
+_cached_response: Optional[DashboardResponse] = None
+_cached_until = 0.0
+_cache_generation = 0  # Bumped by every invalidation
+
+
+def invalidate_dashboard_cache():
+    """Drop the cached dashboard response"""
+    global _cached_response, _cache_generation
+    _cached_response = None
+    _cache_generation += 1
+
+
+# Flushed campaign changes are not visible to other connections until commit:
+# note them at flush, drop the cache once they are committed
+@event.listens_for(Session, "after_flush")
+def _note_campaign_changes(session, flush_context):
+    if any(isinstance(obj, DBCampaign) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info["dashboard_stale"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    if session.info.pop("dashboard_stale", False):
+        invalidate_dashboard_cache()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_changes(session):
+    session.info.pop("dashboard_stale", None)
+
+
+async def _rollup_stats(db: AsyncSession, start_of_month: datetime) -> DashboardStats:
+    """Totals from the "all" row, this month's leads from at most 31 "day" rows"""
+    totals = (await db.execute(
+        select(CampaignRollup.campaigns).where(
+            CampaignRollup.period == PERIOD_ALL, CampaignRollup.bucket == PERIOD_ALL
+        )
+    )).scalar()
+    leads_this_month = (await db.execute(
+        select(func.sum(CampaignRollup.leads_found)).where(
+            CampaignRollup.period == PERIOD_DAY,
+            CampaignRollup.bucket >= start_of_month.strftime("%Y-%m-%d")
+        )
+    )).scalar()
+    return DashboardStats(
+        total_campaigns=totals or 0,
+        total_leads_found=int(leads_this_month or 0)
+    )
+
+
+async def _live_stats(db: AsyncSession, start_of_month: datetime) -> DashboardStats:
+    """Aggregate campaigns directly (databases without the rollup triggers)"""
+    total_campaigns = (await db.execute(select(func.count(DBCampaign.id)))).scalar() or 0
+    total_leads_found = (await db.execute(
+        select(func.sum(DBCampaign.leads_found)).where(DBCampaign.created_at >= start_of_month)
+    )).scalar() or 0
+    return DashboardStats(
+        total_campaigns=total_campaigns,
+        total_leads_found=int(total_leads_found)
+    )
+
 
 @router.get("/", response_model=DashboardResponse)
-async def get_dashboard(db: Session = Depends(get_db)):
+async def get_dashboard(db: AsyncSession = Depends(get_read_db)):
     """
     Get dashboard data including statistics and recent activity
     
@@ -24,27 +95,24 @@ async def get_dashboard(db: Session = Depends(get_db)):
     - Stats: Total campaigns, leads found this month
     - Recent Activity: List of recent campaigns with status
     """
+    global _cached_response, _cached_until
+    if _cached_response is not None and time.monotonic() < _cached_until:
+        return _cached_response
+    generation = _cache_generation
+    
     # Calculate start of current month
     now = datetime.utcnow()
     start_of_month = datetime(now.year, now.month, 1)
     
-    # Get total campaigns
-    total_campaigns = db.query(func.count(DBCampaign.id)).scalar() or 0
-    
-    # Get total leads found this month
-    total_leads_found = db.query(func.sum(DBCampaign.leads_found)).filter(
-        DBCampaign.created_at >= start_of_month
-    ).scalar() or 0
-    
-    stats = DashboardStats(
-        total_campaigns=total_campaigns,
-        total_leads_found=int(total_leads_found)
-    )
+    if IS_SQLITE:
+        stats = await _rollup_stats(db, start_of_month)
+    else:
+        stats = await _live_stats(db, start_of_month)
     
-    # Get recent campaigns (last 5, ordered by created_at desc)
-    recent_campaigns = db.query(DBCampaign).order_by(
-        DBCampaign.created_at.desc()
-    ).limit(5).all()
+    # Get recent campaigns (last 5, newest first via the created_at index)
+    recent_campaigns = (await db.execute(
+        select(DBCampaign).order_by(DBCampaign.created_at.desc()).limit(5)
+    )).scalars().all()
     
     recent_activity = [
         RecentActivity(
@@ -55,8 +123,13 @@ async def get_dashboard(db: Session = Depends(get_db)):
         for campaign in recent_campaigns
     ]
     
-    return DashboardResponse(
+    response = DashboardResponse(
         stats=stats,
         recent_activity=recent_activity
     )
+    # Only cache if no write invalidated the cache while this response was built
+    if _cache_generation == generation:
+        _cached_response = response
+        _cached_until = time.monotonic() + env_float("DASHBOARD_CACHE_TTL", 5.0)
+    return response
 
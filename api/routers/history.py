@@ -1,92 +1,198 @@
 """
 History endpoints for campaign data
+
+The campaign list is paginated with a keyset cursor on (created_at, id):
+each page is one indexed range scan, however many campaigns exist. The
+cursor for the next page is returned in the X-Next-Cursor header (absent
+on the last page), so the body stays a plain list of campaigns.
 """
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import JSONResponse
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
-from sqlalchemy.orm import Session
+import base64
+import json
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer
 
 from models import Campaign, CampaignDetail, CampaignStatus, Message
-from database import get_db
-from db_models import Campaign as DBCampaign, Message as DBMessage, CampaignStatusEnum
-from utils import map_db_status_to_pydantic
+from database import get_async_db, get_read_db
+from db_models import Campaign as DBCampaign, Message as DBMessage, Lead as DBLead, CampaignStatusEnum
+from agents.settings import env_int
+from utils import map_db_status_to_pydantic, map_pydantic_status_to_db
 
 router = APIRouter(prefix="/api/history", tags=["history"])
 
+CAMPAIGN_FIELDS = list(Campaign.model_fields)
+MESSAGE_FIELDS = list(Message.model_fields)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+MAX_PAGE_SIZE = 200
+
+
+def _parse_fields(fields: Optional[str], allowed: List[str], param: str) -> List[str]:
+    """
+    Parse a comma-separated `fields=` projection
+
+    Returns:
+        Requested field names in order (all allowed fields if none given)
+    """
+    if not fields:
+        return list(allowed)
+    requested = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in requested if name not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown {param}: {', '.join(unknown)} (allowed: {', '.join(allowed)})"
+        )
+    return requested
+
+
+def _encode_cursor(created_at: datetime, campaign_id: str) -> str:
+    raw = json.dumps([created_at.isoformat(), campaign_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, campaign_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), str(campaign_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _campaign_values(row: Any, fields: List[str]) -> Dict[str, Any]:
+    """JSON-ready values of the requested campaign fields"""
+    values = {}
+    for name in fields:
+        value = getattr(row, name)
+        if name == "status":
+            value = map_db_status_to_pydantic(value).value
+        elif name == "created_at":
+            value = value.isoformat()
+        values[name] = value
+    return values
+
 
 @router.get("/", response_model=List[Campaign])
-async def get_campaigns(db: Session = Depends(get_db)):
+async def get_campaigns(
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    status: Optional[CampaignStatus] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
     """
-    Get all campaigns
+    Get campaigns, newest first, one page at a time
+    
+    Args:
+        cursor: X-Next-Cursor value from the previous page
+        limit: Page size (default HISTORY_PAGE_SIZE, at most 200)
+        status: Only campaigns with this status
+        created_after: Only campaigns created at or after this time
+        created_before: Only campaigns created before this time
+        fields: Comma-separated campaign fields to return (default: all)
     
     Returns:
     - List of campaigns with basic info, ordered by created_at desc
     """
-    db_campaigns = db.query(DBCampaign).order_by(DBCampaign.created_at.desc()).all()
-    
-    campaigns = [
-        Campaign(
-            id=campaign.id,
-            product_service=campaign.product_service,
-            area=campaign.area,
-            context=campaign.context,
-            max_leads=campaign.max_leads,
-            status=map_db_status_to_pydantic(campaign.status),
-            leads_found=campaign.leads_found,
-            leads_selected=campaign.leads_selected,
-            created_at=campaign.created_at.isoformat()
-        )
-        for campaign in db_campaigns
-    ]
+    selected = _parse_fields(fields, CAMPAIGN_FIELDS, "fields")
+    page_size = limit or min(env_int("HISTORY_PAGE_SIZE", 50), MAX_PAGE_SIZE)
+    
+    # Load only the projected columns, plus the keyset columns for the cursor
+    columns = list(dict.fromkeys(["created_at", "id"] + selected))
+    query = select(*[getattr(DBCampaign, name) for name in columns])
+    if status is not None:
+        query = query.where(DBCampaign.status == map_pydantic_status_to_db(status))
+    if created_after is not None:
+        query = query.where(DBCampaign.created_at >= created_after)
+    if created_before is not None:
+        query = query.where(DBCampaign.created_at < created_before)
+    if cursor:
+        query = query.where(tuple_(DBCampaign.created_at, DBCampaign.id) < tuple_(*_decode_cursor(cursor)))
+    query = query.order_by(DBCampaign.created_at.desc(), DBCampaign.id.desc()).limit(page_size + 1)
     
-    return campaigns
+    rows = (await db.execute(query)).all()
+    headers = {}
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        headers[NEXT_CURSOR_HEADER] = _encode_cursor(rows[-1].created_at, rows[-1].id)
+    
+    return JSONResponse(content=[_campaign_values(row, selected) for row in rows], headers=headers)
 
 
 @router.get("/{campaign_id}", response_model=CampaignDetail)
-async def get_campaign_detail(campaign_id: str, db: Session = Depends(get_db)):
+async def get_campaign_detail(
+    campaign_id: str,
+    fields: Optional[str] = None,
+    message_fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
     """
     Get campaign detail with messages
     
+    Args:
+        fields: Comma-separated campaign fields to return, "messages" included (default: all)
+        message_fields: Comma-separated message fields, e.g. without "content" for
+            list views that load bodies later from /{campaign_id}/messages/{message_id}
+    
     Returns:
     - Campaign details with all generated messages
     """
+    selected = _parse_fields(fields, CAMPAIGN_FIELDS + ["messages"], "fields")
+    selected_message_fields = _parse_fields(message_fields, MESSAGE_FIELDS, "message_fields")
+    
     # Get campaign from database
-    db_campaign = db.query(DBCampaign).filter(DBCampaign.id == campaign_id).first()
+    db_campaign = await db.get(DBCampaign, campaign_id)
     
     if not db_campaign:
         raise HTTPException(status_code=404, detail="Campaign not found")
     
-    # Get messages for this campaign
-    db_messages = db.query(DBMessage).filter(DBMessage.campaign_id == campaign_id).order_by(DBMessage.quality_score.desc()).all()
-    
-    messages = [
-        Message(
-            id=msg.id,
-            company_name=msg.company_name,
-            industry=msg.industry,
-            location=msg.location,
-            content=msg.content,
-            quality_score=msg.quality_score
-        )
-        for msg in db_messages
-    ]
-    
-    return CampaignDetail(
-        id=db_campaign.id,
-        product_service=db_campaign.product_service,
-        area=db_campaign.area,
-        context=db_campaign.context,
-        max_leads=db_campaign.max_leads,
-        status=map_db_status_to_pydantic(db_campaign.status),
-        leads_found=db_campaign.leads_found,
-        leads_selected=db_campaign.leads_selected,
-        created_at=db_campaign.created_at.isoformat(),
-        messages=messages
+    detail = _campaign_values(db_campaign, [name for name in selected if name != "messages"])
+    if "messages" in selected:
+        # Get messages for this campaign, loading only the projected columns
+        rows = (await db.execute(
+            select(*[getattr(DBMessage, name) for name in selected_message_fields])
+            .where(DBMessage.campaign_id == campaign_id)
+            .order_by(DBMessage.quality_score.desc())
+        )).all()
+        detail["messages"] = [dict(row._mapping) for row in rows]
+    
+    return JSONResponse(content=detail)
+
+
+@router.get("/{campaign_id}/messages/{message_id}", response_model=Message)
+async def get_campaign_message(campaign_id: str, message_id: str, db: AsyncSession = Depends(get_read_db)):
+    """
+    Get one generated message with its content
+    
+    Returns:
+    - The message
+    """
+    db_message = (await db.execute(
+        select(DBMessage).options(undefer(DBMessage.content))
+        .where(DBMessage.campaign_id == campaign_id, DBMessage.id == message_id)
+    )).scalars().first()
+    
+    if not db_message:
+        raise HTTPException(status_code=404, detail="Message not found")
+    
+    return Message(
+        id=db_message.id,
+        company_name=db_message.company_name,
+        industry=db_message.industry,
+        location=db_message.location,
+        content=db_message.content,
+        quality_score=db_message.quality_score
     )
 
 
 @router.delete("/{campaign_id}")
-async def delete_campaign(campaign_id: str, db: Session = Depends(get_db)):
+async def delete_campaign(campaign_id: str, db: AsyncSession = Depends(get_async_db)):
     """
     Delete a campaign and all its messages
     
@@ -94,14 +200,16 @@ async def delete_campaign(campaign_id: str, db: Session = Depends(get_db)):
     - Success message
     """
     # Get campaign from database
-    db_campaign = db.query(DBCampaign).filter(DBCampaign.id == campaign_id).first()
+    db_campaign = await db.get(DBCampaign, campaign_id)
     
     if not db_campaign:
         raise HTTPException(status_code=404, detail="Campaign not found")
     
-    # Delete campaign (messages will be deleted automatically due to cascade)
-    db.delete(db_campaign)
-    db.commit()
+    # Delete messages and leads with one statement each instead of loading them for the ORM cascade
+    await db.execute(delete(DBMessage).where(DBMessage.campaign_id == campaign_id))
+    await db.execute(delete(DBLead).where(DBLead.campaign_id == campaign_id))
+    await db.delete(db_campaign)
+    await db.commit()
     
     return {"message": "Campaign deleted successfully"}
 
@@ -0,0 +1,115 @@
+"""
+Background job endpoints for long-running campaign stages
+
+Research and content generation can be queued instead of run inside the
+HTTP request: the endpoint returns a job id straight away and job workers
+do the work, checkpointing after every lead.
+"""
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+
+from database import get_async_db, get_read_db
+from db_models import Campaign as DBCampaign
+from jobs import get_job_queue
+from jobs.queue import TERMINAL_STATUSES
+from agents.settings import env_float
+from campaign_service import create_campaign_record
+from models import ResearchRequest, GenerateRequest
+from utils import sse_event
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+TERMINAL_STATUS_VALUES = {status.value for status in TERMINAL_STATUSES}
+
+
+@router.post("/research", status_code=202)
+async def enqueue_research(request: ResearchRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Create a campaign and queue its lead research
+
+    Returns:
+        Job id, campaign id and the queued job's status
+    """
+    campaign_id = await db.run_sync(create_campaign_record, request)
+    job = await asyncio.to_thread(
+        get_job_queue().enqueue, "research", campaign_id, request.model_dump(), request.max_leads
+    )
+    return job
+
+
+@router.post("/generate", status_code=202)
+async def enqueue_generation(request: GenerateRequest, db: AsyncSession = Depends(get_read_db)):
+    """
+    Queue content generation for the selected leads of a campaign
+
+    Returns:
+        Job id, campaign id and the queued job's status
+    """
+    if (await db.execute(select(DBCampaign.id).where(DBCampaign.id == request.campaign_id))).first() is None:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    job = await asyncio.to_thread(
+        get_job_queue().enqueue, "generate", request.campaign_id, request.model_dump(), len(request.selected_lead_ids)
+    )
+    return job
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str):
+    """
+    Get a job's status, progress and (once succeeded) its result
+    """
+    job = await asyncio.to_thread(get_job_queue().get, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/{job_id}/events")
+async def job_events(job_id: str):
+    """
+    Subscribe to a job's status as Server-Sent Events
+
+    Emits a `status` event whenever the job changes (claimed, lead
+    checkpointed, retried, finished) and closes once the job is succeeded,
+    failed or cancelled.
+    """
+    queue = get_job_queue()
+    job = await asyncio.to_thread(queue.get, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    poll_interval = env_float("JOB_EVENTS_POLL_INTERVAL", 1.0)
+
+    async def stream():
+        current = job
+        last_update = None
+        while True:
+            if current is None:
+                yield sse_event("error", {"error": "Job not found"})
+                return
+            if current["updated_at"] != last_update:
+                last_update = current["updated_at"]
+                yield sse_event("status", current)
+            if current["status"] in TERMINAL_STATUS_VALUES:
+                return
+            await asyncio.sleep(poll_interval)
+            current = await asyncio.to_thread(queue.get, job_id)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """
+    Cancel a queued or running job (a running job stops at its worker's next heartbeat)
+    """
+    job = await asyncio.to_thread(get_job_queue().cancel, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
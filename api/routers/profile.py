@@ -2,27 +2,27 @@
 Company Profile endpoints for company info and services
 """
 from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 import json
 import uuid
 
 from models import CompanyProfileResponse, UpdateCompanyProfileRequest
-from database import get_db
+from database import get_async_db, get_read_db
 from db_models import UserProfile as DBUserProfile
 
 router = APIRouter(prefix="/api/profile", tags=["profile"])
 
 
 @router.get("/", response_model=CompanyProfileResponse)
-async def get_profile(db: Session = Depends(get_db)):
+async def get_profile(db: AsyncSession = Depends(get_read_db)):
     """
     Get company profile (company name and services)
     
     Returns:
         Company profile with company name and list of services
     """
-    profile = db.query(DBUserProfile).filter(DBUserProfile.id == "default").first()
+    profile = await db.get(DBUserProfile, "default")
     
     if not profile:
         # Return default profile with Marketmind AI Hub
@@ -46,14 +46,14 @@ async def get_profile(db: Session = Depends(get_db)):
 
 
 @router.put("/", response_model=CompanyProfileResponse)
-async def update_profile(request: UpdateCompanyProfileRequest, db: Session = Depends(get_db)):
+async def update_profile(request: UpdateCompanyProfileRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Update company profile (company name and services)
     
     Returns:
         Updated company profile
     """
-    profile = db.query(DBUserProfile).filter(DBUserProfile.id == "default").first()
+    profile = await db.get(DBUserProfile, "default")
     
     if not profile:
         # Create new profile with default company name if not provided
@@ -73,8 +73,8 @@ async def update_profile(request: UpdateCompanyProfileRequest, db: Session = Dep
             profile.services = json.dumps(request.services)
         profile.updated_at = datetime.utcnow()
     
-    db.commit()
-    db.refresh(profile)
+    await db.commit()
+    await db.refresh(profile)
     
     # Parse services from JSON
     services = []
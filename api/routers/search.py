@@ -0,0 +1,67 @@
+"""
+Full-text search over generated messages and their campaigns
+"""
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_read_db, IS_SQLITE
+from search_index import SEARCH_TABLE, build_match_query
+
+router = APIRouter(prefix="/api/search", tags=["search"])
+
+MAX_PAGE_SIZE = 100
+
+_SEARCH_SQL = text(f"""
+    SELECT message_id, campaign_id, company_name, industry, product_service, area,
+           snippet({SEARCH_TABLE}, 0, '<mark>', '</mark>', '…', 24) AS snippet,
+           highlight({SEARCH_TABLE}, 1, '<mark>', '</mark>') AS company_highlight,
+           -rank AS score
+    FROM {SEARCH_TABLE}
+    WHERE {SEARCH_TABLE} MATCH :match
+    ORDER BY rank
+    LIMIT :limit OFFSET :offset
+""")
+
+
+@router.get("/")
+async def search_messages(
+    q: str = Query("", description='Words to find; "quoted text" matches a phrase'),
+    industry: Optional[str] = Query(None, description="Only messages whose industry matches these words"),
+    company: Optional[str] = Query(None, description="Only messages whose company name matches these words"),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Search generated messages, best matches first
+
+    Matches message content, company name and industry, and the campaign's
+    product/service, area and context; company and industry matches rank
+    highest.
+
+    Returns:
+    - results: message_id, campaign_id, company_name, industry, product_service,
+      area, snippet (content excerpt with <mark> around matches), company_highlight, score
+    - next_offset: Offset of the next page, or null on the last page
+    """
+    if not IS_SQLITE:
+        raise HTTPException(status_code=501, detail="Full-text search requires SQLite FTS5")
+    match = build_match_query(q, industry=industry, company=company)
+    if match is None:
+        raise HTTPException(status_code=400, detail="Nothing to search for")
+
+    try:
+        rows = (await db.execute(_SEARCH_SQL, {"match": match, "limit": limit + 1, "offset": offset})).mappings().all()
+    except OperationalError as e:
+        print(f"[SEARCH] Query {match!r} failed: {e}")
+        raise HTTPException(status_code=503, detail="Search index unavailable")
+
+    has_more = len(rows) > limit
+    return {
+        "query": q,
+        "results": [dict(row) for row in rows[:limit]],
+        "next_offset": offset + limit if has_more else None
+    }
@@ -0,0 +1,177 @@
+"""
+Full-text search index over generated messages
+
+`message_search` is an SQLite FTS5 table with one row per message (same
+rowid as the message) over its content, company name and industry plus
+the product/service, area and context of its campaign, so a single MATCH
+can combine "fintech" in the industry with "SOC 2" in the content.
+
+It is an external-content table: the text lives only in messages and
+campaigns, and FTS5 reads it back (for snippets) through the
+`message_search_source` view, which decompresses message bodies with the
+decompress_text() SQL function (see storage_compression). Triggers keep
+the index in sync inside the writing transaction; removing a row from an
+external-content index requires the values it was indexed with, which the
+triggers take from OLD.
+"""
+from typing import List, Optional
+import re
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+SEARCH_TABLE = "message_search"
+SOURCE_VIEW = "message_search_source"
+
+# Indexed columns in FTS5 column order, with their bm25 weights
+SEARCH_COLUMNS = [
+    ("content", 1.0),
+    ("company_name", 5.0),
+    ("industry", 3.0),
+    ("product_service", 2.0),
+    ("area", 1.0),
+    ("context", 1.0),
+]
+
+_TRIGGER_NAMES = (
+    "messages_search_insert",
+    "messages_search_update",
+    "messages_search_delete",
+    "campaigns_search_update",
+    "campaigns_search_delete",
+)
+
+_ALL_COLUMNS = "content, company_name, industry, product_service, area, context, message_id, campaign_id"
+
+_CREATE_VIEW = f"""
+    CREATE VIEW IF NOT EXISTS {SOURCE_VIEW} AS
+    SELECT m.rowid AS rowid, decompress_text(m.content) AS content, m.company_name AS company_name,
+           m.industry AS industry, c.product_service AS product_service, c.area AS area, c.context AS context,
+           m.id AS message_id, m.campaign_id AS campaign_id
+    FROM messages m LEFT JOIN campaigns c ON c.id = m.campaign_id
+"""
+
+_CREATE_TABLE = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        {", ".join(name for name, _ in SEARCH_COLUMNS)},
+        message_id UNINDEXED,
+        campaign_id UNINDEXED,
+        content = '{SOURCE_VIEW}',
+        content_rowid = 'rowid',
+        tokenize = 'porter unicode61 remove_diacritics 2'
+    )
+"""
+
+# Index one message (NEW.*) as it now reads through the view
+_INDEX_NEW = f"""
+    INSERT INTO {SEARCH_TABLE} (rowid, {_ALL_COLUMNS})
+    SELECT rowid, {_ALL_COLUMNS} FROM {SOURCE_VIEW} WHERE rowid = NEW.rowid;
+"""
+
+# Remove one message (OLD.*) with the values it was indexed with
+_UNINDEX_OLD = f"""
+    INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rowid, {_ALL_COLUMNS})
+    SELECT 'delete', OLD.rowid, decompress_text(OLD.content), OLD.company_name, OLD.industry,
+           c.product_service, c.area, c.context, OLD.id, OLD.campaign_id
+    FROM (SELECT 1) LEFT JOIN campaigns c ON c.id = OLD.campaign_id;
+"""
+
+# Remove a campaign's messages with the campaign values they were indexed with (OLD.*)
+_UNINDEX_CAMPAIGN = f"""
+    INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rowid, {_ALL_COLUMNS})
+    SELECT 'delete', m.rowid, decompress_text(m.content), m.company_name, m.industry,
+           OLD.product_service, OLD.area, OLD.context, m.id, m.campaign_id
+    FROM messages m WHERE m.campaign_id = OLD.id;
+"""
+
+_TRIGGERS = [
+    f"CREATE TRIGGER IF NOT EXISTS messages_search_insert AFTER INSERT ON messages BEGIN {_INDEX_NEW} END",
+    # Compressing a row in place leaves its text unchanged: no re-index
+    f"""CREATE TRIGGER IF NOT EXISTS messages_search_update AFTER UPDATE ON messages
+        WHEN (OLD.content IS NOT NEW.content AND decompress_text(OLD.content) IS NOT decompress_text(NEW.content))
+            OR OLD.company_name IS NOT NEW.company_name OR OLD.industry IS NOT NEW.industry
+            OR OLD.campaign_id IS NOT NEW.campaign_id
+        BEGIN {_UNINDEX_OLD} {_INDEX_NEW} END""",
+    f"CREATE TRIGGER IF NOT EXISTS messages_search_delete AFTER DELETE ON messages BEGIN {_UNINDEX_OLD} END",
+    # Campaign fields are indexed with every message; the messages lookups use the campaign_id index
+    f"""CREATE TRIGGER IF NOT EXISTS campaigns_search_update AFTER UPDATE OF product_service, area, context ON campaigns
+        WHEN OLD.product_service IS NOT NEW.product_service OR OLD.area IS NOT NEW.area OR OLD.context IS NOT NEW.context
+        BEGIN
+        {_UNINDEX_CAMPAIGN}
+        INSERT INTO {SEARCH_TABLE} (rowid, {_ALL_COLUMNS})
+        SELECT rowid, {_ALL_COLUMNS} FROM {SOURCE_VIEW} WHERE campaign_id = NEW.id;
+    END""",
+    # Messages normally go first; if not, re-index them without the campaign's fields
+    f"""CREATE TRIGGER IF NOT EXISTS campaigns_search_delete AFTER DELETE ON campaigns BEGIN
+        {_UNINDEX_CAMPAIGN}
+        INSERT INTO {SEARCH_TABLE} (rowid, {_ALL_COLUMNS})
+        SELECT rowid, {_ALL_COLUMNS} FROM {SOURCE_VIEW} WHERE campaign_id = OLD.id;
+    END""",
+]
+
+
+def rebuild_search_index(conn: Connection):
+    """Re-index every message from the source view (caller commits)"""
+    conn.execute(text(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('rebuild')"))
+
+
+def install_search_index(conn: Connection) -> bool:
+    """
+    Create the FTS5 table, its source view and triggers, and index existing messages (SQLite)
+
+    Only does work on a new database, or when the index has an older layout
+    (which is dropped and rebuilt).
+
+    Returns:
+        True if the index was (re)built
+    """
+    table_sql = conn.execute(text(
+        "SELECT sql FROM sqlite_master WHERE type='table' AND name = :name"
+    ), {"name": SEARCH_TABLE}).scalar()
+    triggers = conn.execute(text(
+        "SELECT name FROM sqlite_master WHERE type='trigger' AND name IN (:a, :b, :c, :d, :e)"
+    ), dict(zip("abcde", _TRIGGER_NAMES))).scalars().all()
+    if table_sql and SOURCE_VIEW in table_sql and len(triggers) == len(_TRIGGER_NAMES):
+        return False
+
+    # Missing, or the earlier layout that kept its own copy of every message
+    for name in triggers:
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+    if table_sql and SOURCE_VIEW not in table_sql:
+        conn.execute(text(f"DROP TABLE {SEARCH_TABLE}"))
+    conn.execute(text(_CREATE_VIEW))
+    conn.execute(text(_CREATE_TABLE))
+    weights = ", ".join(str(weight) for _, weight in SEARCH_COLUMNS)
+    conn.execute(text(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rank) VALUES ('rank', 'bm25({weights})')"))
+    for statement in _TRIGGERS:
+        conn.execute(text(statement))
+    rebuild_search_index(conn)
+    return True
+
+
+_TERM = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def build_match_query(query: str, industry: Optional[str] = None, company: Optional[str] = None) -> Optional[str]:
+    """
+    Turn user input into an FTS5 MATCH expression
+
+    Words are matched as literal terms (punctuation cannot break the query
+    syntax), "quoted text" as a phrase, and all of them must match.
+    `industry` and `company` restrict terms to those columns.
+
+    Returns:
+        The expression, or None if there is nothing to search for
+    """
+    def quoted(value: str) -> str:
+        return '"' + value.replace('"', '""') + '"'
+
+    def terms(value: str) -> List[str]:
+        return [quoted(phrase or word) for phrase, word in _TERM.findall(value) if (phrase or word).strip()]
+
+    parts = terms(query)
+    for column, value in (("industry", industry), ("company_name", company)):
+        column_terms = terms(value or "")
+        if column_terms:
+            parts.append(f"{column} : ({' '.join(column_terms)})")
+    return " AND ".join(parts) if parts else None
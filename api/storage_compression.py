@@ -0,0 +1,232 @@
+"""
+Compressed storage for large text columns
+
+Message bodies and lead JSON are most of the database. `CompressedText`
+stores them zlib-compressed as BLOBs on SQLite and decompresses them on
+read; rows written before compression (TEXT) are read as they are, so
+old and new rows mix freely. The columns are also deferred in the models,
+so queries that do not use them never read or decompress them.
+
+A background task converts existing rows in small batches, and
+`python -m storage_compression` does the same from the command line:
+
+    python -m storage_compression --vacuum
+"""
+from typing import Any, Dict, List, Optional
+import argparse
+import asyncio
+import time
+import zlib
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.types import Text, TypeDecorator
+
+from agents.settings import env_bool, env_float, env_int
+
+# Format marker in front of the compressed bytes, so the codec can change later
+_ZLIB = b"z"
+
+COMPRESSION_ENABLED = env_bool("STORAGE_COMPRESSION", True)
+COMPRESSION_LEVEL = env_int("STORAGE_COMPRESSION_LEVEL", 6)
+# Shorter values are stored as plain text: compression would not pay for itself
+COMPRESSION_MIN_BYTES = env_int("STORAGE_COMPRESSION_MIN_BYTES", 256)
+
+# (table, column) pairs that hold CompressedText values
+COMPRESSED_COLUMNS = [("messages", "content"), ("leads", "data")]
+
+
+def compress_text(value: Optional[str]) -> Any:
+    """Compressed bytes for a value worth compressing, else the value unchanged"""
+    if value is None or not COMPRESSION_ENABLED:
+        return value
+    raw = value.encode("utf-8")
+    if len(raw) < COMPRESSION_MIN_BYTES:
+        return value
+    return _ZLIB + zlib.compress(raw, COMPRESSION_LEVEL)
+
+
+def decompress_text(value: Any) -> Optional[str]:
+    """Text of a stored value, compressed (bytes) or not (str)"""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        value = bytes(value)
+        if value[:1] != _ZLIB:
+            raise ValueError("Unknown compressed text format")
+        return zlib.decompress(value[1:]).decode("utf-8")
+    return value
+
+
+class CompressedText(TypeDecorator):
+    """Text column stored zlib-compressed on SQLite (other databases store plain text)"""
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if dialect.name != "sqlite":
+            return value
+        return compress_text(value)
+
+    def process_result_value(self, value, dialect):
+        return decompress_text(value)
+
+
+@event.listens_for(Engine, "connect")
+def _register_sqlite_functions(dbapi_connection, connection_record):
+    """Make decompress_text() available to SQL on every SQLite connection (used by search triggers)"""
+    if hasattr(dbapi_connection, "create_function"):
+        dbapi_connection.create_function("decompress_text", 1, decompress_text, deterministic=True)
+
+
+def compress_batch(engine: Engine, table: str, column: str, batch_size: int) -> int:
+    """
+    Compress one batch of plain-text rows of a column
+
+    Returns:
+        Number of rows converted (0 once the column is fully converted)
+    """
+    with engine.begin() as conn:
+        rows = conn.execute(text(
+            f"SELECT rowid, {column} FROM {table} "
+            f"WHERE typeof({column}) = 'text' AND length(CAST({column} AS BLOB)) >= :min_bytes LIMIT :limit"
+        ), {"min_bytes": COMPRESSION_MIN_BYTES, "limit": batch_size}).all()
+        if not rows:
+            return 0
+        # Re-check the type so a row another process converted meanwhile is left alone
+        conn.execute(
+            text(f"UPDATE {table} SET {column} = :value WHERE rowid = :rowid AND typeof({column}) = 'text'"),
+            [{"rowid": rowid, "value": compress_text(value)} for rowid, value in rows]
+        )
+        return len(rows)
+
+
+def compress_existing_rows(engine: Engine, batch_size: int = 500, pause: float = 0.0) -> Dict[str, int]:
+    """
+    Convert every plain-text row of the compressed columns
+
+    Args:
+        engine: Database engine (SQLite)
+        batch_size: Rows per transaction; small batches keep writer lock hold times short
+        pause: Seconds to sleep between batches
+
+    Returns:
+        Rows converted per "table.column"
+    """
+    converted = {}
+    for table, column in COMPRESSED_COLUMNS:
+        total = 0
+        while True:
+            count = compress_batch(engine, table, column, batch_size)
+            if not count:
+                break
+            total += count
+            if pause:
+                time.sleep(pause)
+        converted[f"{table}.{column}"] = total
+    return converted
+
+
+class StorageCompactor:
+    """Background task that compresses rows written before compression was enabled"""
+
+    def __init__(self, engine: Engine = None, batch_size: int = None, pause: float = None):
+        """
+        Configure the compactor (values default to STORAGE_COMPACTION_* env vars)
+
+        Args:
+            engine: Database engine (default: database.engine)
+            batch_size: Rows converted per transaction
+            pause: Seconds between batches, leaving the writer lock to requests
+        """
+        if engine is None:
+            from database import engine
+        self.engine = engine
+        self.batch_size = batch_size or env_int("STORAGE_COMPACTION_BATCH", 500)
+        self.pause = pause if pause is not None else env_float("STORAGE_COMPACTION_PAUSE", 0.5)
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {"rows_converted": 0, "batches": 0, "errors": 0, "done": False}
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        for table, column in COMPRESSED_COLUMNS:
+            while True:
+                try:
+                    count = await asyncio.to_thread(compress_batch, self.engine, table, column, self.batch_size)
+                except Exception as e:
+                    # Rows stay readable as plain text; the next start picks up where this one stopped
+                    self._stats["errors"] += 1
+                    print(f"[STORAGE] Compressing {table}.{column} failed, stopping: {e}")
+                    return
+                if not count:
+                    break
+                self._stats["rows_converted"] += count
+                self._stats["batches"] += 1
+                await asyncio.sleep(self.pause)
+        self._stats["done"] = True
+        if self._stats["rows_converted"]:
+            print(f"[STORAGE] Compressed {self._stats['rows_converted']} existing rows; run VACUUM to shrink the file")
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "running": self._task is not None and not self._task.done()}
+
+
+_compactor: Optional[StorageCompactor] = None
+
+
+def start_storage_compaction():
+    """Start converting existing rows in the background (SQLite, when compression is enabled)"""
+    global _compactor
+    from database import IS_SQLITE
+    if not (IS_SQLITE and COMPRESSION_ENABLED):
+        return
+    if _compactor is None:
+        _compactor = StorageCompactor()
+        _compactor.start()
+
+
+async def stop_storage_compaction():
+    global _compactor
+    if _compactor is not None:
+        await _compactor.stop()
+        _compactor = None
+
+
+def storage_compaction_stats() -> Dict[str, Any]:
+    if _compactor is None:
+        return {"enabled": COMPRESSION_ENABLED, "running": False}
+    return {"enabled": COMPRESSION_ENABLED, **_compactor.stats()}
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Compress existing message bodies and lead data")
+    parser.add_argument("--batch-size", type=int, default=env_int("STORAGE_COMPACTION_BATCH", 500))
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM afterwards to return freed pages to the OS")
+    args = parser.parse_args(argv)
+
+    from database import engine, init_db
+    import db_models  # noqa: F401 - registers the tables init_db creates
+    init_db()
+    if not COMPRESSION_ENABLED:
+        print("[STORAGE] STORAGE_COMPRESSION is off; nothing to do")
+        return
+    for column, count in compress_existing_rows(engine, args.batch_size).items():
+        print(f"[STORAGE] {column}: compressed {count} rows")
+    if args.vacuum:
+        print("[STORAGE] Running VACUUM")
+        with engine.connect() as conn:
+            conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM"))
+
+
+if __name__ == "__main__":
+    main()
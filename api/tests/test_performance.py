@@ -0,0 +1,1561 @@
+"""
+Tests for SmartReach performance infrastructure
+
+Covers the components that sit underneath the agents and do not need
+live API keys:
+- LLM response cache
+- Single-flight request coalescing
+- Per-model rate limiting
+- Retries, deadlines and circuit breakers
+- Streaming LLM responses
+- Incremental JSON parsing of LLM output
+- Concurrent research pipeline
+- Parallel content generation with partial results and shared progress
+- Durable job queue with leases and checkpoints
+- Worker pool heartbeats across processes
+- Bounded campaign state store shared between workers
+- Normalized leads table and leads_data migration
+- Async read sessions alongside SQLite writers (WAL)
+- Bulk upsert of generated messages
+- Trigger-maintained dashboard counters
+- Keyset pagination of campaign history
+- Full-text search index over messages
+- Compressed, deferred message bodies and lead data
+- Company knowledge base consulted before research tools
+- Entity resolution of generated companies
+- Over-generating candidates and stopping at max_leads
+"""
+import pytest
+import sys
+import time
+import types
+from pathlib import Path
+
+# Add parent directory to path so we can import agents
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents.llm_cache import LLMResponseCache
+from agents.company_kb import CompanyKnowledgeBase
+
+
+class TestLLMCache:
+    """Test cases for the two-tier LLM response cache"""
+    
+    def test_cache_key_depends_on_model_temperature_and_prompt(self):
+        """Test that cache keys change with each part of the request"""
+        base = LLMResponseCache.make_key("gpt-4", 0.7, "hello")
+        assert base == LLMResponseCache.make_key("gpt-4", 0.7, "hello")
+        assert base != LLMResponseCache.make_key("gpt-3.5-turbo", 0.7, "hello")
+        assert base != LLMResponseCache.make_key("gpt-4", 0.3, "hello")
+        assert base != LLMResponseCache.make_key("gpt-4", 0.7, "hello!")
+        print("✅ Cache key: PASSED")
+    
+    def test_cache_memory_and_disk_tiers(self, tmp_path):
+        """Test that entries survive a restart through the SQLite tier"""
+        path = str(tmp_path / "cache.db")
+        key = LLMResponseCache.make_key("gpt-4", 0.3, "prompt")
+        
+        cache = LLMResponseCache(path=path, enabled=True)
+        assert cache.get(key) is None
+        cache.set(key, "response", model="gpt-4", tokens=120, latency=1.5)
+        assert cache.get(key) == "response"
+        
+        # A fresh instance has an empty memory tier and must read from disk
+        restarted = LLMResponseCache(path=path, enabled=True)
+        assert restarted.get(key) == "response"
+        
+        stats = restarted.stats()
+        assert stats["disk_hits"] == 1
+        assert stats["tokens_saved"] == 120
+        assert cache.stats()["memory_hits"] == 1
+        assert cache.stats()["misses"] == 1
+        print("✅ Cache tiers: PASSED")
+    
+    def test_cache_ttl_expiry(self, tmp_path):
+        """Test that expired entries are treated as misses"""
+        cache = LLMResponseCache(path=str(tmp_path / "cache.db"), enabled=True)
+        key = LLMResponseCache.make_key("gpt-4", 0.3, "prompt")
+        cache.set(key, "response", ttl_seconds=0.01)
+        time.sleep(0.02)
+        assert cache.get(key) is None
+        print("✅ Cache TTL: PASSED")
+    
+    def test_cache_size_eviction(self, tmp_path):
+        """Test that the memory LRU and disk tier stay within their limits"""
+        cache = LLMResponseCache(
+            path=str(tmp_path / "cache.db"),
+            memory_entries=2,
+            max_disk_entries=5,
+            enabled=True
+        )
+        cache.EVICTION_INTERVAL = 1
+        for i in range(10):
+            cache.set(LLMResponseCache.make_key("gpt-4", 0.3, str(i)), f"response {i}")
+        
+        stats = cache.stats()
+        assert stats["memory_entries"] == 2
+        assert stats["evictions"] == 5
+        # Most recent entries are kept, oldest are evicted
+        assert cache.get(LLMResponseCache.make_key("gpt-4", 0.3, "9")) == "response 9"
+        assert cache.get(LLMResponseCache.make_key("gpt-4", 0.3, "0")) is None
+        print("✅ Cache eviction: PASSED")
+    
+    def test_hits_do_not_write_until_next_store(self, tmp_path):
+        """Test that access times from hits are batched into a later write"""
+        import sqlite3
+        path = str(tmp_path / "cache.db")
+        key = LLMResponseCache.make_key("gpt-4", 0.3, "prompt")
+        LLMResponseCache(path=path, enabled=True).set(key, "response")
+        
+        cache = LLMResponseCache(path=path, enabled=True)
+        last_access = lambda: sqlite3.connect(path).execute("SELECT last_access FROM llm_cache WHERE key = ?", (key,)).fetchone()[0]
+        stored_at = last_access()
+        time.sleep(0.01)
+        assert cache.get(key) == "response"  # Disk hit
+        assert cache.get(key) == "response"  # Memory hit
+        assert last_access() == stored_at
+        assert cache._conn.in_transaction is False  # Nothing left uncommitted either
+        
+        cache.set(LLMResponseCache.make_key("gpt-4", 0.3, "other"), "other response")
+        assert last_access() > stored_at
+        print("✅ Cache access batching: PASSED")
+
+
+class TestSingleFlight:
+    """Test cases for single-flight request coalescing"""
+    
+    def test_threaded_callers_share_one_execution(self):
+        """Test that concurrent threads with the same key run the function once"""
+        import threading
+        from agents.singleflight import SingleFlightGroup
+        
+        group = SingleFlightGroup("test")
+        executions = []
+        release = threading.Event()
+        
+        def slow_call():
+            executions.append(1)
+            release.wait(timeout=2)
+            return {"value": 42}
+        
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(group.do("key", slow_call))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        while group.stats()["calls"] < 5:
+            time.sleep(0.005)
+        release.set()
+        for thread in threads:
+            thread.join()
+        
+        assert len(executions) == 1
+        assert results == [{"value": 42}] * 5
+        assert group.stats()["coalesced"] == 4
+        print("✅ Threaded single-flight: PASSED")
+    
+    def test_async_callers_share_one_execution(self):
+        """Test that concurrent coroutines with the same key await one execution"""
+        import asyncio
+        from agents.singleflight import SingleFlightGroup
+        
+        group = SingleFlightGroup("test")
+        executions = []
+        
+        async def slow_call(value):
+            executions.append(value)
+            await asyncio.sleep(0.01)
+            return value
+        
+        async def run():
+            same = [group.do_async("a", slow_call, "a") for _ in range(3)]
+            other = group.do_async("b", slow_call, "b")
+            return await asyncio.gather(*same, other)
+        
+        assert asyncio.run(run()) == ["a", "a", "a", "b"]
+        assert sorted(executions) == ["a", "b"]
+        assert group.stats()["coalesced"] == 2
+        print("✅ Async single-flight: PASSED")
+    
+    def test_errors_propagate_to_every_caller(self):
+        """Test that a failed shared call raises for the leader and followers"""
+        import asyncio
+        from agents.singleflight import SingleFlightGroup
+        
+        group = SingleFlightGroup("test")
+        
+        async def failing_call():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+        
+        async def run():
+            return await asyncio.gather(
+                *[group.do_async("key", failing_call) for _ in range(3)],
+                return_exceptions=True
+            )
+        
+        results = asyncio.run(run())
+        assert all(isinstance(r, RuntimeError) for r in results)
+        print("✅ Single-flight error propagation: PASSED")
+
+
+class TestRateLimiter:
+    """Test cases for the per-model rate limiter"""
+    
+    def test_concurrency_limit_is_enforced(self):
+        """Test that no more than the concurrency limit run at once"""
+        import asyncio
+        from agents.rate_limiter import ModelRateLimiter
+        
+        limiter = ModelRateLimiter("test", rpm=100000, tpm=10000000, max_concurrency=3, initial_concurrency=3)
+        active = []
+        peak = []
+        
+        async def call():
+            async with limiter.limit_async(10):
+                active.append(1)
+                peak.append(len(active))
+                await asyncio.sleep(0.01)
+                active.pop()
+        
+        async def run():
+            await asyncio.gather(*[call() for _ in range(12)])
+        
+        asyncio.run(run())
+        assert max(peak) <= 3
+        assert limiter.stats()["granted"] == 12
+        print("✅ Rate limiter concurrency: PASSED")
+    
+    def test_aimd_adapts_to_429s(self):
+        """Test that a 429 halves the concurrency limit and successes grow it back"""
+        from agents.rate_limiter import ModelRateLimiter
+        
+        class RateLimited(Exception):
+            status_code = 429
+        
+        limiter = ModelRateLimiter("test", rpm=100000, tpm=10000000, max_concurrency=8,
+                                   initial_concurrency=8, cooldown=0)
+        try:
+            with limiter.limit(10):
+                raise RateLimited()
+        except RateLimited:
+            pass
+        assert limiter.stats()["concurrency_limit"] == 4
+        assert limiter.stats()["rate_limited"] == 1
+        
+        for _ in range(10):
+            with limiter.limit(10):
+                pass
+        assert limiter.stats()["concurrency_limit"] > 4
+        print("✅ Rate limiter AIMD: PASSED")
+    
+    def test_campaigns_are_served_round_robin(self):
+        """Test that a queued campaign is not starved by a larger one"""
+        import asyncio
+        from agents.rate_limiter import ModelRateLimiter, campaign_scope
+        
+        limiter = ModelRateLimiter("test", rpm=100000, tpm=10000000, max_concurrency=1, initial_concurrency=1)
+        order = []
+        
+        async def call(campaign):
+            with campaign_scope(campaign):
+                async with limiter.limit_async(10):
+                    order.append(campaign)
+                    await asyncio.sleep(0.001)
+        
+        async def run():
+            big = [asyncio.ensure_future(call("big")) for _ in range(6)]
+            await asyncio.sleep(0)
+            small = [asyncio.ensure_future(call("small")) for _ in range(2)]
+            await asyncio.gather(*big, *small)
+        
+        asyncio.run(run())
+        # "small" gets its turns interleaved with "big" instead of waiting for all of it
+        assert order.index("small") <= 2
+        assert order[:5].count("small") == 2
+        print("✅ Rate limiter fair queuing: PASSED")
+
+
+class HTTPError(Exception):
+    """Stand-in for a client library error carrying an HTTP status code"""
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class TestResilience:
+    """Test cases for retries, deadlines and circuit breakers"""
+    
+    @pytest.fixture(autouse=True)
+    def fresh_breakers(self):
+        from agents.resilience import reset_circuit_breakers
+        reset_circuit_breakers()
+        yield
+        reset_circuit_breakers()
+    
+    def _policy(self, **overrides):
+        from agents.resilience import ResiliencePolicy
+        settings = {"attempt_timeout": 1.0, "deadline": 5.0, "max_attempts": 3, "base_delay": 0.001, "max_delay": 0.002}
+        settings.update(overrides)
+        return ResiliencePolicy(**settings)
+    
+    def test_retries_server_errors(self):
+        """Test that 5xx errors are retried and each attempt gets a timeout"""
+        from agents.resilience import call_with_resilience
+        
+        timeouts = []
+        
+        def flaky(timeout):
+            timeouts.append(timeout)
+            if len(timeouts) < 3:
+                raise HTTPError(503)
+            return "ok"
+        
+        assert call_with_resilience("test-retry", flaky, policy=self._policy()) == "ok"
+        assert len(timeouts) == 3
+        assert all(0 < t <= 1.0 for t in timeouts)
+        print("✅ Resilience retries 5xx: PASSED")
+    
+    def test_does_not_retry_client_errors(self):
+        """Test that 4xx caller errors fail immediately"""
+        from agents.resilience import call_with_resilience
+        
+        calls = []
+        
+        def bad_request(timeout):
+            calls.append(timeout)
+            raise HTTPError(400)
+        
+        with pytest.raises(HTTPError):
+            call_with_resilience("test-4xx", bad_request, policy=self._policy())
+        assert len(calls) == 1
+        print("✅ Resilience skips 4xx: PASSED")
+    
+    def test_circuit_opens_and_fails_fast(self):
+        """Test that consecutive failures open the circuit and later calls short-circuit"""
+        from agents.resilience import CircuitBreaker, CircuitOpenError
+        
+        breaker = CircuitBreaker("test-breaker", failure_threshold=2, reset_timeout=0.05)
+        for _ in range(2):
+            breaker.before_call()
+            breaker.record_failure(HTTPError(500))
+        
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        assert breaker.stats()["state"] == "open"
+        
+        # After the reset timeout one trial call is let through and closes it again
+        time.sleep(0.06)
+        breaker.before_call()
+        breaker.record_success()
+        assert breaker.state == "closed"
+        print("✅ Circuit breaker: PASSED")
+    
+    def test_reset_closes_open_circuits(self):
+        """Test that reset_circuit_breakers lets callers through a provider circuit opened earlier"""
+        from agents.resilience import CircuitOpenError, call_with_resilience, get_circuit_breaker, reset_circuit_breakers
+        
+        def down(timeout):
+            raise HTTPError(503)
+        
+        breaker = get_circuit_breaker("test-reset")
+        for _ in range(breaker.failure_threshold):
+            with pytest.raises((HTTPError, CircuitOpenError)):
+                call_with_resilience("test-reset", down, policy=self._policy(max_attempts=1))
+        with pytest.raises(CircuitOpenError):
+            call_with_resilience("test-reset", down, policy=self._policy(max_attempts=1))
+        
+        reset_circuit_breakers("test-reset")
+        assert get_circuit_breaker("test-reset").state == "closed"
+        assert call_with_resilience("test-reset", lambda timeout: "ok", policy=self._policy()) == "ok"
+        print("✅ Circuit breaker reset: PASSED")
+    
+    def test_async_attempts_respect_deadline(self):
+        """Test that a hanging async call is cut off at the deadline"""
+        import asyncio
+        from agents.resilience import call_with_resilience_async
+        
+        async def hang(timeout):
+            await asyncio.sleep(10)
+        
+        started = time.monotonic()
+        with pytest.raises((asyncio.TimeoutError, TimeoutError)):
+            asyncio.run(call_with_resilience_async(
+                "test-deadline", hang, policy=self._policy(attempt_timeout=0.05, deadline=0.12)
+            ))
+        assert time.monotonic() - started < 1.0
+        print("✅ Resilience deadline: PASSED")
+
+
+class _FakeStream:
+    """Async iterator of chat completion chunks, optionally failing part-way"""
+    def __init__(self, deltas, fail_after=None):
+        self.chunks = [
+            types.SimpleNamespace(choices=[types.SimpleNamespace(delta=types.SimpleNamespace(content=d))], usage=None)
+            for d in deltas
+        ]
+        self.fail_after = fail_after
+        self.sent = 0
+    
+    def __aiter__(self):
+        return self
+    
+    async def __anext__(self):
+        if self.fail_after is not None and self.sent == self.fail_after:
+            raise TimeoutError("read timed out")
+        if self.sent == len(self.chunks):
+            raise StopAsyncIteration
+        self.sent += 1
+        return self.chunks[self.sent - 1]
+
+
+class TestLLMStreaming:
+    """Test cases for streamed LLM calls"""
+    
+    @pytest.fixture(autouse=True)
+    def fresh_breakers(self, monkeypatch):
+        # Earlier tests may have opened the process-wide "openai" circuit
+        from agents import resilience
+        monkeypatch.setattr(resilience, "_breakers", {})
+    
+    def _patch_client(self, monkeypatch, make_stream):
+        from agents.llm_client import get_llm_registry
+        requests_made = []
+        
+        class Completions:
+            async def create(self, **kwargs):
+                requests_made.append(kwargs)
+                return make_stream()
+        
+        client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=Completions()))
+        monkeypatch.setattr(get_llm_registry(), "get_async_client", lambda: client)
+        return requests_made
+    
+    def test_deltas_are_forwarded_as_they_arrive(self, monkeypatch):
+        """Test that on_token receives every delta and the full text is returned"""
+        import asyncio
+        from agents.base import call_llm_async
+        
+        requests_made = self._patch_client(monkeypatch, lambda: _FakeStream(["Subject: ", "Hello", " there"]))
+        deltas = []
+        
+        async def on_token(delta):
+            deltas.append(delta)
+        
+        result = asyncio.run(call_llm_async("stream test prompt", use_cache=False, on_token=on_token))
+        assert result == "Subject: Hello there"
+        assert deltas == ["Subject: ", "Hello", " there"]
+        assert requests_made[0]["stream"] is True
+        print("✅ LLM streaming: PASSED")
+    
+    def test_interrupted_stream_is_not_retried(self, monkeypatch):
+        """Test that a stream failing after deltas were delivered is not replayed"""
+        import asyncio
+        from agents.base import call_llm_async
+        
+        requests_made = self._patch_client(monkeypatch, lambda: _FakeStream(["partial", "rest"], fail_after=1))
+        deltas = []
+        
+        async def on_token(delta):
+            deltas.append(delta)
+        
+        with pytest.raises(RuntimeError, match="stream interrupted"):
+            asyncio.run(call_llm_async("interrupted stream prompt", use_cache=False, on_token=on_token))
+        assert len(requests_made) == 1
+        assert deltas == ["partial"]
+        print("✅ LLM stream interruption: PASSED")
+
+
+class TestJSONStreamParser:
+    """Test cases for the incremental JSON parser"""
+    
+    def test_objects_are_emitted_as_they_close(self):
+        """Test that each array element is returned by the chunk that completes it"""
+        from agents.json_stream import JSONStreamParser
+        
+        parser = JSONStreamParser()
+        assert parser.feed('Here you go: [{"name": "Ac') == []
+        assert parser.feed('me", "tags": ["a", "b}"]}, {"na') == [{"name": "Acme", "tags": ["a", "b}"]}]
+        assert parser.feed('me": "Beta"}] Let me know!') == [{"name": "Beta"}]
+        print("✅ JSON stream parser incremental: PASSED")
+    
+    def test_malformed_entries_are_skipped(self):
+        """Test that one malformed object does not discard the others"""
+        from agents.json_stream import parse_json_objects
+        
+        text = '[{"name": "Acme"}, {"name": oops}, {"name": "Gamma", "note": "quote \\" {"}]'
+        assert parse_json_objects(text) == [{"name": "Acme"}, {"name": "Gamma", "note": 'quote " {'}]
+        print("✅ JSON stream parser malformed entries: PASSED")
+    
+    def test_single_object_with_surrounding_prose(self):
+        """Test extracting one object from a response with text before and after it"""
+        from agents.json_stream import parse_json_object
+        
+        text = 'Scores: {"clarity": 80, "detail": {"note": "ok"}} (see {notes})'
+        assert parse_json_object(text) == {"clarity": 80, "detail": {"note": "ok"}}
+        assert parse_json_object("no json here") is None
+        print("✅ JSON object extraction: PASSED")
+
+
+class TestResearchPipeline:
+    """Test cases for the concurrent lead research pipeline"""
+    
+    def _agent(self, monkeypatch, delays, failing=(), enrich_batch_tokens=0):
+        import asyncio
+        from agents.research_agent import LeadResearchAgent
+        
+        monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+        
+        class FakeResearchAgent(LeadResearchAgent):
+            async def _stream_companies_llm(self, product_service, area, context=None, max_leads=10):
+                for name in delays:
+                    yield {"name": name}
+            
+            async def _enrich_company_data(self, company, product_service, context=None):
+                await asyncio.sleep(delays[company["name"]])
+                if company["name"] in failing:
+                    raise ValueError("enrichment exploded")
+                return {**company, "relevance_reason": "fit"}
+        
+        return FakeResearchAgent(concurrency=10, enrich_batch_tokens=enrich_batch_tokens,
+                                 knowledge_base=CompanyKnowledgeBase(path=":memory:"))
+    
+    def test_companies_run_concurrently_in_order(self, monkeypatch):
+        """Test that research takes about as long as the slowest company and keeps generation order"""
+        import asyncio
+        
+        monkeypatch.setattr("agents.research_agent.TOOLS_AVAILABLE", False)
+        delays = {"Slow": 0.2, "Medium": 0.1, "Fast": 0.01}
+        agent = self._agent(monkeypatch, delays)
+        
+        started = time.perf_counter()
+        leads = asyncio.run(agent.execute_async("CRM", "SF", max_leads=3))
+        elapsed = time.perf_counter() - started
+        
+        assert [lead["name"] for lead in leads] == ["Slow", "Medium", "Fast"]
+        assert elapsed < 0.3  # sequential processing would take over 0.31s
+        print("✅ Research pipeline concurrency: PASSED")
+    
+    def test_company_failures_stay_isolated(self, monkeypatch):
+        """Test that one failing company falls back to its raw data without failing the others"""
+        import asyncio
+        
+        monkeypatch.setattr("agents.research_agent.TOOLS_AVAILABLE", False)
+        agent = self._agent(monkeypatch, {"Good": 0.01, "Broken": 0.01}, failing=("Broken",))
+        
+        leads = asyncio.run(agent.execute_async("CRM", "SF", max_leads=2))
+        assert [lead["name"] for lead in leads] == ["Good", "Broken"]
+        assert leads[0]["relevance_reason"] == "fit"
+        assert "id" in leads[1]
+        print("✅ Research pipeline failure isolation: PASSED")
+    
+    def test_enrichment_is_batched_with_per_company_fallback(self, monkeypatch):
+        """Test that companies share one enrichment call and missing entries are enriched alone"""
+        import asyncio
+        import json
+        from agents import research_agent
+        
+        monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+        monkeypatch.setattr(research_agent, "TOOLS_AVAILABLE", False)
+        prompts = []
+        
+        async def fake_llm(prompt, **kwargs):
+            import re
+            prompts.append(prompt)
+            # Answer for Alpha and Gamma only; Beta is left out. Numbers follow the order
+            # companies reached the batch, which need not be generation order
+            numbers = dict((name, number) for number, name in re.findall(r"Company (\d+): (\w+)", prompt))
+            return "Here you go: " + json.dumps({
+                numbers["Alpha"]: {"description": "A", "relevance_reason": "needs CRM", "recent_news": "none"},
+                numbers["Gamma"]: {"description": "C", "relevance_reason": "growing", "recent_news": "raised"}
+            })
+        
+        monkeypatch.setattr(research_agent, "call_llm_async", fake_llm)
+        
+        class BatchingAgent(research_agent.LeadResearchAgent):
+            individually = []
+            
+            async def _stream_companies_llm(self, product_service, area, context=None, max_leads=10):
+                for name in ("Alpha", "Beta", "Gamma"):
+                    yield {"name": name, "industry": "Software"}
+            
+            async def _enrich_company_data(self, company, product_service, context=None):
+                self.individually.append(company["name"])
+                return {**company, "relevance_reason": "individual"}
+        
+        agent = BatchingAgent(enrich_batch_tokens=10000, enrich_batch_wait=0.05,
+                              knowledge_base=CompanyKnowledgeBase(path=":memory:"))
+        leads = asyncio.run(agent.execute_async("CRM", "SF", max_leads=3))
+        
+        assert len(prompts) == 1
+        assert [lead["relevance_reason"] for lead in leads] == ["needs CRM", "individual", "growing"]
+        assert agent.individually == ["Beta"]
+        print("✅ Batched enrichment: PASSED")
+    
+    def test_single_enrichment_ignores_prose_around_json(self, monkeypatch):
+        """Test that braces in text after the JSON object do not break single-company enrichment"""
+        import asyncio
+        from agents import research_agent
+        
+        async def fake_llm(prompt, **kwargs):
+            return 'Sure! {"description": "CRM buyer", "relevance_reason": "scaling sales"} Hope this helps {:}'
+        
+        monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+        monkeypatch.setattr(research_agent, "call_llm_async", fake_llm)
+        agent = research_agent.LeadResearchAgent(knowledge_base=CompanyKnowledgeBase(path=":memory:"))
+        lead = asyncio.run(agent._enrich_company_data({"name": "Acme", "industry": "Software"}, "CRM"))
+        
+        assert lead["relevance_reason"] == "scaling sales"
+        assert lead["description"] == "CRM buyer"
+        print("✅ Single enrichment parsing: PASSED")
+    
+    def test_surplus_candidates_stop_at_max_leads(self, monkeypatch):
+        """Test that extra candidates make up for unverified ones and outstanding work is cancelled at max_leads
+        
+        At the cut-off the ready leads keep generation order (not completion
+        order) and an unfinished company ahead of them is skipped.
+        """
+        import asyncio
+        from agents import research_agent
+        
+        monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+        monkeypatch.setenv("SERPAPI_API_KEY", "test-key")
+        monkeypatch.setattr(research_agent, "TOOLS_AVAILABLE", True)
+        delays = {"Slow": 5, "Fake1": 0, "Real1": 0.03, "Fake2": 0, "Real2": 0.01, "Real3": 0.02}
+        requested, finished = [], []
+        
+        async def fake_check(name, location=None):
+            await asyncio.sleep(delays[name])
+            return not name.startswith("Fake")
+        
+        async def no_company_data(name, website=None):
+            return {"success": False}
+        
+        monkeypatch.setattr(research_agent, "check_company_exists_async", fake_check, raising=False)
+        monkeypatch.setattr(research_agent, "get_company_data_async", no_company_data, raising=False)
+        
+        class SurplusAgent(research_agent.LeadResearchAgent):
+            async def _stream_companies_llm(self, product_service, area, context=None, max_leads=10):
+                requested.append(max_leads)
+                for name in list(delays)[:max_leads]:
+                    yield {"name": name}
+            
+            async def _enrich_company_data(self, company, product_service, context=None):
+                finished.append(company["name"])
+                return {**company, "relevance_reason": "fit"}
+        
+        agent = SurplusAgent(concurrency=10, enrich_batch_tokens=0, candidate_surplus=1.0,
+                             knowledge_base=CompanyKnowledgeBase(path=":memory:"))
+        started = time.perf_counter()
+        leads = asyncio.run(agent.execute_async("CRM", "SF", max_leads=3))
+        
+        assert requested == [6]
+        assert finished == ["Real2", "Real3", "Real1"]
+        assert [lead["name"] for lead in leads] == ["Real1", "Real2", "Real3"]  # Generation order
+        assert "Slow" not in finished  # Skipped and cancelled instead of awaited
+        assert time.perf_counter() - started < 1
+        print("✅ Over-generate and stop: PASSED")
+    
+    def test_surplus_covers_duplicates_without_verification(self, monkeypatch):
+        """Test that duplicates dropped with verification off are made up for by extra candidates"""
+        import asyncio
+        from agents import research_agent
+        
+        monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+        monkeypatch.setattr(research_agent, "TOOLS_AVAILABLE", False)
+        names = ["Acme Corp", "Acme Corporation", "Beta Labs", "acme.com", "Gamma Inc", "Delta Co"]
+        requested = []
+        
+        class DuplicatingAgent(research_agent.LeadResearchAgent):
+            async def _stream_companies_llm(self, product_service, area, context=None, max_leads=10):
+                requested.append(max_leads)
+                for name in names[:max_leads]:
+                    yield {"name": name}
+            
+            async def _enrich_company_data(self, company, product_service, context=None):
+                return {**company, "relevance_reason": "fit"}
+        
+        agent = DuplicatingAgent(enrich_batch_tokens=0, candidate_surplus=1.0,
+                                 knowledge_base=CompanyKnowledgeBase(path=":memory:"))
+        leads = asyncio.run(agent.execute_async("CRM", "SF", max_leads=3))
+        
+        assert requested == [6]
+        assert [lead["name"] for lead in leads] == ["Acme Corp", "Beta Labs", "Gamma Inc"]
+        print("✅ Surplus without verification: PASSED")
+
+
+class TestParallelGeneration:
+    """Test cases for lead-level parallel content generation"""
+    
+    @pytest.fixture(autouse=True)
+    def progress_store(self, tmp_path, monkeypatch):
+        """Publish generation progress to a throwaway database"""
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from database import Base
+        import db_models  # noqa: F401
+        import agents.progress as progress_module
+        from campaign_state import CampaignStateStore
+        
+        engine = create_engine(f"sqlite:///{tmp_path / 'progress.db'}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        store = CampaignStateStore(session_factory=sessionmaker(bind=engine), loader=lambda _: None, memory_entries=0)
+        monkeypatch.setattr(progress_module, "_store", store)
+        return store
+    
+    def test_leads_run_in_parallel_and_failures_are_partial(self, monkeypatch):
+        """Test that leads are generated concurrently and a failing lead is reported, not fatal"""
+        import asyncio
+        from agents.orchestrator import CampaignOrchestrator
+        from agents.progress import get_generation_progress
+        
+        monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+        orchestrator = CampaignOrchestrator(generation_concurrency=4)
+        running = {"now": 0, "peak": 0}
+        
+        async def fake_refinement(lead, *args, **kwargs):
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+            await asyncio.sleep(0.05)
+            running["now"] -= 1
+            if lead["name"] == "Broken":
+                raise RuntimeError("OpenAI API call failed: boom")
+            return f"Subject: Hi {lead['name']}", {"overall": 85}
+        
+        monkeypatch.setattr(orchestrator.content_agent, "execute_with_refinement_async", fake_refinement)
+        leads = [{"id": str(i), "name": name} for i, name in enumerate(["A", "Broken", "C", "D", "E", "F"])]
+        
+        started = time.perf_counter()
+        messages, failures = asyncio.run(orchestrator.generate_content(
+            "campaign-parallel", [lead["id"] for lead in leads], "CRM", all_leads=leads
+        ))
+        elapsed = time.perf_counter() - started
+        
+        assert [message["company_name"] for message in messages] == ["A", "C", "D", "E", "F"]
+        assert [failure["company_name"] for failure in failures] == ["Broken"]
+        assert running["peak"] == 4
+        assert elapsed < 0.25  # six leads one at a time would take 0.3s
+        
+        progress = get_generation_progress("campaign-parallel").to_dict()
+        assert progress["status"] == "partial"
+        assert (progress["completed"], progress["failed"], progress["pending"]) == (5, 1, 0)
+        assert progress["failures"][0]["company_name"] == "Broken"
+        print("✅ Parallel generation: PASSED")
+    
+    def test_progress_is_published_for_other_workers(self, monkeypatch):
+        """Test that a worker without the run in memory reads progress from the shared table"""
+        import asyncio
+        from collections import OrderedDict
+        import agents.progress as progress_module
+        from agents.orchestrator import CampaignOrchestrator
+        from routers.campaigns import get_generation_progress_endpoint
+        
+        monkeypatch.setenv("PROGRESS_PUBLISH_INTERVAL", "0")
+        monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+        orchestrator = CampaignOrchestrator(generation_concurrency=1)
+        seen = []
+        
+        async def fake_refinement(lead, *args, **kwargs):
+            seen.append(progress_module.load_generation_progress("campaign-shared")["completed"])
+            if lead["name"] == "Broken":
+                raise RuntimeError("boom")
+            return f"Subject: Hi {lead['name']}", {"overall": 85}
+        
+        monkeypatch.setattr(orchestrator.content_agent, "execute_with_refinement_async", fake_refinement)
+        leads = [{"id": str(i), "name": name} for i, name in enumerate(["A", "B", "Broken"])]
+        asyncio.run(orchestrator.generate_content("campaign-shared", [lead["id"] for lead in leads], "CRM", all_leads=leads))
+        assert seen == [0, 1, 2]  # each finished lead is published before the next starts
+        
+        # Another worker: nothing in its memory, the endpoint answers from the shared row
+        monkeypatch.setattr(progress_module, "_progress", OrderedDict())
+        published = asyncio.run(get_generation_progress_endpoint("campaign-shared"))
+        assert published["status"] == "partial"
+        assert (published["completed"], published["failed"], published["pending"]) == (2, 1, 0)
+        assert published["failures"][0]["company_name"] == "Broken"
+        print("✅ Shared generation progress: PASSED")
+    
+    def test_failing_event_listener_does_not_fail_generation(self, monkeypatch):
+        """Test that an event callback raising (e.g. a closed stream) leaves every lead generated"""
+        import asyncio
+        from agents.orchestrator import CampaignOrchestrator
+        
+        monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+        orchestrator = CampaignOrchestrator(generation_concurrency=2)
+        
+        async def fake_refinement(lead, *args, **kwargs):
+            on_event = args[-1]
+            await on_event("draft", {"iteration": 1})
+            return f"Subject: Hi {lead['name']}", {"overall": 85}
+        
+        delivered = []
+        
+        async def on_event(event, data):
+            if data["company_name"] == "B":
+                raise ConnectionResetError("client went away")
+            delivered.append((data["company_name"], event))
+        
+        monkeypatch.setattr(orchestrator.content_agent, "execute_with_refinement_async", fake_refinement)
+        leads = [{"id": str(i), "name": name} for i, name in enumerate(["A", "B", "C"])]
+        messages, failures = asyncio.run(orchestrator.generate_content(
+            "campaign-listener", [lead["id"] for lead in leads], "CRM", all_leads=leads, on_event=on_event
+        ))
+        
+        assert [message["company_name"] for message in messages] == ["A", "B", "C"]
+        assert failures == []
+        assert [event for name, event in delivered if name == "A"] == ["lead_started", "draft", "lead_complete"]
+        print("✅ Failing event listener: PASSED")
+
+
+class TestJobQueue:
+    """Test cases for the durable background job queue"""
+    
+    def _queue(self, tmp_path, **kwargs):
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from database import Base
+        from jobs import JobQueue
+        
+        engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        return JobQueue(sessionmaker(bind=engine), **kwargs)
+    
+    def test_expired_lease_is_reclaimed_with_checkpoint(self, tmp_path):
+        """Test that a job abandoned by a crashed worker resumes from its checkpoint"""
+        queue = self._queue(tmp_path)
+        job = queue.enqueue("research", "campaign-1", {"max_leads": 3}, total=3)
+        assert job["status"] == "queued"
+        
+        claimed = queue.claim("worker-a", lease_seconds=60)
+        assert claimed["job_id"] == job["job_id"]
+        assert claimed["payload"] == {"max_leads": 3}
+        assert queue.claim("worker-b", lease_seconds=60) is None  # still leased
+        
+        assert queue.checkpoint(job["job_id"], "worker-a", {"leads": [{"name": "A"}]}, 1)
+        assert queue.get(job["job_id"])["progress"] == {"total": 3, "completed": 1}
+        
+        # worker-a stops heartbeating; once its lease runs out worker-b takes over
+        assert queue.renew(job["job_id"], "worker-a", lease_seconds=-1)
+        reclaimed = queue.claim("worker-b", lease_seconds=60)
+        assert reclaimed["checkpoint"] == {"leads": [{"name": "A"}]}
+        assert reclaimed["attempts"] == 2
+        
+        # The old worker can no longer write to the job
+        assert not queue.checkpoint(job["job_id"], "worker-a", {"leads": []}, 0)
+        assert queue.complete(job["job_id"], "worker-b", {"ok": True})
+        assert queue.get(job["job_id"])["result"] == {"ok": True}
+        print("✅ Job lease reclaim: PASSED")
+    
+    def test_failures_retry_until_max_attempts_and_cancel(self, tmp_path):
+        """Test that failed attempts are requeued, then failed, and that cancel is final"""
+        queue = self._queue(tmp_path, max_attempts=2)
+        job = queue.enqueue("generate", "campaign-1", {})
+        
+        queue.claim("worker", lease_seconds=60)
+        assert queue.fail(job["job_id"], "worker", "boom") == "queued"
+        queue.claim("worker", lease_seconds=60)
+        assert queue.fail(job["job_id"], "worker", "boom") == "failed"
+        assert queue.claim("worker", lease_seconds=60) is None
+        
+        other = queue.enqueue("generate", "campaign-1", {})
+        queue.claim("worker", lease_seconds=60)
+        assert queue.cancel(other["job_id"])["status"] == "cancelled"
+        assert not queue.renew(other["job_id"], "worker", lease_seconds=60)
+        assert queue.stats()["failed"] == 1 and queue.stats()["cancelled"] == 1
+        print("✅ Job retries and cancel: PASSED")
+    
+    def test_worker_pool_heartbeats(self, tmp_path):
+        """Test that worker pools in any process are listed until they stop reporting"""
+        queue = self._queue(tmp_path)
+        queue.heartbeat("host-a:1", "host-a", 1, workers=2, running=1)
+        queue.heartbeat("host-b:2", "host-b", 2, workers=4, running=0)
+        queue.heartbeat("host-a:1", "host-a", 1, workers=2, running=2)
+        
+        pools = {pool["name"]: pool for pool in queue.live_workers(max_age=60)}
+        assert set(pools) == {"host-a:1", "host-b:2"}
+        assert pools["host-a:1"]["running"] == 2
+        
+        queue.remove_worker("host-b:2")
+        assert [pool["name"] for pool in queue.live_workers(max_age=60)] == ["host-a:1"]
+        assert queue.live_workers(max_age=-1) == []  # stale heartbeats are ignored
+        print("✅ Worker pool heartbeats: PASSED")
+    
+    def test_worker_pool_runs_and_checkpoints_jobs(self, tmp_path, monkeypatch):
+        """Test that pool workers run claimed jobs and record their progress"""
+        import asyncio
+        from jobs import JobWorkerPool, runner
+        
+        queue = self._queue(tmp_path)
+        
+        async def fake_runner(job, checkpoint):
+            await checkpoint({"done": 1}, 1, 1)
+            return {"kind": job["kind"]}
+        
+        monkeypatch.setitem(runner.JOB_RUNNERS, "research", fake_runner)
+        job = queue.enqueue("research", "campaign-1", {})
+        
+        async def run():
+            pool = JobWorkerPool(workers=2, lease_seconds=5, poll_interval=0.01, queue=queue, name="test")
+            await pool.start()
+            for _ in range(200):
+                if queue.get(job["job_id"])["status"] == "succeeded":
+                    break
+                await asyncio.sleep(0.01)
+            await pool.stop()
+            return pool.stats()
+        
+        stats = asyncio.run(run())
+        finished = queue.get(job["job_id"])
+        assert finished["status"] == "succeeded"
+        assert finished["result"] == {"kind": "research"}
+        assert finished["progress"]["completed"] == 1
+        assert stats["succeeded"] == 1
+        print("✅ Job worker pool: PASSED")
+
+
+class TestCampaignStateStore:
+    """Test cases for the two-tier campaign state store"""
+    
+    def _session_factory(self, tmp_path):
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from database import Base
+        import db_models  # noqa: F401
+        
+        engine = create_engine(f"sqlite:///{tmp_path / 'state.db'}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        return sessionmaker(bind=engine)
+    
+    def test_memory_tier_is_bounded_by_bytes(self):
+        """Test that the in-process tier evicts least recently used state over its byte budget"""
+        from campaign_state import CampaignStateStore
+        
+        store = CampaignStateStore(shared=False, memory_entries=10, memory_bytes=250, loader=lambda _: None)
+        for name in ["a", "b", "c"]:
+            store.set(name, {"leads": ["x" * 80]})
+        assert store.get("a") is None  # evicted: three entries exceed 250 bytes
+        assert store.get("c") == {"leads": ["x" * 80]}
+        
+        stats = store.stats()
+        assert stats["memory_entries"] == 2
+        assert stats["memory_bytes"] <= 250
+        assert stats["evictions"] == 1
+        print("✅ Campaign state memory bound: PASSED")
+    
+    def test_workers_share_state_and_read_through(self, tmp_path):
+        """Test that a write in one worker is seen by another, and misses rebuild from the loader"""
+        from campaign_state import CampaignStateStore
+        
+        factory = self._session_factory(tmp_path)
+        loads = []
+        
+        def loader(campaign_id):
+            loads.append(campaign_id)
+            return {"leads": ["restored"]} if campaign_id == "saved" else None
+        
+        worker_a = CampaignStateStore(session_factory=factory, loader=loader)
+        worker_b = CampaignStateStore(session_factory=factory, loader=loader)
+        
+        worker_a.set("c1", {"leads": ["lead"], "status": "research_complete"})
+        assert worker_b.get("c1")["leads"] == ["lead"]
+        
+        # worker_b caches its copy; a newer write from worker_a must replace it
+        worker_a.update("c1", status="generation_complete")
+        assert worker_b.get("c1")["status"] == "generation_complete"
+        assert worker_b.get("c1")["status"] == "generation_complete"
+        assert worker_b.stats()["memory_hits"] == 1
+        
+        assert worker_a.get("saved") == {"leads": ["restored"]}
+        assert worker_b.get("saved") == {"leads": ["restored"]}
+        assert worker_a.get("missing") is None
+        assert loads == ["saved", "missing"]
+        
+        worker_b.delete("c1")
+        assert worker_a.get("c1") is None
+        print("✅ Shared campaign state: PASSED")
+    
+    def test_concurrent_writes_get_distinct_versions(self, tmp_path):
+        """Test that workers writing the same campaign at once never share a version"""
+        import threading
+        from campaign_state import CampaignStateStore
+        
+        factory = self._session_factory(tmp_path)
+        workers = [CampaignStateStore(session_factory=factory, loader=lambda _: None) for _ in range(4)]
+        versions = []
+        
+        def write(worker, n):
+            for i in range(10):
+                versions.append(worker._shared_set("c1", f'{{"writer": {n}, "write": {i}}}'))
+        
+        threads = [threading.Thread(target=write, args=(worker, n)) for n, worker in enumerate(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(versions) == list(range(1, 41))
+        print("✅ Campaign state versions: PASSED")
+
+
+class TestLeadStore:
+    """Test cases for the normalized leads table"""
+    
+    def _session(self, tmp_path):
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from database import Base
+        import db_models  # noqa: F401
+        
+        engine = create_engine(f"sqlite:///{tmp_path / 'leads.db'}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        return sessionmaker(bind=engine)()
+    
+    def _campaign(self, db, campaign_id, leads_data=None):
+        from db_models import Campaign as DBCampaign
+        db.add(DBCampaign(id=campaign_id, product_service="CRM", area="SF", leads_data=leads_data))
+        db.commit()
+    
+    def test_selected_leads_load_in_research_order(self, tmp_path):
+        """Test that leads are appended incrementally and loaded by id"""
+        from lead_store import save_leads, load_leads
+        
+        db = self._session(tmp_path)
+        self._campaign(db, "c1")
+        leads = [{"id": f"l{i}", "name": f"Co{i}", "industry": "SaaS", "verified": True} for i in range(5)]
+        save_leads(db, "c1", leads[:3])
+        save_leads(db, "c1", leads[3:], start_position=3)
+        db.commit()
+        
+        assert [lead["id"] for lead in load_leads(db, "c1")] == ["l0", "l1", "l2", "l3", "l4"]
+        assert [lead["name"] for lead in load_leads(db, "c1", ["l4", "l1"])] == ["Co1", "Co4"]
+        
+        # Writing a lead again updates its row instead of duplicating it
+        save_leads(db, "c1", [{"id": "l1", "name": "Co1 Inc"}], start_position=1)
+        db.commit()
+        assert len(load_leads(db, "c1")) == 5
+        assert load_leads(db, "c1", ["l1"])[0]["name"] == "Co1 Inc"
+        print("✅ Lead store: PASSED")
+    
+    def test_leads_data_blobs_are_migrated(self, tmp_path):
+        """Test that legacy leads_data JSON is moved into the leads table"""
+        import json
+        from db_models import Campaign as DBCampaign
+        from lead_store import load_leads, migrate_leads_data
+        
+        db = self._session(tmp_path)
+        self._campaign(db, "legacy", json.dumps([{"id": "a", "name": "Acme"}, {"id": "b", "name": "Beta"}]))
+        self._campaign(db, "broken", "{not json")
+        
+        assert migrate_leads_data(db) == 1
+        assert [lead["name"] for lead in load_leads(db, "legacy")] == ["Acme", "Beta"]
+        assert db.query(DBCampaign).filter(DBCampaign.id == "legacy").first().leads_data is None
+        assert migrate_leads_data(db) == 0  # idempotent
+        print("✅ Leads migration: PASSED")
+
+
+class TestAsyncDatabase:
+    """Test cases for the async, read/write-separated SQLite setup"""
+    
+    def test_reads_do_not_wait_for_open_write_transaction(self, tmp_path):
+        """Test that a read-only async session reads while a writer holds the write lock"""
+        import asyncio
+        import sqlite3
+        from sqlalchemy import event, text
+        from sqlalchemy.exc import OperationalError
+        from sqlalchemy.ext.asyncio import create_async_engine
+        from database import _sqlite_pragmas
+        
+        path = tmp_path / "wal.db"
+        writer = sqlite3.connect(path, isolation_level=None)
+        writer.execute("PRAGMA journal_mode=WAL")
+        writer.execute("CREATE TABLE campaigns (id TEXT)")
+        writer.execute("INSERT INTO campaigns VALUES ('committed')")
+        writer.execute("BEGIN IMMEDIATE")
+        writer.execute("INSERT INTO campaigns VALUES ('uncommitted')")
+        
+        async def read():
+            engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+            event.listen(engine.sync_engine, "connect", _sqlite_pragmas(read_only=True))
+            try:
+                async with engine.connect() as conn:
+                    started = time.perf_counter()
+                    rows = (await conn.execute(text("SELECT id FROM campaigns"))).scalars().all()
+                    elapsed = time.perf_counter() - started
+                    with pytest.raises(OperationalError):
+                        await conn.execute(text("DELETE FROM campaigns"))
+                return rows, elapsed
+            finally:
+                await engine.dispose()
+        
+        try:
+            rows, elapsed = asyncio.run(read())
+        finally:
+            writer.execute("ROLLBACK")
+            writer.close()
+        
+        assert rows == ["committed"]
+        assert elapsed < 0.5  # did not wait on the writer's lock
+        print("✅ Async reads alongside writer: PASSED")
+
+
+class TestMessageStore:
+    """Test cases for bulk message writes"""
+    
+    def test_500_messages_upsert_in_one_statement(self, tmp_path):
+        """Test that a generation batch is one INSERT ... ON CONFLICT and keeps existing ids"""
+        from sqlalchemy import create_engine, event
+        from sqlalchemy.orm import sessionmaker
+        from database import Base
+        from db_models import Campaign as DBCampaign, Message as DBMessage
+        from message_store import upsert_messages, replace_messages
+        
+        engine = create_engine(f"sqlite:///{tmp_path / 'messages.db'}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        db.add(DBCampaign(id="c1", product_service="CRM", area="SF"))
+        db.commit()
+        
+        def message(i, content="Hello", message_id=None):
+            return {"id": message_id or f"new-{i}", "lead_id": f"lead-{i}", "company_name": f"Co{i}", "industry": "SaaS",
+                    "location": "SF", "content": content, "quality_score": 80}
+        
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        stored = upsert_messages(db, "c1", [message(i) for i in range(500)])
+        db.commit()
+        assert len([sql for sql in statements if sql.startswith("INSERT")]) == 1
+        assert stored["lead-7"] == "new-7"
+        
+        # Regenerating a lead updates its row in place and keeps the original id
+        stored = upsert_messages(db, "c1", [message(7, "Regenerated", message_id="newer-7")])
+        db.commit()
+        assert stored == {"lead-7": "new-7"}
+        assert db.query(DBMessage).count() == 500
+        assert db.query(DBMessage).filter(DBMessage.lead_id == "lead-7").one().content == "Regenerated"
+        
+        # Two leads with the same company name keep a message each
+        namesake = {**message(8), "company_name": "Co7"}
+        upsert_messages(db, "c1", [namesake])
+        db.commit()
+        assert db.query(DBMessage).filter(DBMessage.company_name == "Co7").count() == 2
+        
+        # Saved messages sent back without their lead id keep it
+        replace_messages(db, "c1", [{**message(1), "lead_id": None}, message(2)])
+        db.commit()
+        assert sorted(lead for (lead,) in db.query(DBMessage.lead_id)) == ["lead-1", "lead-2"]
+        print("✅ Bulk message upsert: PASSED")
+    
+    def test_lead_id_migration_keeps_every_message(self, tmp_path, monkeypatch):
+        """Test that upgrading a database with per-company messages backfills lead ids without deleting rows"""
+        import sqlite3
+        import database
+        import db_models  # noqa: F401 - registers the tables init_db creates
+        from sqlalchemy import create_engine
+        
+        path = tmp_path / "upgrade.db"
+        conn = sqlite3.connect(path)
+        conn.executescript("""
+            CREATE TABLE campaigns (id TEXT PRIMARY KEY, product_service TEXT NOT NULL, area TEXT NOT NULL, context TEXT,
+                max_leads INTEGER, status TEXT, leads_found INTEGER, leads_selected INTEGER, leads_data TEXT, created_at DATETIME);
+            CREATE TABLE messages (id TEXT PRIMARY KEY, campaign_id TEXT NOT NULL, company_name TEXT NOT NULL,
+                industry TEXT NOT NULL, location TEXT NOT NULL, content TEXT NOT NULL, quality_score INTEGER NOT NULL,
+                created_at DATETIME NOT NULL);
+            INSERT INTO campaigns (id, product_service, area, status, leads_found, leads_selected, created_at, leads_data)
+                VALUES ('c1', 'CRM', 'SF', 'RESEARCH_COMPLETE', 3, 3, '2026-10-01 08:00:00',
+                        '[{"id": "l1", "name": "Acme"}, {"id": "l2", "name": "Beta"}, {"id": "l3", "name": "Beta"}]');
+            INSERT INTO messages VALUES ('m1', 'c1', 'Acme', 'SaaS', 'SF', 'one', 80, '2026-10-01 09:00:00');
+            INSERT INTO messages VALUES ('m2', 'c1', 'Beta', 'SaaS', 'SF', 'two', 80, '2026-10-01 09:00:00');
+            INSERT INTO messages VALUES ('m3', 'c1', 'Beta', 'SaaS', 'SF', 'three', 80, '2026-10-01 09:00:00');
+        """)
+        conn.commit()
+        conn.close()
+        
+        monkeypatch.setattr(database, "DATABASE_URL", f"sqlite:///{path}")
+        monkeypatch.setattr(database, "engine", create_engine(f"sqlite:///{path}"))
+        monkeypatch.setattr(database, "SessionLocal", database.sessionmaker(bind=database.engine))
+        database.init_db()
+        
+        rows = dict(sqlite3.connect(path).execute("SELECT id, lead_id FROM messages").fetchall())
+        assert rows == {"m1": "l1", "m2": None, "m3": None}  # "Beta" is ambiguous: left unmatched, not deleted
+        print("✅ Messages lead_id migration: PASSED")
+
+
+class TestCampaignRollups:
+    """Test cases for the trigger-maintained dashboard counters"""
+    
+    def test_triggers_track_inserts_updates_and_deletes(self, tmp_path):
+        """Test that rollups match a live aggregate after every kind of write"""
+        from datetime import datetime
+        from sqlalchemy import create_engine, func
+        from sqlalchemy.orm import sessionmaker
+        from database import Base
+        from db_models import Campaign as DBCampaign, CampaignRollup
+        from rollups import install_campaign_rollups
+        
+        engine = create_engine(f"sqlite:///{tmp_path / 'rollups.db'}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        # A campaign from before the triggers existed is picked up by the backfill
+        db.add(DBCampaign(id="old", product_service="CRM", area="SF", leads_found=4,
+                          created_at=datetime(2026, 9, 30, 23, 59)))
+        db.commit()
+        with engine.begin() as conn:
+            assert install_campaign_rollups(conn) is True
+            assert install_campaign_rollups(conn) is False
+        
+        db.add_all([
+            DBCampaign(id="a", product_service="CRM", area="SF", leads_found=0, created_at=datetime(2026, 10, 1, 8)),
+            DBCampaign(id="b", product_service="CRM", area="NY", leads_found=2, created_at=datetime(2026, 10, 2, 8)),
+        ])
+        db.commit()
+        db.get(DBCampaign, "a").leads_found = 5
+        db.get(DBCampaign, "b").context = "Enterprise"  # Unrelated column: no rollup change
+        db.commit()
+        db.delete(db.get(DBCampaign, "old"))
+        db.commit()
+        
+        def rollup(period, bucket):
+            row = db.get(CampaignRollup, (period, bucket))
+            return (row.campaigns, row.leads_found) if row else None
+        
+        assert rollup("all", "all") == (
+            db.query(func.count(DBCampaign.id)).scalar(), db.query(func.sum(DBCampaign.leads_found)).scalar()
+        ) == (2, 7)
+        assert rollup("day", "2026-10-01") == (1, 5)
+        assert rollup("day", "2026-10-02") == (1, 2)
+        assert rollup("day", "2026-09-30") == (0, 0)
+        print("✅ Campaign rollup triggers: PASSED")
+    
+    def test_dashboard_cache_dropped_at_commit(self, tmp_path):
+        """Test that campaign writes drop the cached dashboard when committed, not when flushed"""
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from database import Base
+        from db_models import Campaign as DBCampaign
+        from routers import dashboard
+        
+        engine = create_engine(f"sqlite:///{tmp_path / 'dashboard.db'}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        generation = dashboard._cache_generation
+        
+        db.add(DBCampaign(id="a", product_service="CRM", area="SF", leads_found=1))
+        db.flush()
+        assert dashboard._cache_generation == generation  # Not visible to other sessions yet
+        db.commit()
+        assert dashboard._cache_generation == generation + 1
+        
+        db.get(DBCampaign, "a").leads_found = 3
+        db.flush()
+        db.rollback()
+        db.commit()
+        assert dashboard._cache_generation == generation + 1  # Rolled back: nothing to drop
+        print("✅ Dashboard cache invalidation at commit: PASSED")
+
+
+class TestHistoryPagination:
+    """Test cases for keyset pagination of the history API"""
+    
+    def test_cursor_walks_every_campaign_once(self, tmp_path):
+        """Test that pages on (created_at, id) cover ties exactly once and honour filters and projection"""
+        from datetime import datetime, timedelta
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+        from database import Base, get_read_db
+        from db_models import Campaign as DBCampaign, CampaignStatusEnum
+        from routers import history
+        
+        path = tmp_path / "history.db"
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        start = datetime(2026, 10, 1)
+        for i in range(25):
+            db.add(DBCampaign(
+                id=f"c{i:02d}", product_service="CRM", area="SF",
+                created_at=start + timedelta(hours=i // 5),  # five campaigns per timestamp
+                status=CampaignStatusEnum.COMPLETED if i % 2 else CampaignStatusEnum.RESEARCH_COMPLETE
+            ))
+        db.commit()
+        
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        sessions = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+        
+        async def read_db():
+            async with sessions() as session:
+                yield session
+        
+        app = FastAPI()
+        app.include_router(history.router)
+        app.dependency_overrides[get_read_db] = read_db
+        client = TestClient(app)
+        
+        def walk(**params):
+            seen, cursor = [], None
+            while True:
+                response = client.get("/api/history/", params={**params, **({"cursor": cursor} if cursor else {})})
+                assert response.status_code == 200
+                seen += response.json()
+                cursor = response.headers.get(history.NEXT_CURSOR_HEADER)
+                if not cursor:
+                    return seen
+        
+        pages = walk(limit=3, fields="id")
+        assert [row["id"] for row in pages] == [f"c{i:02d}" for i in reversed(range(25))]
+        assert all(set(row) == {"id"} for row in pages)
+        
+        completed = walk(limit=4, status="completed", created_after="2026-10-01T02:00:00")
+        assert [row["id"] for row in completed] == ["c23", "c21", "c19", "c17", "c15", "c13", "c11"]
+        assert client.get("/api/history/", params={"fields": "content"}).status_code == 400
+        print("✅ History keyset pagination: PASSED")
+
+
+class TestSearchIndex:
+    """Test cases for the FTS5 message search index"""
+    
+    def test_triggers_keep_index_in_sync(self, tmp_path):
+        """Test that message and campaign writes are searchable straight away, with snippets"""
+        from sqlalchemy import create_engine, text
+        from sqlalchemy.orm import sessionmaker
+        from database import Base
+        from db_models import Campaign as DBCampaign, Message as DBMessage
+        from message_store import upsert_messages
+        from search_index import install_search_index, build_match_query
+        
+        engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        db.add(DBCampaign(id="c1", product_service="Compliance automation", area="London"))
+        db.commit()
+        upsert_messages(db, "c1", [{"id": "m1", "company_name": "PayFlow", "industry": "Fintech", "location": "London",
+                                    "content": "Getting SOC 2 ready is hard for payment teams.", "quality_score": 80}])
+        db.commit()
+        with engine.begin() as conn:
+            assert install_search_index(conn) is True  # Existing messages are indexed
+        upsert_messages(db, "c1", [{"id": "m2", "company_name": "MedCo", "industry": "Healthcare", "location": "London",
+                                    "content": "HIPAA and SOC 2 reports, done.", "quality_score": 70}])
+        db.commit()
+        
+        def search(query, **filters):
+            return db.execute(text(
+                "SELECT message_id, snippet(message_search, 0, '[', ']', '…', 16) FROM message_search "
+                "WHERE message_search MATCH :match ORDER BY rank"
+            ), {"match": build_match_query(query, **filters)}).all()
+        
+        assert search('"SOC 2"', industry="fintech") == [("m1", "Getting [SOC 2] ready is hard for payment teams.")]
+        assert sorted(row[0] for row in search("soc")) == ["m1", "m2"]
+        assert search('payment"s (') == []  # Punctuation is matched literally, not parsed
+        
+        db.get(DBCampaign, "c1").area = "Berlin"
+        db.commit()
+        assert len(search("berlin")) == 2
+        db.query(DBMessage).filter(DBMessage.id == "m2").delete()
+        db.commit()
+        assert [row[0] for row in search("soc")] == ["m1"]
+        db.execute(text("DELETE FROM campaigns WHERE id = 'c1'"))  # Campaign removed before its messages
+        db.commit()
+        assert search("berlin") == [] and [row[0] for row in search("soc")] == ["m1"]
+        
+        # The index matches what the source view yields (a wrong delete would corrupt it)
+        db.execute(text("INSERT INTO message_search (message_search, rank) VALUES ('integrity-check', 1)"))
+        print("✅ Full-text search index: PASSED")
+
+
+class TestStorageCompression:
+    """Test cases for compressed, deferred message bodies and lead data"""
+    
+    def test_existing_rows_convert_and_stay_readable(self, tmp_path):
+        """Test that plain-text rows are compressed in batches, read back unchanged, and only loaded on use"""
+        from sqlalchemy import create_engine, event, text
+        from sqlalchemy.orm import sessionmaker
+        from database import Base
+        from db_models import Campaign as DBCampaign, Message as DBMessage
+        from storage_compression import compress_existing_rows
+        
+        engine = create_engine(f"sqlite:///{tmp_path / 'compress.db'}")
+        Base.metadata.create_all(bind=engine)
+        body = "Hi Acme, we help payment teams get SOC 2 ready in weeks. " * 20
+        with engine.begin() as conn:
+            conn.execute(text(
+                "INSERT INTO campaigns (id, product_service, area, max_leads, status, leads_found, leads_selected, created_at) "
+                "VALUES ('c1', 'CRM', 'SF', 10, 'COMPLETED', 0, 0, '2026-10-01')"
+            ))
+            # Rows written before compression existed: plain TEXT
+            conn.execute(text(
+                "INSERT INTO messages (id, campaign_id, company_name, industry, location, content, quality_score, created_at) "
+                "VALUES (:id, 'c1', :company, 'SaaS', 'SF', :content, 80, '2026-10-01')"
+            ), [{"id": f"m{i}", "company": f"Co{i}", "content": body if i else "Short"} for i in range(5)])
+        
+        assert compress_existing_rows(engine, batch_size=2) == {"messages.content": 4, "leads.data": 0}
+        with engine.connect() as conn:
+            types = dict(conn.execute(text("SELECT id, typeof(content) FROM messages")).all())
+            stored = conn.execute(text("SELECT SUM(length(content)) FROM messages WHERE id != 'm0'")).scalar()
+        assert types == {"m0": "text", "m1": "blob", "m2": "blob", "m3": "blob", "m4": "blob"}
+        assert stored < len(body)  # All four bodies together are smaller than one plain body
+        
+        db = sessionmaker(bind=engine)()
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        messages = db.query(DBMessage).order_by(DBMessage.id).all()
+        assert "content" not in statements[-1].split("FROM")[0]  # Deferred
+        assert [message.content for message in messages] == ["Short"] + [body] * 4
+        
+        db.add(DBMessage(id="m5", campaign_id="c1", company_name="Co5", industry="SaaS", location="SF",
+                         content=body, quality_score=70))
+        db.commit()
+        assert db.execute(text("SELECT typeof(content) FROM messages WHERE id = 'm5'")).scalar() == "blob"
+        print("✅ Compressed storage: PASSED")
+
+
+class TestCompanyKnowledgeBase:
+    """Test cases for the persistent company knowledge base"""
+    
+    def test_key_normalizes_name_and_domain(self):
+        """Test that spelling variants of one company share a key and different domains do not"""
+        key = CompanyKnowledgeBase.make_key("Acme, Inc.", "https://www.Acme.com/about")
+        assert key == "acme|acme.com"
+        assert CompanyKnowledgeBase.make_key("ACME Corp", "acme.com") == key
+        assert CompanyKnowledgeBase.make_key("Acme", "acme.io") != key
+        assert CompanyKnowledgeBase.make_key("Company", None) == "company|"  # Never normalized away
+        print("✅ Company key normalization: PASSED")
+    
+    def test_fields_expire_independently(self, tmp_path):
+        """Test that each field has its own TTL and survives a restart"""
+        path = str(tmp_path / "kb.db")
+        kb = CompanyKnowledgeBase(path=path, verification_ttl=3600, provider_data_ttl=0.01, enrichment_ttl=3600, enabled=True)
+        offer = kb.offer_key("CRM", "Series A")
+        kb.record_verification("Acme Inc", "acme.com", True)
+        kb.record_provider_data("Acme Inc", "acme.com", {"employees": "50", "provider": "clearbit"})
+        kb.record_enrichment("Acme Inc", "acme.com", offer, {"name": "Acme", "relevance_reason": "needs CRM"})
+        time.sleep(0.02)
+        
+        restarted = CompanyKnowledgeBase(path=path, verification_ttl=3600, provider_data_ttl=0.01, enrichment_ttl=3600, enabled=True)
+        assert restarted.lookup("ACME", "https://acme.com") == {"verified": True, "provider_data": None}
+        assert restarted.get_enrichment("Acme", "acme.com", offer) == {"relevance_reason": "needs CRM"}
+        assert restarted.get_enrichment("Acme", "acme.com", kb.offer_key("Payroll")) is None
+        assert restarted.stats()["companies"] == 1
+        print("✅ Company knowledge base TTLs: PASSED")
+    
+    def test_repeat_research_skips_tools(self, monkeypatch):
+        """Test that a second run reuses verification, provider data and enrichment, and skips known fakes"""
+        import asyncio
+        from agents import research_agent
+        
+        monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+        monkeypatch.setenv("SERPAPI_API_KEY", "test-key")
+        monkeypatch.setattr(research_agent, "TOOLS_AVAILABLE", True)
+        calls = []
+        
+        async def fake_check(name, location=None):
+            calls.append(("verify", name))
+            return name != "Ghost"
+        
+        async def fake_company_data(name, website=None):
+            calls.append(("company_data", name))
+            return {"success": True, "data": {"employees": "120", "provider": "clearbit", "website": "https://real.example"}}
+        
+        monkeypatch.setattr(research_agent, "check_company_exists_async", fake_check, raising=False)
+        monkeypatch.setattr(research_agent, "get_company_data_async", fake_company_data, raising=False)
+        
+        class KnowledgeAgent(research_agent.LeadResearchAgent):
+            async def _stream_companies_llm(self, product_service, area, context=None, max_leads=10):
+                for name in ("Acme", "Ghost"):
+                    yield {"name": name, "industry": "Software", "website": f"https://{name.lower()}.com"}
+            
+            async def _enrich_company_data(self, company, product_service, context=None):
+                calls.append(("enrich", company["name"]))
+                return {**company, "relevance_reason": "needs CRM", "recent_news": "raised"}
+        
+        kb = CompanyKnowledgeBase(path=":memory:", enabled=True)
+        agent = KnowledgeAgent(enrich_batch_tokens=0, knowledge_base=kb)
+        first = asyncio.run(agent.execute_async("CRM", "SF", max_leads=2))
+        assert sorted(calls) == [("company_data", "Acme"), ("enrich", "Acme"), ("verify", "Acme"), ("verify", "Ghost")]
+        
+        calls.clear()
+        second = asyncio.run(agent.execute_async("CRM", "SF", max_leads=2))
+        assert calls == []
+        strip = lambda leads: [{k: v for k, v in lead.items() if k != "id"} for lead in leads]
+        assert strip(second) == strip(first)
+        assert second[0]["employees"] == "120" and second[0]["relevance_reason"] == "needs CRM"
+        
+        # A different offer needs a new enrichment, but not new tool calls
+        asyncio.run(agent.execute_async("Payroll", "SF", max_leads=2))
+        assert calls == [("enrich", "Acme")]
+        print("✅ Company knowledge base in research: PASSED")
+
+
+class TestEntityResolution:
+    """Test cases for deduplicating generated companies"""
+    
+    def test_variants_resolve_to_one_entity(self):
+        """Test that name, legal-form, domain and spelling variants match and different companies do not"""
+        from agents.entity_resolution import CompanyIndex
+        
+        index = CompanyIndex(threshold=0.8)
+        acme = index.add({"name": "Acme Corp", "website": "https://acmecorp.com"})
+        assert index.add({"name": "Acme Corporation", "website": "https://acmecorporation.com"}) == acme
+        assert index.add({"name": "acme.com"}) == acme
+        assert index.find({"name": "Totally Different", "website": "https://www.acme.com/about"}) == acme
+        
+        logistics = index.add({"name": "BrightPath Logistics"})
+        assert index.find({"name": "Bright Path Logistic LLC"}) == logistics  # Fuzzy
+        assert index.add({"name": "Acme Software"}) not in (acme, logistics)
+        assert index.add({"name": "Acme Hardware"}) not in (acme, logistics)
+        # Profile hosts are shared by many companies
+        assert index.add({"name": "Zeta", "website": "linkedin.com/company/zeta"}) != index.add({"name": "Eta", "website": "linkedin.com/company/eta"})
+        assert len(index) == 6
+        print("✅ Company variants: PASSED")
+    
+    def test_resolve_does_not_hold_the_connection(self):
+        """Test that matching against the loaded index does not wait for the SQLite connection"""
+        import threading
+        
+        kb = CompanyKnowledgeBase(path=":memory:", enabled=True)
+        kb.record_verification("Acme Corp", "acmecorp.com", True)
+        assert kb.resolve("Acme Corporation")["name"] == "Acme Corp"  # Loads the index
+        kb.record_verification("Beta Labs", "betalabs.com", True)  # Added to the loaded index
+        
+        results = []
+        with kb._lock:  # A long write holding the connection
+            thread = threading.Thread(target=lambda: results.append(kb.resolve("Beta Labs LLC")))
+            thread.start()
+            thread.join(timeout=2)
+        assert results == [{"name": "Beta Labs", "domain": "betalabs.com"}]
+        print("✅ Resolve without the connection lock: PASSED")
+    
+    def test_duplicates_are_dropped_before_research(self, monkeypatch):
+        """Test that duplicates in one response are merged and known companies keep their stored name"""
+        import asyncio
+        from agents import research_agent
+        
+        monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+        monkeypatch.setattr(research_agent, "TOOLS_AVAILABLE", False)
+        enriched = []
+        
+        class DuplicatingAgent(research_agent.LeadResearchAgent):
+            async def _stream_companies_llm(self, product_service, area, context=None, max_leads=10):
+                yield {"name": "Acme Corp", "website": "https://acmecorp.com"}
+                yield {"name": "Beta Labs", "website": "https://betalabs.com"}
+                yield {"name": "Acme Corporation", "website": "https://acmecorporation.com", "description": "CRM buyer"}
+                yield {"name": "acme.com"}
+            
+            async def _enrich_company_data(self, company, product_service, context=None):
+                await asyncio.sleep(0.01)
+                enriched.append(company["name"])
+                return {**company, "relevance_reason": f"fit for {product_service}"}
+        
+        kb = CompanyKnowledgeBase(path=":memory:", enabled=True)
+        kb.record_verification("Beta Laboratories Inc", "betalabs.com", True)
+        agent = DuplicatingAgent(enrich_batch_tokens=0, knowledge_base=kb)
+        
+        leads = asyncio.run(agent.execute_async("CRM", "SF", max_leads=4))
+        assert [lead["name"] for lead in leads] == ["Acme Corp", "Beta Laboratories Inc"]
+        assert sorted(enriched) == ["Acme Corp", "Beta Laboratories Inc"]
+        assert leads[0]["description"] == "CRM buyer"  # Filled in from the duplicate
+        assert leads[1]["website"] == "https://betalabs.com"
+        
+        # The next campaign reuses what the first one stored
+        enriched.clear()
+        leads = asyncio.run(agent.execute_async("CRM", "SF", max_leads=1))
+        assert leads[0]["name"] == "Acme Corp" and enriched == []
+        print("✅ Duplicate companies: PASSED")
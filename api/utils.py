@@ -1,6 +1,9 @@
 """
 Utility functions for the API
 """
+from typing import Any
+import json
+
 from models import CampaignStatus
 from db_models import CampaignStatusEnum
 
@@ -16,3 +19,19 @@ def map_db_status_to_pydantic(db_status: CampaignStatusEnum) -> CampaignStatus:
     }
     return status_mapping.get(db_status, CampaignStatus.RESEARCH_IN_PROGRESS)
 
+
+def map_pydantic_status_to_db(status: CampaignStatus) -> CampaignStatusEnum:
+    """Map Pydantic enum status to database enum status"""
+    status_mapping = {
+        CampaignStatus.RESEARCH_IN_PROGRESS: CampaignStatusEnum.RESEARCH_IN_PROGRESS,
+        CampaignStatus.RESEARCH_COMPLETE: CampaignStatusEnum.RESEARCH_COMPLETE,
+        CampaignStatus.GENERATION_IN_PROGRESS: CampaignStatusEnum.GENERATION_IN_PROGRESS,
+        CampaignStatus.GENERATION_COMPLETE: CampaignStatusEnum.GENERATION_COMPLETE,
+        CampaignStatus.COMPLETED: CampaignStatusEnum.COMPLETED,
+    }
+    return status_mapping[status]
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,114 @@
+"""
+SmartReach job worker - runs queued campaign jobs outside the API process
+
+    python -m worker --processes 4 --concurrency 2
+
+Starts N worker processes. Each has its own event loop, LLM connection pool
+and JobWorkerPool, and claims jobs from the shared SQLite database (WAL
+mode) with renewable leases, so more processes - on this host or any host
+sharing the database - mean more throughput. Run the API with JOB_WORKERS=0
+so it only enqueues jobs and keeps serving requests.
+"""
+from typing import Dict
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import time
+
+from agents.settings import env_int, env_float
+
+
+async def _serve(concurrency: int):
+    """Run one worker pool until SIGTERM/SIGINT, then hand running jobs back to the queue"""
+    from agents.llm_client import init_llm_clients, shutdown_llm_clients
+    from jobs import JobWorkerPool
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            # Windows: fall back to KeyboardInterrupt for Ctrl+C
+            pass
+
+    await init_llm_clients()
+    pool = JobWorkerPool(workers=concurrency)
+    await pool.start()
+    try:
+        await stop.wait()
+    finally:
+        print(f"[WORKER] Process {os.getpid()} stopping")
+        await pool.stop()
+        await shutdown_llm_clients()
+
+
+def _run_process(concurrency: int):
+    """Entry point of one worker process"""
+    try:
+        asyncio.run(_serve(concurrency))
+    except KeyboardInterrupt:
+        pass
+
+
+def _spawn(context, concurrency: int) -> multiprocessing.Process:
+    process = context.Process(target=_run_process, args=(concurrency,), daemon=False)
+    process.start()
+    print(f"[WORKER] Started worker process {process.pid} ({concurrency} concurrent jobs)")
+    return process
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run SmartReach background job workers")
+    parser.add_argument(
+        "--processes", type=int, default=env_int("WORKER_PROCESSES", os.cpu_count() or 1),
+        help="Worker processes to run (default: WORKER_PROCESSES or the number of CPUs)"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=env_int("WORKER_CONCURRENCY", 2),
+        help="Jobs each process runs at the same time (default: WORKER_CONCURRENCY or 2)"
+    )
+    args = parser.parse_args(argv)
+
+    from database import init_db
+    import db_models  # noqa: F401 - registers the tables init_db creates
+    init_db()
+
+    # Spawn rather than fork: children must not inherit the parent's DB connections
+    context = multiprocessing.get_context("spawn")
+    processes: Dict[int, multiprocessing.Process] = {}
+    for slot in range(max(1, args.processes)):
+        processes[slot] = _spawn(context, args.concurrency)
+
+    stopping = False
+
+    def request_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    # Supervise: replace processes that die; their leased jobs are reclaimed once the lease expires
+    while not stopping:
+        time.sleep(1)
+        for slot, process in list(processes.items()):
+            if not process.is_alive() and not stopping:
+                print(f"[WORKER] Worker process {process.pid} exited with code {process.exitcode}; restarting")
+                processes[slot] = _spawn(context, args.concurrency)
+
+    print("[WORKER] Shutting down worker processes")
+    for process in processes.values():
+        if process.is_alive():
+            process.terminate()  # SIGTERM: the pool releases its running jobs
+    deadline = time.monotonic() + env_float("WORKER_SHUTDOWN_TIMEOUT", 30.0)
+    for process in processes.values():
+        process.join(max(0.0, deadline - time.monotonic()))
+        if process.is_alive():
+            process.kill()
+
+
+if __name__ == "__main__":
+    main()
@@ -14,19 +14,34 @@ interface Campaign {
   status: 'research-in-progress' | 'research-complete' | 'generation-in-progress' | 'generation-complete' | 'completed'
 }
 
+const HISTORY_URL = 'http://localhost:8000/api/history/'
+const LIST_FIELDS = 'id,product_service,area,created_at,leads_found,leads_selected,status'
+
 export default function HistoryPage() {
   const [allCampaigns, setAllCampaigns] = useState<Campaign[]>([])
   const [loading, setLoading] = useState(true)
+  const [loadingMore, setLoadingMore] = useState(false)
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
   const [statusFilter, setStatusFilter] = useState<string>('all')
   const [searchQuery, setSearchQuery] = useState<string>('')
   const [deletingCampaignId, setDeletingCampaignId] = useState<string | null>(null)
   
+  // Fetch one page of campaigns; the API returns the next page's cursor in X-Next-Cursor
+  const fetchPage = async (cursor: string | null) => {
+    const params = new URLSearchParams({ fields: LIST_FIELDS })
+    if (statusFilter !== 'all') params.set('status', statusFilter)
+    if (cursor) params.set('cursor', cursor)
+    const response = await fetch(`${HISTORY_URL}?${params}`)
+    const data: Campaign[] = await response.json()
+    setNextCursor(response.headers.get('X-Next-Cursor'))
+    return data
+  }
+
   useEffect(() => {
     const fetchCampaigns = async () => {
+      setLoading(true)
       try {
-        const response = await fetch('http://localhost:8000/api/history/')
-        const data = await response.json()
-        setAllCampaigns(data)
+        setAllCampaigns(await fetchPage(null))
       } catch (error) {
         console.error('Failed to fetch campaigns:', error)
       } finally {
@@ -35,7 +50,20 @@ export default function HistoryPage() {
     }
 
     fetchCampaigns()
-  }, [])
+  }, [statusFilter])
+
+  const handleLoadMore = async () => {
+    if (!nextCursor) return
+    setLoadingMore(true)
+    try {
+      const data = await fetchPage(nextCursor)
+      setAllCampaigns(campaigns => [...campaigns, ...data])
+    } catch (error) {
+      console.error('Failed to fetch campaigns:', error)
+    } finally {
+      setLoadingMore(false)
+    }
+  }
 
   const handleDeleteCampaign = async (campaignId: string, e: React.MouseEvent) => {
     e.preventDefault()
@@ -66,13 +94,8 @@ export default function HistoryPage() {
     }
   }
 
-  // Filter campaigns based on status and search query
+  // Status is filtered by the API; filter loaded campaigns by search query
   const filteredCampaigns = allCampaigns.filter(campaign => {
-    // Filter by status
-    if (statusFilter !== 'all' && campaign.status !== statusFilter) {
-      return false
-    }
-    
     // Filter by search query
     if (searchQuery.trim()) {
       const query = searchQuery.toLowerCase()
@@ -223,13 +246,25 @@ export default function HistoryPage() {
           ))}
         </div>
 
+        {!loading && nextCursor && (
+          <div className="mt-6 text-center">
+            <button
+              onClick={handleLoadMore}
+              disabled={loadingMore}
+              className="px-6 py-2 bg-white border border-gray-300 rounded-lg text-gray-700 hover:bg-gray-50 transition-colors disabled:opacity-50 disabled:cursor-not-allowed"
+            >
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </button>
+          </div>
+        )}
+
         {loading && (
           <div className="bg-white rounded-lg shadow p-12 text-center">
             <p className="text-gray-500">Loading campaigns...</p>
           </div>
         )}
 
-        {!loading && allCampaigns.length === 0 && (
+        {!loading && allCampaigns.length === 0 && statusFilter === 'all' && (
           <div className="bg-white rounded-lg shadow p-12 text-center">
             <p className="text-gray-500">No campaigns found. Start your first lead generation campaign!</p>
             <a
@@ -241,7 +276,7 @@ export default function HistoryPage() {
           </div>
         )}
 
-        {!loading && allCampaigns.length > 0 && filteredCampaigns.length === 0 && (
+        {!loading && filteredCampaigns.length === 0 && (allCampaigns.length > 0 || statusFilter !== 'all') && (
           <div className="bg-white rounded-lg shadow p-12 text-center">
             <p className="text-gray-500">No campaigns match your filters. Try adjusting your search or status filter.</p>
           </div>